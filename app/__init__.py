@@ -1,5 +1,5 @@
 """Flask application factory."""
-from flask import Flask, g, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
 from flask_wtf.csrf import CSRFProtect
 from app.database import init_db
 import os
@@ -125,60 +125,14 @@ def create_app(config_object='config.Config'):
         if not request.is_secure and not app.debug:
             return redirect(request.url.replace("http://", "https://"), code=301)
     
-    # Context processor for invoice alerts (MEJORA 21) - now tenant-aware
-    @app.context_processor
-    def inject_invoice_alerts():
-        """Inject invoice alert counts into all templates (tenant-scoped)."""
-        try:
-            # Only load alerts if user is authenticated AND tenant is selected
-            if g.user and g.tenant_id:
-                from app.database import get_session
-                from app.services.invoice_alerts_service import get_invoice_alert_counts
-                from datetime import date
-                
-                db_session = get_session()
-                # Pass tenant_id to get alerts for current tenant only
-                alerts = get_invoice_alert_counts(db_session, date.today(), tenant_id=g.tenant_id)
-                return {'invoice_alerts': alerts}
-        except Exception as e:
-            # If there's any error, log and return empty alerts
-            app.logger.warning(f"Error loading invoice alerts: {e}")
-        
-        return {'invoice_alerts': {'due_tomorrow_count': 0, 'overdue_count': 0, 'total_critical': 0}}
+    # Context processor for layout chrome (MEJORA 21 invoice alerts + tenant info)
+    # Per-tenant cached bundle, resolved lazily only by templates that use it
+    from app.services.chrome_service import chrome_context
     
-    # Context processor for current tenant info
     @app.context_processor
-    def inject_tenant_info():
-        """Inject current tenant information into templates."""
-        if g.get('tenant_id') and g.get('user'):
-            try:
-                from app.database import get_session
-                from app.models import Tenant
-                from app.services.storage_service import get_storage_service
-                
-                db_session = get_session()
-                tenant = db_session.query(Tenant).filter_by(id=g.tenant_id).first()
-                if tenant:
-                    # Generate public URL for logo if exists
-                    logo_public_url = None
-                    if tenant.logo_url:
-                        storage = get_storage_service()
-                        logo_public_url = storage.get_public_url(tenant.logo_url)
-                    
-                    return {
-                        'current_tenant': tenant,
-                        'logo_public_url': logo_public_url
-                    }
-            except Exception:
-                pass
-        
-        return {'current_tenant': None, 'logo_public_url': None}
-
-    
-    
-
-    
-
+    def inject_layout_chrome():
+        """Inject invoice alerts, current tenant and logo URL (tenant-scoped, lazy)."""
+        return chrome_context()
 
     
     # Register blueprints
@@ -18,6 +18,7 @@ from app.database import get_session
 from app.models import AdminUser, Tenant, Subscription, Payment, AdminAuditLog, AdminAuditAction
 from app.decorators.admin_security import admin_required
 from app.services import admin_dashboard_service, admin_payment_service
+from app.services.principal_service import invalidate_tenant_principals
 from datetime import datetime
 from decimal import Decimal
 
@@ -142,6 +143,7 @@ def suspend_tenant(tenant_id: int) -> Union[str, Response, Tuple[str, int]]:
     
     tenant.is_suspended = True
     session_db.commit()
+    invalidate_tenant_principals(tenant.id)
     flash(f'Negocio "{tenant.name}" suspendido exitosamente.', 'success')
     
     if request.headers.get('HX-Request') == 'true':
@@ -161,6 +163,7 @@ def reactivate_tenant(tenant_id: int) -> Union[str, Response, Tuple[str, int]]:
 
     tenant.is_suspended = False
     session_db.commit()
+    invalidate_tenant_principals(tenant.id)
     flash(f'Negocio "{tenant.name}" reactivado exitosamente.', 'success')
     
     if request.headers.get('HX-Request') == 'true':
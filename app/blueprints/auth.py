@@ -12,6 +12,7 @@ from app.models import AppUser, Tenant, UserTenant
 import re
 import logging
 from app.exceptions import BusinessLogicError, UnauthorizedError
+from app.services.principal_service import invalidate_principal
 
 logger = logging.getLogger(__name__)
 
@@ -140,6 +141,7 @@ def register() -> Union[str, Response]:
             )
             db_session.add(user_tenant)
             db_session.commit()
+            invalidate_principal(tenant.id, user.id)
             
             # 5. Auto-login
             session.clear()
@@ -312,6 +314,7 @@ def create_business() -> Union[str, Response]:
             )
             db_session.add(user_tenant)
             db_session.commit()
+            invalidate_principal(tenant.id, g.user.id)
             
             # 3. Set tenant in session
             session['tenant_id'] = tenant.id
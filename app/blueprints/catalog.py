@@ -1,7 +1,6 @@
 """Catalog blueprint for products management - Multi-Tenant."""
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, g, abort, Response
-from sqlalchemy import or_, func, select
-from sqlalchemy.orm import joinedload
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from werkzeug.utils import secure_filename
 import time
@@ -9,10 +8,11 @@ from io import BytesIO
 from PIL import Image
 import requests
 from app.database import get_session
-from app.models import Product, ProductStock, UOM, Category, ProductFeature, StockMove, StockMoveLine, StockMoveType, StockReferenceType
+from app.models import Product, ProductStock, ProductFeature, StockMove, StockMoveLine, StockMoveType, StockReferenceType
 from app.middleware import require_login, require_tenant
 from app.services.storage_service import get_storage_service
 from app.services.cache_service import get_cache
+from app.services.catalog_read_service import get_read_models, get_categories, get_product_page
 from app.exceptions import BusinessLogicError, NotFoundError
 from typing import List, Optional, Union, Tuple, Dict
 import logging
@@ -151,20 +151,21 @@ def _validate_product_form(db_session, tenant_id: int, form: dict, files: dict)
     if not name:
         errors.append('El nombre es requerido')
     
+    # Tenant UOMs and categories from the cached read models (one round-trip)
+    reference = get_read_models(db_session, tenant_id, 'uoms', 'categories')
+
     if not uom_id:
         errors.append('La unidad de medida es requerida')
     else:
         try:
-            uom = db_session.query(UOM).filter(UOM.id == int(uom_id), UOM.tenant_id == tenant_id).first()
-            if not uom:
+            if int(uom_id) not in {u['id'] for u in reference['uoms']}:
                 errors.append('La unidad de medida seleccionada no existe o no pertenece a su negocio')
         except ValueError:
             errors.append('ID de unidad de medida inválido')
 
     if category_id:
         try:
-            category = db_session.query(Category).filter(Category.id == int(category_id), Category.tenant_id == tenant_id).first()
-            if not category:
+            if int(category_id) not in {c['id'] for c in reference['categories']}:
                 errors.append('La categoría seleccionada no existe o no pertenece a su negocio')
         except ValueError:
             errors.append('ID de categoría inválido')
@@ -213,7 +214,13 @@ def _persist_product_features(db_session, product_id: int, form: dict, tenant_id
 @require_login
 @require_tenant
 def list_products() -> Union[str, Response]:
-    """List all products with stock information (tenant-scoped)."""
+    """
+    List products with stock information (tenant-scoped).
+
+    Keyset-paginated on (name, id): the first request renders the first page
+    and a capped total count; HTMX requests carrying a cursor return only
+    the next rows (infinite scroll).
+    """
     session = get_session()
     
     try:
@@ -221,72 +228,50 @@ def list_products() -> Union[str, Response]:
         search_query = request.args.get('q', '').strip()
         category_id = request.args.get('category_id', '').strip()
         stock_filter = request.args.get('stock_filter', '').strip()
+        cursor = request.args.get('cursor', '').strip() or None
         
-        # Get all categories for the filter dropdown (tenant-scoped)
-        categories = session.query(Category).filter(
-            Category.tenant_id == g.tenant_id
-        ).order_by(Category.name).all()
-        
-        # Build query with left join to product_stock (tenant-scoped)
-        query = session.query(Product).options(joinedload(Product.category), joinedload(Product.stock)).outerjoin(ProductStock).filter(
-            Product.tenant_id == g.tenant_id
-        )
+        categories = get_categories(session, g.tenant_id)
         
-        # Apply category filter if provided
-        category_filter_applied = False
+        # Validate category filter
+        category_id_int = None
         if category_id:
             try:
                 category_id_int = int(category_id)
                 # Verify category exists in current tenant
-                category_exists = session.query(Category).filter(
-                    Category.id == category_id_int,
-                    Category.tenant_id == g.tenant_id
-                ).first()
-                if category_exists:
-                    query = query.filter(Product.category_id == category_id_int)
-                    category_filter_applied = True
-                else:
+                if not any(c['id'] == category_id_int for c in categories):
                     flash('La categoría seleccionada no existe. Mostrando todos los productos.', 'warning')
-                    category_id = ''
+                    category_id, category_id_int = '', None
             except ValueError:
                 flash('ID de categoría inválido. Mostrando todos los productos.', 'warning')
                 category_id = ''
         
-        # Apply search filter if provided
-        if search_query:
-            search_filter = or_(
-                func.lower(Product.name).like(f'%{search_query.lower()}%'),
-                func.lower(Product.sku).like(f'%{search_query.lower()}%'),
-                func.lower(Product.barcode).like(f'%{search_query.lower()}%')
-            )
-            query = query.filter(search_filter)
-        
-        # Apply stock filter if provided
-        if stock_filter:
-            if stock_filter == 'out':
-                query = query.filter(
-                    func.coalesce(ProductStock.on_hand_qty, 0) <= 0
-                )
-            elif stock_filter == 'low':
-                query = query.filter(
-                    func.coalesce(ProductStock.on_hand_qty, 0) > 0,
-                    func.coalesce(Product.min_stock_qty, 0) > 0,
-                    func.coalesce(ProductStock.on_hand_qty, 0) <= func.coalesce(Product.min_stock_qty, 0)
-                )
-            elif stock_filter not in ['', 'out', 'low']:
-                flash('Filtro de stock inválido. Mostrando todos los productos.', 'info')
-                stock_filter = ''
-        
-        # Order by name
-        products = query.order_by(Product.name).all()
+        # Validate stock filter
+        if stock_filter not in ['', 'out', 'low']:
+            flash('Filtro de stock inválido. Mostrando todos los productos.', 'info')
+            stock_filter = ''
+        
+        page = get_product_page(
+            session, g.tenant_id,
+            search_query=search_query,
+            category_id=category_id_int,
+            stock_filter=stock_filter,
+            cursor=cursor,
+            limit=current_app.config.get('CATALOG_PAGE_SIZE', 50),
+            with_count=cursor is None
+        )
         
-        # Check if request is from HTMX (live search)
+        # Check if request is from HTMX (live search / infinite scroll)
         is_htmx = request.headers.get('HX-Request') == 'true'
         
-        template = 'products/_list_table.html' if is_htmx else 'products/list.html'
+        if is_htmx and cursor:
+            template = 'products/_list_rows.html'
+        else:
+            template = 'products/_list_table.html' if is_htmx else 'products/list.html'
         
         return render_template(template, 
-                             products=products, 
+                             products=page['items'], 
+                             next_cursor=page['next_cursor'],
+                             total=page.get('total'),
                              search_query=search_query,
                              categories=categories,
                              selected_category_id=category_id,
@@ -297,9 +282,7 @@ def list_products() -> Union[str, Response]:
         flash(f'Error al cargar productos: {str(e)}', 'danger')
         
         try:
-            categories = session.query(Category).filter(
-                Category.tenant_id == g.tenant_id
-            ).order_by(Category.name).all()
+            categories = get_categories(session, g.tenant_id)
         except Exception:
             session.rollback()
             categories = []
@@ -309,6 +292,8 @@ def list_products() -> Union[str, Response]:
         
         return render_template(template, 
                              products=[], 
+                             next_cursor=None,
+                             total=None,
                              search_query='',
                              categories=categories,
                              selected_category_id='',
@@ -348,23 +333,15 @@ def new_product() -> Union[str, Response]:
     session = get_session()
     
     try:
+        # Get UOMs and categories for this tenant (cached read models)
+        reference = get_read_models(session, g.tenant_id, 'uoms', 'categories')
+        uoms, categories = reference['uoms'], reference['categories']
+        
         # Check if UOM table has data for this tenant
-        uom_count = session.query(UOM).filter(
-            UOM.tenant_id == g.tenant_id
-        ).count()
-        if uom_count == 0:
+        if not uoms:
             flash('No hay unidades de medida registradas. Debe crear al menos una unidad de medida antes de poder crear productos.', 'warning')
             return redirect(url_for('settings.list_uoms'))
         
-        # Get UOMs and categories for this tenant
-        uoms = session.query(UOM).filter(
-            UOM.tenant_id == g.tenant_id
-        ).order_by(UOM.name).all()
-        
-        categories = session.query(Category).filter(
-            Category.tenant_id == g.tenant_id
-        ).order_by(Category.name).all()
-        
         return render_template('products/form.html', 
                              product=None, 
                              uoms=uoms, 
@@ -473,13 +450,8 @@ def edit_product(product_id):
         if not product:
             abort(404)
         
-        uoms = session.query(UOM).filter(
-            UOM.tenant_id == g.tenant_id
-        ).order_by(UOM.name).all()
-        
-        categories = session.query(Category).filter(
-            Category.tenant_id == g.tenant_id
-        ).order_by(Category.name).all()
+        reference = get_read_models(session, g.tenant_id, 'uoms', 'categories')
+        uoms, categories = reference['uoms'], reference['categories']
         
         return render_template('products/form.html',
                              product=product,
@@ -8,6 +8,10 @@ from app.models import Customer
 from app.models.payment_log import PaymentLog
 from datetime import datetime
 from app.middleware import require_login, require_tenant
+from app.services.customer_directory_service import (
+    invalidate_customer_directory, search_customers as search_directory
+)
+from app.services.idempotency_service import new_idempotency_key, normalize_idempotency_key, run_idempotent
 
 customers_bp = Blueprint('customers', __name__, url_prefix='/customers')
 
@@ -62,45 +66,17 @@ def check_name() -> str:
 @require_login
 @require_tenant
 def search_customers() -> Dict[str, Any]:
-    """Search customers for autocomplete (JSON)."""
+    """
+    Search customers for autocomplete (JSON).
+
+    Served from the cached customer directory; an empty query returns the
+    first customers by name ("show all on focus").
+    """
     session = get_session()
     query_str = request.args.get('q', '').strip()
     
-    if not query_str:
-        # Return all customers (limited) for "show all on focus" behavior
-        try:
-            all_customers = session.query(Customer).filter(
-                Customer.tenant_id == g.tenant_id
-            ).order_by(Customer.name).limit(50).all()
-            return {'results': [
-                {'id': c.id, 'name': c.name, 'tax_id': c.tax_id, 'phone': c.phone}
-                for c in all_customers
-            ]}
-        except Exception as e:
-            current_app.logger.error(f"Error listing customers: {e}")
-            return {'results': []}
-        
     try:
-        query = session.query(Customer).filter(
-            Customer.tenant_id == g.tenant_id,
-            or_(
-                func.lower(Customer.name).like(f'%{query_str.lower()}%'),
-                func.lower(Customer.tax_id).like(f'%{query_str.lower()}%'),
-                func.lower(Customer.phone).like(f'%{query_str.lower()}%')
-            )
-        ).order_by(Customer.name).limit(50)
-        
-        results = [
-            {
-                'id': c.id,
-                'name': c.name,
-                'tax_id': c.tax_id,
-                'phone': c.phone
-            }
-            for c in query.all()
-        ]
-        
-        return {'results': results}
+        return {'results': search_directory(session, g.tenant_id, query_str, limit=50)}
     except Exception as e:
         current_app.logger.error(f"Error searching customers: {e}")
         return {'results': [], 'error': 'Error en la búsqueda'}
@@ -122,15 +98,11 @@ def quick_create() -> Tuple[Union[str, Response], int]:
         customer = Customer(tenant_id=g.tenant_id, **data)
         session.add(customer)
         session.commit()
+        invalidate_customer_directory(g.tenant_id)
         
-        from app.services.customer_service import get_or_create_default_customer_id
-        customers = session.query(Customer).filter(Customer.tenant_id == g.tenant_id).order_by(Customer.name).all()
-        default_customer_id = get_or_create_default_customer_id(session, g.tenant_id)
-        
+        # Only the new customer is rendered (selected); the selector searches lazily
         return render_template(
             'sales/_customer_selector.html',
-            customers=customers,
-            default_customer_id=default_customer_id,
             selected_customer_id=customer.id,
             selected_customer_name=customer.name,
             success_message=f'Cliente "{customer.name}" creado exitosamente'
@@ -211,6 +183,7 @@ def create_customer() -> Union[str, Response]:
         customer = Customer(tenant_id=g.tenant_id, **data)
         session.add(customer)
         session.commit()
+        invalidate_customer_directory(g.tenant_id)
         flash(f'Cliente "{customer.name}" creado exitosamente', 'success')
         return redirect(url_for('customers.list_customers'))
     except (BusinessLogicError, NotFoundError) as e:
@@ -253,6 +226,7 @@ def update_customer(customer_id: int) -> Union[str, Response]:
         for key, value in data.items():
             setattr(customer, key, value)
         session.commit()
+        invalidate_customer_directory(g.tenant_id)
         flash(f'Cliente "{customer.name}" actualizado exitosamente', 'success')
         return redirect(url_for('customers.list_customers'))
     except (BusinessLogicError, NotFoundError) as e:
@@ -314,6 +288,7 @@ def delete_customer(customer_id: int) -> Response:
             # 2. Intentar eliminar físicamente
             session.delete(customer)
             session.commit()
+            invalidate_customer_directory(g.tenant_id)
             flash(f'Cliente "{customer_name}" eliminado exitosamente.', 'success')
         except IntegrityError:
             # 3. Falla porque tiene ventas/pagos históricos (Llave Foránea)
@@ -363,7 +338,8 @@ def account(customer_id: int) -> str:
         'customers/account.html',
         customer=customer,
         pending_sales=pending_sales,
-        total_debt=total_debt
+        total_debt=total_debt,
+        idempotency_key=new_idempotency_key()
     )
 
 
@@ -389,58 +365,78 @@ def pay_debt(sale_id: int) -> Response:
         raise BusinessLogicError('Esta venta no tiene cliente asociado')
     
     customer_id = sale.customer_id
-
-    try:
-        amount_str = request.form.get('amount', '0').strip().replace(',', '.')
-        amount = Decimal(amount_str)
-    except (InvalidOperation, ValueError):
-        raise BusinessLogicError('Monto inválido')
-    
-    if amount <= 0:
-        raise BusinessLogicError('El monto debe ser mayor a 0')
-    
-    current_due = Decimal(str(sale.total)) - Decimal(str(sale.amount_paid or 0))
-    
-    if amount > current_due:
-        amount = current_due  # Cap at remaining balance
-    
-    try:
-        sale.amount_paid = Decimal(str(sale.amount_paid or 0)) + amount
+    idempotency_key = normalize_idempotency_key(request.form.get('idempotency_key'))
+
+    def apply_payment() -> int:
+        # Concurrent resubmits queue on the sale row; the later one replays the stored payment
+        session.refresh(sale, with_for_update=True)
+        if idempotency_key:
+            existing = session.query(PaymentLog.id).filter_by(
+                sale_id=sale.id, idempotency_key=idempotency_key
+            ).scalar()
+            if existing:
+                session.commit()
+                return existing
         
-        if sale.amount_paid >= Decimal(str(sale.total)):
-            sale.amount_paid = sale.total  # Exact match, no overpayment
-            sale.payment_status = PaymentStatus.PAID
-        else:
-            sale.payment_status = PaymentStatus.PARTIAL
+        try:
+            amount_str = request.form.get('amount', '0').strip().replace(',', '.')
+            amount = Decimal(amount_str)
+        except (InvalidOperation, ValueError):
+            raise BusinessLogicError('Monto inválido')
         
-        # Registrar movimiento de caja y asiento contable
-        selected_method = request.form.get('payment_method', 'CASH').upper()
-        if selected_method not in ('CASH', 'TRANSFER', 'CARD'):
-            selected_method = 'CASH'
-        new_log = PaymentLog(sale_id=sale.id, amount=amount, date=datetime.now(), payment_method=selected_method)
-        session.add(new_log)
+        if amount <= 0:
+            raise BusinessLogicError('El monto debe ser mayor a 0')
         
-        # Registrar asiento en Libro Mayor
-        from app.models.finance_ledger import FinanceLedger, LedgerType, LedgerReferenceType
-        ledger_entry = FinanceLedger(
-            tenant_id=g.tenant_id,
-            datetime=datetime.now(),
-            type=LedgerType.INCOME,
-            amount=amount,
-            category='Cobro factura',
-            reference_type=LedgerReferenceType.DEBT_COLLECTION,
-            reference_id=sale.id,
-            notes=f'Cobranza de factura #{sale.id}',
-            payment_method=selected_method
-        )
-        session.add(ledger_entry)
+        current_due = Decimal(str(sale.total)) - Decimal(str(sale.amount_paid or 0))
         
-        session.commit()
-        flash(f'Pago de ${amount:,.2f} aplicado exitosamente a la venta #{sale.id}', 'success')
-    except Exception as e:
-        session.rollback()
-        current_app.logger.error(f"Error applying payment to sale {sale_id}: {e}")
-        raise BusinessLogicError(f'Error al aplicar pago: {str(e)}')
+        if amount > current_due:
+            amount = current_due  # Cap at remaining balance
+        
+        try:
+            sale.amount_paid = Decimal(str(sale.amount_paid or 0)) + amount
+            
+            if sale.amount_paid >= Decimal(str(sale.total)):
+                sale.amount_paid = sale.total  # Exact match, no overpayment
+                sale.payment_status = PaymentStatus.PAID
+            else:
+                sale.payment_status = PaymentStatus.PARTIAL
+            
+            # Registrar movimiento de caja y asiento contable
+            selected_method = request.form.get('payment_method', 'CASH').upper()
+            if selected_method not in ('CASH', 'TRANSFER', 'CARD'):
+                selected_method = 'CASH'
+            new_log = PaymentLog(sale_id=sale.id, amount=amount, date=datetime.now(), payment_method=selected_method,
+                                 idempotency_key=idempotency_key)
+            session.add(new_log)
+            
+            # Registrar asiento en Libro Mayor
+            from app.models.finance_ledger import FinanceLedger, LedgerType, LedgerReferenceType
+            ledger_entry = FinanceLedger(
+                tenant_id=g.tenant_id,
+                datetime=datetime.now(),
+                type=LedgerType.INCOME,
+                amount=amount,
+                category='Cobro factura',
+                reference_type=LedgerReferenceType.DEBT_COLLECTION,
+                reference_id=sale.id,
+                notes=f'Cobranza de factura #{sale.id}',
+                payment_method=selected_method
+            )
+            session.add(ledger_entry)
+            
+            session.flush()
+            payment_log_id = new_log.id
+            session.commit()
+            flash(f'Pago de ${amount:,.2f} aplicado exitosamente a la venta #{sale.id}', 'success')
+            return payment_log_id
+        except Exception as e:
+            session.rollback()
+            current_app.logger.error(f"Error applying payment to sale {sale_id}: {e}")
+            raise BusinessLogicError(f'Error al aplicar pago: {str(e)}')
+    
+    # A double submit of the same form must not apply the payment twice
+    payment_log_id = run_idempotent(g.tenant_id, 'debt_payment', idempotency_key, apply_payment)
+    current_app.logger.info(f"[PAYMENT] Debt payment #{payment_log_id} for sale {sale_id}")
     
     return redirect(url_for('customers.account', customer_id=customer_id))
 
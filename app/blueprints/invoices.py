@@ -2,15 +2,17 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app, g, abort, make_response, Response, jsonify
 from typing import List, Dict, Optional, Union, Any, Tuple
 from decimal import Decimal, InvalidOperation
-from datetime import datetime, date, timedelta
-from sqlalchemy import and_, or_, func
-from sqlalchemy.orm import joinedload
+from datetime import datetime, date
+from sqlalchemy import or_, func
 from sqlalchemy.exc import IntegrityError
 from app.database import get_session
 from app.models import PurchaseInvoice, Supplier, Product, InvoiceStatus, PurchaseInvoicePayment, ProductStock
 from app.services.invoice_service import create_invoice_with_lines
 from app.services.payment_service import register_invoice_payment
+from app.services.idempotency_service import new_idempotency_key, normalize_idempotency_key, run_idempotent
 from app.services.invoice_alerts_service import is_invoice_overdue
+from app.services.invoice_search_service import get_invoice_page
+from app.services.chrome_service import invalidate_layout_chrome
 from app.middleware import require_login, require_tenant
 from app.utils.number_format import parse_ar_decimal, parse_ar_number
 from app.exceptions import BusinessLogicError, NotFoundError
@@ -78,7 +80,13 @@ def clear_invoice_draft() -> None:
 @require_login
 @require_tenant
 def list_invoices() -> Union[str, Response]:
-    """List all purchase invoices (tenant-scoped)."""
+    """
+    List purchase invoices (tenant-scoped).
+
+    The search term is classified (date, amount, status keyword or text) into
+    index-friendly predicates; the list is keyset-paginated by due date and
+    HTMX requests carrying a cursor return only the next rows.
+    """
     db_session = get_session()
     
     try:
@@ -88,83 +96,45 @@ def list_invoices() -> Union[str, Response]:
         search_query = request.args.get('q', '').strip()
         due_soon = request.args.get('due_soon', type=int)
         overdue = request.args.get('overdue', type=int)
+        cursor = request.args.get('cursor', '').strip() or None
         
-        # Base query - filter by tenant
-        query = db_session.query(PurchaseInvoice).options(joinedload(PurchaseInvoice.supplier)).filter(
-            PurchaseInvoice.tenant_id == g.tenant_id
-        )
+        # Check if HTMX request (live search / infinite scroll)
+        is_htmx = request.headers.get('HX-Request') == 'true'
         
-        # Validate supplier belongs to tenant if provided
-        if supplier_id:
-            supplier_exists = db_session.query(Supplier).filter(
-                Supplier.id == supplier_id,
+        # Supplier filter options are only rendered by the full page; HTMX
+        # fragments (live search, cursor rows) reuse its validated supplier_id
+        # and get_invoice_page is tenant-scoped either way
+        suppliers = []
+        if not is_htmx:
+            suppliers = db_session.query(Supplier).filter(
                 Supplier.tenant_id == g.tenant_id
-            ).first()
-            if supplier_exists:
-                query = query.filter(PurchaseInvoice.supplier_id == supplier_id)
-            else:
+            ).order_by(Supplier.name).all()
+            
+            # Validate supplier belongs to tenant if provided
+            if supplier_id and not any(s.id == supplier_id for s in suppliers):
                 supplier_id = None  # Reset if invalid
         
-        if status and status in ['PENDING', 'PAID', 'PARTIALLY_PAID']:
-            query = query.filter(PurchaseInvoice.status == InvoiceStatus[status])
-        
-        # Filter by due soon (tomorrow)
-        if due_soon:
-            tomorrow = date.today() + timedelta(days=1)
-            query = query.filter(
-                and_(
-                    PurchaseInvoice.status == InvoiceStatus.PENDING,
-                    PurchaseInvoice.due_date == tomorrow
-                )
-            )
-        
-        # Filter by overdue
-        if overdue:
-            today = date.today()
-            query = query.filter(
-                and_(
-                    PurchaseInvoice.status == InvoiceStatus.PENDING,
-                    PurchaseInvoice.due_date < today,
-                    PurchaseInvoice.due_date.isnot(None)
-                )
-            )
-        
-        # Search by invoice number, supplier name, amount, date, etc.
-        if search_query:
-            from sqlalchemy import cast, String
-            query = query.join(Supplier).filter(
-                or_(
-                    PurchaseInvoice.invoice_number.ilike(f'%{search_query}%'),
-                    Supplier.name.ilike(f'%{search_query}%'),
-                    cast(PurchaseInvoice.total_amount, String).like(f'%{search_query}%'),
-                    cast(PurchaseInvoice.invoice_date, String).like(f'%{search_query}%'),
-                    cast(PurchaseInvoice.due_date, String).like(f'%{search_query}%'),
-                    cast(PurchaseInvoice.status, String).ilike(f'%{search_query}%')
-                )
-            )
-        
-        # Order by due_date (ascending, NULLS LAST), then by created_at (descending)
-        invoices = query.order_by(
-            PurchaseInvoice.due_date.asc().nullslast(),
-            PurchaseInvoice.created_at.desc()
-        ).all()
-        
-        # Calculate overdue status
-        today = date.today()
-        for invoice in invoices:
-            invoice.is_overdue = is_invoice_overdue(invoice, today)
-        
-        # Get suppliers for filter (tenant-scoped)
-        suppliers = db_session.query(Supplier).filter(
-            Supplier.tenant_id == g.tenant_id
-        ).order_by(Supplier.name).all()
+        page = get_invoice_page(
+            db_session, g.tenant_id,
+            search_query=search_query,
+            supplier_id=supplier_id,
+            status=status,
+            due_soon=bool(due_soon),
+            overdue=bool(overdue),
+            cursor=cursor,
+            limit=current_app.config.get('INVOICES_PAGE_SIZE', 50),
+            with_count=cursor is None
+        )
         
-        # Check if HTMX request
-        is_htmx = request.headers.get('HX-Request') == 'true'
-        template = 'invoices/_list_table.html' if is_htmx else 'invoices/list.html'
+        if is_htmx and cursor:
+            template = 'invoices/_list_rows.html'
+        else:
+            template = 'invoices/_list_table.html' if is_htmx else 'invoices/list.html'
         
         return render_template(template,
-                             invoices=invoices,
+                             invoices=page['items'],
+                             next_cursor=page['next_cursor'],
+                             total=page.get('total'),
                              suppliers=suppliers,
                              selected_supplier=supplier_id,
                              selected_status=status,
@@ -181,6 +151,8 @@ def list_invoices() -> Union[str, Response]:
         
         return render_template(template,
                              invoices=[],
+                             next_cursor=None,
+                             total=None,
                              suppliers=[],
                              selected_supplier=None,
                              selected_status='',
@@ -266,6 +238,7 @@ def edit_invoice(invoice_id: int) -> Union[str, Response]:
                 invoice.due_date = _parse_date(due_date_str)
                     
                 db_session.commit()
+                invalidate_layout_chrome(g.tenant_id)
                 flash('Boleta actualizada exitosamente.', 'success')
                 return redirect(url_for('invoices.view_invoice', invoice_id=invoice.id))
                 
@@ -324,6 +297,7 @@ def delete_invoice(invoice_id: int) -> Response:
              
              db_session.delete(invoice)
              db_session.commit()
+             invalidate_layout_chrome(g.tenant_id)
              flash('Boleta eliminada exitosamente.', 'success')
              
         except IntegrityError as e:
@@ -662,7 +636,8 @@ def pay_invoice_preview(invoice_id: int) -> str:
         return render_template('invoices/_pay_confirm_modal.html',
                              invoice=invoice,
                              pending_amount=pending_amount,
-                             today=today)
+                             today=today,
+                             idempotency_key=new_idempotency_key())
         
     except Exception as e:
         current_app.logger.error(f"Error generating payment preview for invoice {invoice_id}: {e}")
@@ -715,22 +690,30 @@ def register_payment_route(invoice_id: int) -> Union[str, Response]:
         except ValueError:
             raise ValueError('Formato de fecha inválido. Use AAAA-MM-DD')
         
-        # Call payment service
-        register_invoice_payment(
-            tenant_id=g.tenant_id,
-            invoice_id=invoice_id,
-            amount=amount,
-            payment_method=payment_method,
-            paid_at=paid_at,
-            notes=notes,
-            user_id=g.user.id,
-            session=db_session
-        )
-        
-        # COMMIT THE TRANSACTION
-        current_app.logger.info(f"[PAYMENT] Committing transaction for invoice {invoice_id}")
-        db_session.commit()
-        current_app.logger.info(f"[PAYMENT] Payment registered successfully: ${amount}")
+        idempotency_key = normalize_idempotency_key(request.form.get('idempotency_key'))
+        
+        def register() -> int:
+            payment = register_invoice_payment(
+                tenant_id=g.tenant_id,
+                invoice_id=invoice_id,
+                amount=amount,
+                payment_method=payment_method,
+                paid_at=paid_at,
+                notes=notes,
+                user_id=g.user.id,
+                session=db_session,
+                idempotency_key=idempotency_key
+            )
+            payment_id = payment.id
+            
+            # COMMIT THE TRANSACTION
+            current_app.logger.info(f"[PAYMENT] Committing transaction for invoice {invoice_id}")
+            db_session.commit()
+            return payment_id
+        
+        # Double submits of the same modal replay the first payment
+        payment_id = run_idempotent(g.tenant_id, 'invoice_payment', idempotency_key, register)
+        current_app.logger.info(f"[PAYMENT] Payment #{payment_id} registered successfully: ${amount}")
         
         # Check if HTMX request
         if request.headers.get('HX-Request'):
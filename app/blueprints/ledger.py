@@ -1,84 +1,143 @@
 """Ledger blueprint for finance ledger management - Multi-Tenant."""
-from flask import Blueprint, render_template, request, flash, redirect, url_for, g, abort
+from flask import (Blueprint, Response, render_template, request, flash, redirect, url_for, g, abort,
+                   current_app, stream_template, stream_with_context)
 from datetime import datetime, date
 from decimal import Decimal
 import decimal
 from app.database import get_session
 from app.models import FinanceLedger, LedgerType, LedgerReferenceType, PaymentMethod
 from app.middleware import require_login, require_tenant
+from app.services.ledger_history_service import (
+    PAYMENT_METHOD_FILTERS, build_ledger_query, get_ledger_page, get_period_totals,
+    iter_ledger_csv, iter_ledger_entries
+)
 
 ledger_bp = Blueprint('ledger', __name__, url_prefix='/ledger')
 
+METHOD_LABELS = {
+    'CASH': 'Efectivo',
+    'TRANSFER': 'Transferencia',
+    'CARD': 'Tarjeta',
+    'CUENTA_CORRIENTE': 'Cuenta Corriente'
+}
+
+
+def _ledger_filters() -> dict:
+    """Parse and validate the list/export filters from the query string."""
+    entry_type = request.args.get('type', '').upper()
+    start_str = request.args.get('start', '').strip()
+    end_str = request.args.get('end', '').strip()
+    method = request.args.get('method', 'all').lower().strip()
+    
+    # Validate method
+    if method != 'all' and method not in PAYMENT_METHOD_FILTERS:
+        flash('Método de pago inválido. Mostrando todos.', 'info')
+        method = 'all'
+    
+    def _parse_date(value: str):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+        except ValueError:
+            return None
+    
+    start, end = _parse_date(start_str), _parse_date(end_str)
+    return {
+        'type': entry_type if entry_type in LedgerType.__members__ else '',
+        'method': method,
+        'start': start,
+        'end': end,
+    }
+
+
+def _filter_args(filters: dict) -> dict:
+    """Filters as query-string args for url_for (pagination / export links)."""
+    args = {
+        'type': filters['type'],
+        'method': filters['method'] if filters['method'] != 'all' else '',
+        'start': filters['start'].isoformat() if filters['start'] else '',
+        'end': filters['end'].isoformat() if filters['end'] else '',
+    }
+    return {k: v for k, v in args.items() if v}
+
+
+def _filtered_query(db_session, filters: dict):
+    return build_ledger_query(db_session, g.tenant_id, entry_type=filters['type'], method=filters['method'],
+                              start=filters['start'], end=filters['end'])
+
 
 @ledger_bp.route('/')
 @require_login
 @require_tenant
 def list_ledger():
-    """List all finance ledger entries (tenant-scoped)."""
+    """
+    List finance ledger entries, newest first (tenant-scoped).
+    
+    Cursor-paginated on (datetime, id); totals for the whole filtered period
+    are aggregated in SQL. Use /ledger/export for the full range.
+    """
     db_session = get_session()
     
     try:
-        # Get query params
-        entry_type = request.args.get('type', '').upper()
-        start_str = request.args.get('start', '').strip()
-        end_str = request.args.get('end', '').strip()
-        method = request.args.get('method', 'all').lower().strip()
-        
-        # Validate method
-        if method not in ['all', 'cash', 'transfer', 'card', 'cuenta_corriente']:
-            flash('Método de pago inválido. Mostrando todos.', 'info')
-            method = 'all'
-        
-        # Build query - filter by tenant FIRST
-        query = db_session.query(FinanceLedger).filter(
-            FinanceLedger.tenant_id == g.tenant_id
-        )
-        
-        # Filter by type
-        if entry_type and entry_type in ['INCOME', 'EXPENSE', 'INVOICE']:
-            query = query.filter(FinanceLedger.type == LedgerType[entry_type])
+        filters = _ledger_filters()
+        filter_args = _filter_args(filters)
+        cursor = request.args.get('cursor', '').strip() or None
         
-        # Filter by payment method
-        if method == 'cash':
-            query = query.filter(FinanceLedger.payment_method == 'CASH')
-        elif method == 'transfer':
-            query = query.filter(FinanceLedger.payment_method == 'TRANSFER')
-        elif method == 'card':
-            query = query.filter(FinanceLedger.payment_method == 'CARD')
-        elif method == 'cuenta_corriente':
-            query = query.filter(FinanceLedger.payment_method == 'CUENTA_CORRIENTE')
-        
-        # Filter by date range
-        if start_str:
-            try:
-                start_dt = datetime.strptime(start_str, '%Y-%m-%d')
-                query = query.filter(FinanceLedger.datetime >= start_dt)
-            except ValueError:
-                pass
-        
-        if end_str:
-            try:
-                end_dt = datetime.strptime(end_str, '%Y-%m-%d')
-                end_dt = end_dt.replace(hour=23, minute=59, second=59)
-                query = query.filter(FinanceLedger.datetime <= end_dt)
-            except ValueError:
-                pass
-        
-        # Order by datetime desc
-        entries = query.order_by(FinanceLedger.datetime.desc()).all()
+        query = _filtered_query(db_session, filters)
+        page = get_ledger_page(query, cursor=cursor, limit=current_app.config.get('LEDGER_PAGE_SIZE', 100))
         
         return render_template(
             'ledger/list.html',
-            entries=entries,
-            entry_type=entry_type,
-            selected_method=method,
-            start=start_str,
-            end=end_str
+            entries=page['items'],
+            next_cursor=page['next_cursor'],
+            is_first_page=cursor is None,
+            totals=get_period_totals(query),
+            filter_args=filter_args,
+            entry_type=filters['type'],
+            selected_method=filters['method'],
+            start=filter_args.get('start', ''),
+            end=filter_args.get('end', '')
         )
         
     except Exception as e:
         flash(f'Error al cargar libro mayor: {str(e)}', 'danger')
-        return render_template('ledger/list.html', entries=[], entry_type='', start='', end='')
+        return render_template('ledger/list.html', entries=[], totals=None, filter_args={},
+                               is_first_page=True, entry_type='', start='', end='')
+
+
+@ledger_bp.route('/export')
+@require_login
+@require_tenant
+def export_ledger():
+    """
+    Stream the filtered ledger as CSV (?format=csv) or a printable HTML table.
+    
+    Rows come from a server-side cursor and are written out as they are
+    fetched, so long date ranges are never held in worker memory.
+    """
+    db_session = get_session()
+    filters = _ledger_filters()
+    query = _filtered_query(db_session, filters)
+    
+    if request.args.get('format', 'html') == 'csv':
+        filename = f"movimientos_{date.today().isoformat()}.csv"
+        return Response(
+            stream_with_context(iter_ledger_csv(query)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+    
+    args = _filter_args(filters)
+    return Response(stream_template(
+        'ledger/export.html',
+        entries=iter_ledger_entries(query),
+        totals=get_period_totals(query),
+        start=args.get('start', ''),
+        end=args.get('end', ''),
+        type_labels={'INCOME': 'Ingreso', 'EXPENSE': 'Egreso', 'INVOICE': 'Factura'},
+        method_labels=METHOD_LABELS,
+        reference_labels={'SALE': 'Venta', 'DEBT_COLLECTION': 'Cobro factura',
+                          'INVOICE_PAYMENT': 'Pago Boleta', 'MANUAL': 'Manual'}
+    ), mimetype='text/html')
 
 
 @ledger_bp.route('/new', methods=['GET'])
@@ -168,13 +227,7 @@ def create_ledger():
         db_session.add(ledger)
         db_session.commit()
         
-        method_labels = {
-            'CASH': 'Efectivo',
-            'TRANSFER': 'Transferencia',
-            'CARD': 'Tarjeta',
-            'CUENTA_CORRIENTE': 'Cuenta Corriente'
-        }
-        payment_label = method_labels.get(payment_method, payment_method)
+        payment_label = METHOD_LABELS.get(payment_method, payment_method)
         flash(f'Movimiento manual de tipo {entry_type} por ${amount} ({payment_label}) registrado exitosamente', 'success')
         return redirect(url_for('ledger.list_ledger'))
         
@@ -75,7 +75,8 @@ def health_cache():
                     'status': 'ok',
                     'cache': 'connected',
                     'redis': 'healthy',
-                    'message': 'Cache is working correctly'
+                    'message': 'Cache is working correctly',
+                    'stats': cache.stats()
                 }), 200
             else:
                 return jsonify({
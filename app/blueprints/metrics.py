@@ -44,6 +44,74 @@ http_requests_in_flight = Gauge(
     registry=registry if not MULTIPROCESS_MODE else None
 )
 
+# Cache Metrics (recorded by CacheService, labelled by module and tier)
+cache_hits_total = Counter(
+    'cache_hits_total',
+    'Cache hits',
+    ['module', 'tier'],
+    registry=registry if not MULTIPROCESS_MODE else None
+)
+
+cache_misses_total = Counter(
+    'cache_misses_total',
+    'Cache misses',
+    ['module', 'tier'],
+    registry=registry if not MULTIPROCESS_MODE else None
+)
+
+cache_errors_total = Counter(
+    'cache_errors_total',
+    'Cache operation errors (Redis or payload decoding)',
+    ['module', 'operation'],
+    registry=registry if not MULTIPROCESS_MODE else None
+)
+
+cache_operation_duration_seconds = Histogram(
+    'cache_operation_duration_seconds',
+    'Redis cache operation latency in seconds',
+    ['module', 'operation'],
+    registry=registry if not MULTIPROCESS_MODE else None,
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+cache_payload_bytes = Histogram(
+    'cache_payload_bytes',
+    'Encoded cache payload size in bytes',
+    ['module', 'operation'],
+    registry=registry if not MULTIPROCESS_MODE else None,
+    buckets=(128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+)
+
+cache_invalidations_total = Counter(
+    'cache_invalidations_total',
+    'Cache invalidations',
+    ['module', 'scope'],
+    registry=registry if not MULTIPROCESS_MODE else None
+)
+
+
+# Transaction Metrics (stock locking and conflict retries in the sale services)
+db_lock_wait_seconds = Histogram(
+    'db_lock_wait_seconds',
+    'Time spent acquiring row locks (SELECT ... FOR UPDATE) in seconds',
+    ['operation'],
+    registry=registry if not MULTIPROCESS_MODE else None,
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+db_transaction_retries_total = Counter(
+    'db_transaction_retries_total',
+    'Transactions retried after a deadlock or serialization failure',
+    ['operation', 'reason'],
+    registry=registry if not MULTIPROCESS_MODE else None
+)
+
+db_transaction_conflicts_failed_total = Counter(
+    'db_transaction_conflicts_failed_total',
+    'Transactions that still conflicted after the last retry',
+    ['operation', 'reason'],
+    registry=registry if not MULTIPROCESS_MODE else None
+)
 
 def setup_metrics_instrumentation(app):
     """
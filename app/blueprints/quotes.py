@@ -2,8 +2,6 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from typing import List, Dict, Optional, Union, Any, Tuple
 from datetime import datetime, date
 from decimal import Decimal, InvalidOperation
-from sqlalchemy import or_, func, cast, String
-from sqlalchemy.orm import joinedload
 from app.exceptions import BusinessLogicError, NotFoundError
 from app.database import get_session
 from app.models import Quote, QuoteLine, Product
@@ -13,6 +11,7 @@ from app.services.quote_service import (
     convert_quote_to_sale,
     update_quote
 )
+from app.services.quote_search_service import QUOTE_STATUSES, get_quote_page
 from app.middleware import require_login, require_tenant
 
 quotes_bp = Blueprint('quotes', __name__, url_prefix='/quotes')
@@ -104,67 +103,58 @@ def _parse_quote_form_lines(form: Dict[str, Any], db_session, tenant_id: int) ->
 @require_login
 @require_tenant
 def list_quotes() -> Union[str, Response]:
-    """List all quotes with filters (tenant-scoped)."""
+    """
+    List quotes with filters (tenant-scoped).
+
+    Searches the indexed quote search document, computes expiry in SQL and
+    keyset-paginates newest first; HTMX requests carrying a cursor return
+    only the next rows.
+    """
     db_session = get_session()
     
     try:
         # Get query params
         status_filter = request.args.get('status', '').upper()
         search = request.args.get('q', '').strip()
-        
-        # Build query - filter by tenant
-        query = db_session.query(Quote).options(joinedload(Quote.sale)).filter(
-            Quote.tenant_id == g.tenant_id
+        cursor = request.args.get('cursor', '').strip() or None
+        
+        if status_filter not in QUOTE_STATUSES and status_filter != 'EXPIRED':
+            status_filter = ''
+        
+        page = get_quote_page(
+            db_session, g.tenant_id,
+            search=search,
+            status=status_filter,
+            cursor=cursor,
+            limit=current_app.config.get('QUOTES_PAGE_SIZE', 50),
+            with_count=cursor is None
         )
         
-        # Filter by status
-        if status_filter and status_filter in ['DRAFT', 'SENT', 'ACCEPTED', 'CANCELED']:
-            query = query.filter(Quote.status == status_filter)
-        
-        # Search by quote_number, customer_name, customer_phone, etc.
-        if search:
-            query = query.filter(
-                or_(
-                    Quote.quote_number.ilike(f'%{search}%'),
-                    Quote.customer_name.ilike(f'%{search}%'),
-                    Quote.customer_phone.ilike(f'%{search}%'),
-                    Quote.notes.ilike(f'%{search}%'),
-                    cast(Quote.id, String).like(f'%{search}%'),
-                    cast(Quote.total_amount, String).like(f'%{search}%'),
-                    cast(Quote.issued_at, String).like(f'%{search}%'),
-                    cast(Quote.valid_until, String).like(f'%{search}%')
-                )
-            )
-        
-        # Order by most recent first
-        quotes = query.order_by(Quote.issued_at.desc()).all()
-        
-        # Calculate "expired" status for display
-        today = date.today()
-        for quote in quotes:
-            if quote.status in ['DRAFT', 'SENT'] and quote.valid_until and today > quote.valid_until:
-                quote.display_expired = True
-            else:
-                quote.display_expired = False
-        
-        # Check if HTMX request
+        # Check if HTMX request (live search / infinite scroll)
         is_htmx = request.headers.get('HX-Request') == 'true'
-        template = 'quotes/_list_table.html' if is_htmx else 'quotes/list.html'
+        
+        if is_htmx and cursor:
+            template = 'quotes/_list_rows.html'
+        else:
+            template = 'quotes/_list_table.html' if is_htmx else 'quotes/list.html'
         
         return render_template(
             template,
-            quotes=quotes,
+            quotes=page['items'],
+            next_cursor=page['next_cursor'],
+            total=page.get('total'),
             status_filter=status_filter,
             search=search
         )
         
     except Exception as e:
+        db_session.rollback()
         flash(f'Error al cargar presupuestos: {str(e)}', 'danger')
         
         is_htmx = request.headers.get('HX-Request') == 'true'
         template = 'quotes/_list_table.html' if is_htmx else 'quotes/list.html'
         
-        return render_template(template, quotes=[], status_filter='', search='')
+        return render_template(template, quotes=[], next_cursor=None, total=None, status_filter='', search='')
 
 
 @quotes_bp.route('/<int:quote_id>')
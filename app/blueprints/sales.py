@@ -1,16 +1,19 @@
 """Sales blueprint for POS and cart management - Multi-Tenant."""
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, send_file, current_app, g, abort, Response
-from sqlalchemy import or_, func, and_, desc
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, send_file, current_app, g, abort, Response, make_response
 from sqlalchemy.orm import joinedload
 from decimal import Decimal, InvalidOperation
 import decimal
 from datetime import datetime
 from app.database import get_session
-from app.models import Product, ProductStock, Sale, SaleLine, SaleStatus, SaleDraft, Category, Customer
+from app.models import Product, ProductStock, Sale, SaleDraft
 from app.services.sales_service import confirm_sale, confirm_sale_from_draft
 from app.services import sale_draft_service
 from app.services.top_products_service import get_top_selling_products
+from app.services.sales_history_service import get_sales_page
+from app.services.catalog_read_service import get_categories, find_product_by_code
+from app.services.product_search_service import search_products
 from app.services.quote_service import generate_quote_pdf
+from app.services.idempotency_service import run_idempotent
 from app.middleware import require_login, require_tenant
 from app.exceptions import BusinessLogicError, NotFoundError, InsufficientStockError
 
@@ -74,61 +77,27 @@ def _search_products_internal(db_session, tenant_id: int, search_query: str = ''
         # Sanitize input (limit length)
         search_query = search_query[:100]
         
-        # Check for exact barcode match first
-        exact_match_query = db_session.query(Product).filter(
-            Product.tenant_id == tenant_id,
-            Product.active == True,
-            Product.barcode.isnot(None),
-            func.lower(Product.barcode) == search_query.lower()
-        )
-        
-        if category_id:
+        # Check for exact barcode match first (cached code index, then primary key)
+        exact_match = None
+        entry = find_product_by_code(db_session, tenant_id, search_query, fields=('barcode',))
+        if entry and entry['active']:
             try:
-                exact_match_query = exact_match_query.filter(Product.category_id == int(category_id))
+                category_ok = not category_id or entry['category_id'] == int(category_id)
             except ValueError:
-                pass
-
-        exact_match = exact_match_query.first()
+                category_ok = True
+            if category_ok:
+                exact_match = db_session.get(Product, entry['id'])
         
         if exact_match:
             exact_barcode_match = exact_match.id
             products = [exact_match]
         else:
-            # Fuzzy search filter
-            search_filter = or_(
-                func.lower(Product.name).like(f'%{search_query.lower()}%'),
-                and_(Product.sku.isnot(None), func.lower(Product.sku).like(f'%{search_query.lower()}%')),
-                and_(Product.barcode.isnot(None), func.lower(Product.barcode).like(f'%{search_query.lower()}%'))
-            )
-            
-            # Popularity Sort Query
-            pop_query = (db_session.query(Product)
-                       .outerjoin(ProductStock)
-                       .outerjoin(SaleLine, SaleLine.product_id == Product.id)
-                       .outerjoin(Sale, and_(
-                           Sale.id == SaleLine.sale_id, 
-                           Sale.status == SaleStatus.CONFIRMED,
-                           Sale.tenant_id == tenant_id
-                       ))
-                       .filter(
-                           Product.tenant_id == tenant_id,
-                           Product.active == True
-                       ))
-            
-            if category_id:
-                try:
-                    pop_query = pop_query.filter(Product.category_id == int(category_id))
-                except ValueError:
-                    pass
-
-            products = (pop_query.filter(search_filter)
-                       .group_by(Product.id)
-                       .order_by(
-                           desc(func.sum(func.coalesce(SaleLine.qty, 0))),
-                           Product.name
-                       )
-                       .limit(20)
-                       .all())
+            # Ranked search (trigram index, LIKE fallback)
+            try:
+                cat_id = int(category_id) if category_id else None
+            except ValueError:
+                cat_id = None
+            products = search_products(db_session, tenant_id, search_query, limit=20, category_id=cat_id)
     else:
         # No text search, list items with optional category
         products = (query
@@ -253,21 +222,13 @@ def new_sale() -> Union[str, Response]:
         # is_fallback removed as we now show catalog below
         is_fallback = False
         
-        # Get categories for filter (tenant-scoped)
-        categories = db_session.query(Category).filter(
-            Category.tenant_id == g.tenant_id
-        ).order_by(Category.name).all()
-        
-        # NEW: Load customers for selector
-        from app.models import Customer
-        from app.services.customer_service import get_or_create_default_customer_id
-        
-        customers = db_session.query(Customer).filter(
-            Customer.tenant_id == g.tenant_id
-        ).order_by(Customer.name).all()
+        # Get categories for filter (tenant-scoped, cached read model)
+        categories = get_categories(db_session, g.tenant_id)
         
-        # Get default customer ID
-        default_customer_id = get_or_create_default_customer_id(db_session, g.tenant_id)
+        # Customer selector is a typeahead (customers.search_customers):
+        # only the cached default customer is needed to render it
+        from app.services.customer_service import get_default_customer
+        default_customer = get_default_customer(db_session, g.tenant_id)
         
         return render_template('sales/new.html',
                              products=products,
@@ -277,8 +238,7 @@ def new_sale() -> Union[str, Response]:
                              top_products=top_products,
                              top_products_error=top_products_error,
                              categories=categories,
-                             customers=customers,
-                             default_customer_id=default_customer_id)
+                             default_customer=default_customer)
         
     except Exception as e:
         flash(f'Error al cargar POS: {str(e)}', 'danger')
@@ -550,11 +510,11 @@ def confirm() -> Union[str, Response]:
         
         # NEW: Handle customer_id with fallback to default
         from app.models import Customer
-        from app.services.customer_service import get_or_create_default_customer_id
+        from app.services.customer_service import get_default_customer
         
         if not customer_id_raw or customer_id_raw == '':
             # No customer selected -> use default
-            customer_id = get_or_create_default_customer_id(db_session, g.tenant_id)
+            customer_id = get_default_customer(db_session, g.tenant_id)['id']
         else:
             try:
                 customer_id = int(customer_id_raw)
@@ -570,7 +530,7 @@ def confirm() -> Union[str, Response]:
                     
             except ValueError:
                 # Invalid ID format -> use default
-                customer_id = get_or_create_default_customer_id(db_session, g.tenant_id)
+                customer_id = get_default_customer(db_session, g.tenant_id)['id']
         
         # Validate payment method
         if payment_method not in ['CASH', 'TRANSFER']:
@@ -664,34 +624,51 @@ def quote_pdf() -> Union[str, Response]:
 @require_login
 @require_tenant
 def list_sales() -> Union[str, Response]:
-    """List all confirmed sales (tenant-scoped)."""
+    """
+    List confirmed sales, newest first (tenant-scoped).
+
+    Cursor-paginated on (datetime, id) with optional date range and
+    "jump to date"; page and range totals are computed in SQL.
+    """
     db_session = get_session()
     
     try:
-        # Capturar término de búsqueda
+        # Capturar término de búsqueda y filtros
         q = request.args.get('q', '').strip()
+        start_str = request.args.get('start', '').strip()
+        end_str = request.args.get('end', '').strip()
+        jump_str = request.args.get('jump', '').strip()
+        cursor = request.args.get('cursor', '').strip() or None
         
-        # Build query (tenant-scoped)
-        query = db_session.query(Sale).options(joinedload(Sale.customer)).filter(
-            Sale.tenant_id == g.tenant_id,
-            Sale.status == SaleStatus.CONFIRMED
+        def _parse_date(value: str):
+            try:
+                return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+            except ValueError:
+                flash(f'Fecha inválida: {value}', 'warning')
+                return None
+        
+        start, end, jump_to = _parse_date(start_str), _parse_date(end_str), _parse_date(jump_str)
+        
+        page = get_sales_page(
+            db_session, g.tenant_id,
+            search_query=q,
+            start=start,
+            end=end,
+            cursor=cursor,
+            jump_to=jump_to,
+            limit=current_app.config.get('SALES_PAGE_SIZE', 50)
         )
         
-        if q:
-            if q.isdigit():
-                # Si el usuario escribió números, buscamos por ID de la venta
-                query = query.filter(Sale.id == int(q))
-            else:
-                # Si escribió texto, buscamos por nombre del cliente
-                # Hacemos un JOIN con Customer para poder filtrar por su nombre
-                query = query.join(Customer).filter(Customer.name.ilike(f'%{q}%'))
-        
-        # Order by most recent first
-        sales = query.order_by(Sale.datetime.desc()).all()
-        
         return render_template('sales/list.html', 
-                             sales=sales,
-                             search_query=q)
+                             sales=page['items'],
+                             next_cursor=page['next_cursor'],
+                             page_totals=page['page_totals'],
+                             range_totals=page['range_totals'],
+                             is_first_page=cursor is None and jump_to is None,
+                             search_query=q,
+                             start=start_str if start else '',
+                             end=end_str if end else '',
+                             jump=jump_str if jump_to else '')
         
     except Exception as e:
         flash(f'Error al cargar ventas: {str(e)}', 'danger')
@@ -981,9 +958,6 @@ def edit_sale_save(sale_id: int) -> Union[str, Response]:
     except (ValueError, BusinessLogicError) as e:
         db_session.rollback()
         raise BusinessLogicError(str(e))
-from app.services import sale_draft_service
-from app.services.sales_service import confirm_sale_from_draft
-from app.middleware import require_login, require_tenant
 import uuid
 
 
@@ -1116,6 +1090,64 @@ def draft_add() -> Union[str, Response]:
         return redirect(url_for('sales.new_sale'))
 
 
+@sales_bp.route('/draft/scan', methods=['POST'])
+@require_login
+@require_tenant
+def draft_scan() -> Union[str, Response]:
+    """
+    Add a scanned barcode / SKU to the draft cart (HTMX endpoint).
+
+    Resolves the code from the cached exact-match index and returns the
+    updated cart in the same round-trip (no search request first). Unknown
+    codes answer 204 so HTMX keeps the cart and the search results as they
+    are; successful scans fire the 'pos-scan-added' client event.
+    """
+    db_session = get_session()
+    error_message = None
+    
+    try:
+        code = request.form.get('code', '').strip()[:100]
+        if not code:
+            raise ValueError('Falta el código a escanear')
+        
+        try:
+            qty = Decimal(str(request.form.get('qty', '1')))
+        except (InvalidOperation, ValueError):
+            qty = Decimal('1')
+        if qty <= 0:
+            raise ValueError('La cantidad debe ser mayor a 0')
+        
+        entry = find_product_by_code(db_session, g.tenant_id, code)
+        if not entry:
+            return Response(status=204)
+        
+        draft = sale_draft_service.get_or_create_draft(db_session, g.tenant_id, g.user_id)
+        sale_draft_service.add_product_to_draft(db_session, draft.id, entry['id'], qty, g.tenant_id)
+        db_session.commit()
+        
+    except (ValueError, BusinessLogicError, NotFoundError) as e:
+        db_session.rollback()
+        error_message = getattr(e, 'message', str(e))
+        current_app.logger.info(f"Scan rejected for tenant {g.tenant_id}: {error_message}")
+    except Exception as e:
+        db_session.rollback()
+        current_app.logger.error(f"Error in draft_scan: {str(e)}", exc_info=True)
+        error_message = 'Error al agregar producto escaneado'
+    
+    try:
+        draft, totals = sale_draft_service.get_draft_with_totals(db_session, g.tenant_id, g.user_id)
+    except Exception:
+        draft, totals = None, None
+    
+    response = make_response(render_template('sales/_cart_content_draft.html',
+                                              draft=draft,
+                                              totals=totals,
+                                              error_message=error_message))
+    if not error_message:
+        response.headers['HX-Trigger'] = 'pos-scan-added'
+    return response
+
+
 @sales_bp.route('/draft/update', methods=['POST'])
 @require_login
 @require_tenant
@@ -1413,7 +1445,13 @@ def draft_clear() -> Union[str, Response]:
 @require_login
 @require_tenant
 def confirm_draft() -> Union[str, Response]:
-    """Confirm sale from draft with idempotency and mixed payments."""
+    """
+    Confirm sale from draft with idempotency and mixed payments.
+
+    The idempotency key is reserved before the draft is loaded: a resubmit of
+    an already confirmed ticket gets the original sale back without touching
+    the (already consumed) draft or the current cart.
+    """
     db_session = get_session()
     
     try:
@@ -1423,18 +1461,6 @@ def confirm_draft() -> Union[str, Response]:
         if not idempotency_key:
             raise BusinessLogicError('Clave de idempotencia requerida')
         
-        # ROBUSTEZ: Obtener draft con manejo de errores
-        try:
-            draft = sale_draft_service.get_or_create_draft(
-                db_session, g.tenant_id, g.user_id
-            )
-        except Exception as draft_error:
-            current_app.logger.error(f"Error getting draft in confirm_draft: {draft_error}", exc_info=True)
-            raise BusinessLogicError('Error: Carrito no válido. Por favor, intente nuevamente.')
-        
-        if not draft or not draft.lines:
-            raise BusinessLogicError('Error: El carrito está vacío')
-        
         # Parse payments from form
         # Expected format: payments[0][method], payments[0][amount], etc.
         payments = []
@@ -1479,29 +1505,46 @@ def confirm_draft() -> Union[str, Response]:
             except ValueError:
                 customer_id = None
         
-        # Confirm sale
-        sale_id = confirm_sale_from_draft(
-            draft_id=draft.id,
-            payments=payments,
-            idempotency_key=idempotency_key,
-            session=db_session,
-            tenant_id=g.tenant_id,
-            user_id=g.user_id,
-            customer_id=customer_id
-        )
-        
-        # ROBUSTEZ: Clear draft con manejo de errores (no crítico)
-        try:
-            sale_draft_service.clear_draft(
-                session=db_session,
+        def confirm() -> int:
+            # ROBUSTEZ: Obtener draft con manejo de errores
+            try:
+                draft = sale_draft_service.get_or_create_draft(
+                    db_session, g.tenant_id, g.user_id
+                )
+            except Exception as draft_error:
+                current_app.logger.error(f"Error getting draft in confirm_draft: {draft_error}", exc_info=True)
+                raise BusinessLogicError('Error: Carrito no válido. Por favor, intente nuevamente.')
+            
+            if not draft or not draft.lines:
+                raise BusinessLogicError('Error: El carrito está vacío')
+            
+            # Confirm sale
+            sale_id = confirm_sale_from_draft(
                 draft_id=draft.id,
-                tenant_id=g.tenant_id
+                payments=payments,
+                idempotency_key=idempotency_key,
+                session=db_session,
+                tenant_id=g.tenant_id,
+                user_id=g.user_id,
+                customer_id=customer_id
             )
-        except Exception as clear_error:
-            current_app.logger.warning(f"Error clearing draft after confirmation: {clear_error}")
-            # No propagar error, la venta ya fue confirmada
+            
+            # ROBUSTEZ: Clear draft con manejo de errores (no crítico)
+            try:
+                sale_draft_service.clear_draft(
+                    session=db_session,
+                    draft_id=draft.id,
+                    tenant_id=g.tenant_id
+                )
+            except Exception as clear_error:
+                current_app.logger.warning(f"Error clearing draft after confirmation: {clear_error}")
+                # No propagar error, la venta ya fue confirmada
+            
+            db_session.commit()
+            return sale_id
         
-        db_session.commit()
+        # Duplicate submits get the original sale id back (confirm() does not run)
+        sale_id = run_idempotent(g.tenant_id, 'sale', idempotency_key, confirm)
         
         flash(f'Venta #{sale_id} confirmada exitosamente', 'success')
         
@@ -1509,7 +1552,10 @@ def confirm_draft() -> Union[str, Response]:
         # Logic: User wants to continue selling
         return redirect(url_for('sales.new_sale'))
         
-    except (ValueError, BusinessLogicError) as e:
+    except BusinessLogicError:
+        db_session.rollback()
+        raise
+    except ValueError as e:
         db_session.rollback()
         raise BusinessLogicError(str(e))
 
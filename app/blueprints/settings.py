@@ -11,6 +11,8 @@ from app.database import get_session
 from app.models import UOM, Category, Product, Tenant
 from app.middleware import require_login, require_tenant
 from app.services.cache_service import get_cache
+from app.services.chrome_service import invalidate_layout_chrome
+from app.services.catalog_read_service import get_uoms, get_categories, get_uoms_with_count, get_categories_with_count
 
 
 settings_bp = Blueprint('settings', __name__, url_prefix='/settings')
@@ -101,15 +103,8 @@ def list_uoms() -> str:
     """List all UOMs with product count (tenant-scoped)."""
     session = get_session()
     
-    # Get all UOMs with product count for current tenant
-    uoms_with_count = session.query(
-        UOM,
-        func.count(Product.id).label('product_count')
-    ).outerjoin(Product, Product.uom_id == UOM.id)\
-     .filter(UOM.tenant_id == g.tenant_id)\
-     .group_by(UOM.id)\
-     .order_by(UOM.name)\
-     .all()
+    # Get all UOMs with product count for current tenant (cached read models)
+    uoms_with_count = get_uoms_with_count(session, g.tenant_id)
     
     return render_template('settings/uoms_list.html', uoms_with_count=uoms_with_count)
 
@@ -168,7 +163,7 @@ def quick_create_uom() -> Union[str, Response, Tuple[str, int]]:
             
             invalidate_settings_cache(g.tenant_id, ['uom'])
             
-            uoms = session.query(UOM).filter(UOM.tenant_id == g.tenant_id).order_by(UOM.name).all()
+            uoms = get_uoms(session, g.tenant_id)
             options_html = render_template('products/_uom_selector_options.html', uoms=uoms, selected_uom_id=uom.id)
             
             response_html = f'<select class="form-select-custom" id="uom_id" name="uom_id" required hx-swap-oob="true">{options_html}</select>'
@@ -299,15 +294,8 @@ def list_categories() -> str:
     """List all categories with product count (tenant-scoped)."""
     session = get_session()
     
-    # Get all categories with product count for current tenant
-    categories_with_count = session.query(
-        Category,
-        func.count(Product.id).label('product_count')
-    ).outerjoin(Product, Product.category_id == Category.id)\
-     .filter(Category.tenant_id == g.tenant_id)\
-     .group_by(Category.id)\
-     .order_by(Category.name)\
-     .all()
+    # Get all categories with product count for current tenant (cached read models)
+    categories_with_count = get_categories_with_count(session, g.tenant_id)
     
     return render_template('settings/categories_list.html', categories_with_count=categories_with_count)
 
@@ -364,7 +352,7 @@ def quick_create_category() -> Union[str, Response, Tuple[str, int]]:
             
             invalidate_settings_cache(g.tenant_id, ['categories', 'products'])
             
-            categories = session.query(Category).filter(Category.tenant_id == g.tenant_id).order_by(Category.name).all()
+            categories = get_categories(session, g.tenant_id)
             
             response = make_response(render_template('products/_category_selector_options.html', 
                                                   categories=categories, 
@@ -509,6 +497,7 @@ def upload_logo() -> Union[str, Response]:
         logo_url = storage.upload_tenant_logo(logo_file, g.tenant_id)
         tenant.logo_url = logo_url
         session.commit()
+        invalidate_layout_chrome(g.tenant_id)
         
         logo_public_url = storage.get_public_url(logo_url)
         return render_template('settings/_sidebar_logo.html', current_tenant=tenant, logo_public_url=logo_public_url)
@@ -541,6 +530,7 @@ def delete_logo() -> Union[str, Response]:
         
         tenant.logo_url = None
         session.commit()
+        invalidate_layout_chrome(g.tenant_id)
         
         return render_template('settings/_sidebar_logo.html', current_tenant=tenant, logo_public_url=None)
     except (BusinessLogicError, NotFoundError) as e:
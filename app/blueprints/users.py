@@ -8,6 +8,7 @@ from app.database import get_session
 from app.middleware import require_login, require_tenant
 from app.decorators.permissions import owner_only
 from app.models import AppUser, UserTenant, Tenant
+from app.services.principal_service import invalidate_principal, invalidate_user_principals
 from sqlalchemy.exc import IntegrityError
 import secrets
 import jwt
@@ -29,6 +30,9 @@ def my_profile():
     """
     session = get_session()
     
+    # g.user is a cached principal; the profile needs the full row
+    user = session.query(AppUser).filter_by(id=g.user.id).first()
+    
     # Get current user's tenant relationship
     user_tenant = session.query(UserTenant).filter_by(
         user_id=g.user.id,
@@ -36,7 +40,7 @@ def my_profile():
         active=True
     ).first()
     
-    return render_template('users/profile.html', user=g.user, user_tenant=user_tenant)
+    return render_template('users/profile.html', user=user, user_tenant=user_tenant)
 
 
 @users_bp.route('/profile/edit', methods=['GET', 'POST'])
@@ -49,20 +53,23 @@ def edit_my_profile():
     """
     session = get_session()
     
+    # g.user is a cached principal; the form needs the full row
+    user = session.query(AppUser).filter_by(id=g.user.id).first()
+    
     if request.method == 'POST':
         full_name = request.form.get('full_name', '').strip()
         
         # Validations
         if not full_name:
             flash('El nombre completo es requerido.', 'danger')
-            return render_template('users/edit_profile.html', user=g.user)
+            return render_template('users/edit_profile.html', user=user)
         
         try:
             # Update user
-            user = session.query(AppUser).filter_by(id=g.user.id).first()
             if user:
                 user.full_name = full_name
                 session.commit()
+                invalidate_user_principals(session, user.id)
                 
                 # Update g.user to reflect changes immediately
                 g.user.full_name = full_name
@@ -76,10 +83,10 @@ def edit_my_profile():
         except Exception as e:
             session.rollback()
             flash(f'Error al actualizar perfil: {str(e)}', 'danger')
-            return render_template('users/edit_profile.html', user=g.user)
+            return render_template('users/edit_profile.html', user=user)
     
     # GET request
-    return render_template('users/edit_profile.html', user=g.user)
+    return render_template('users/edit_profile.html', user=user)
 
 
 @users_bp.route('/')
@@ -310,6 +317,7 @@ def accept_invite(token):
             )
             session.add(user_tenant)
             session.commit()
+            invalidate_principal(tenant_id, user.id)
             
             flash(f'¡Bienvenido! Tu cuenta ha sido creada con rol de {role}.', 'success')
             return redirect(url_for('auth.login'))
@@ -376,6 +384,7 @@ def edit_user(id):
         # Update role
         ut.role = new_role
         session.commit()
+        invalidate_principal(tenant_id, user.id)
         
         flash(f'Rol de {user.email} actualizado a {new_role}.', 'success')
         return redirect(url_for('users.list_users'))
@@ -424,6 +433,7 @@ def remove_user(id):
     # Deactivate user-tenant relationship
     ut.active = False
     session.commit()
+    invalidate_principal(tenant_id, user.id)
     
     flash(f'Usuario {user.email} removido del negocio.', 'success')
     return redirect(url_for('users.list_users'))
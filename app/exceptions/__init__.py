@@ -32,6 +32,16 @@ class InsufficientStockError(BusinessLogicError):
         message = f"Stock insuficiente para {product_name}: se requieren {req_fmt}, disponible {avail_fmt}"
         super().__init__(message, status_code=409)
 
+class ConcurrencyError(BusinessLogicError):
+    """Raised when a transaction keeps conflicting with concurrent ones (deadlock / serialization)."""
+    def __init__(self, message="Otra operación está usando los mismos productos. Intente nuevamente."):
+        super().__init__(message, status_code=409)
+
+class DuplicateRequestError(BusinessLogicError):
+    """Raised when the same request (idempotency key) is still being processed."""
+    def __init__(self, message="Esta operación ya se está procesando. Espere unos segundos."):
+        super().__init__(message, status_code=409)
+
 class UnauthorizedError(SaasError):
     """Raised when a user lacks permission for an action."""
     def __init__(self, message="Unauthorized access"):
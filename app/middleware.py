@@ -2,7 +2,7 @@
 from functools import wraps
 from flask import session, g, redirect, url_for, flash, request
 from app.database import get_session
-from app.models import AppUser, UserTenant
+from app.services.principal_service import get_principal, PrincipalUser
 
 
 def load_user_and_tenant():
@@ -11,6 +11,10 @@ def load_user_and_tenant():
     
     Called before each request to establish user and tenant context.
     Sets g.user, g.tenant_id, and g.user_role if authenticated.
+    
+    Uses the cached principal snapshot (principal_service), so the steady
+    state costs no database queries. g.user is a PrincipalUser, not an
+    AppUser row.
     """
     g.user = None
     g.tenant_id = None
@@ -18,28 +22,17 @@ def load_user_and_tenant():
     
     user_id = session.get('user_id')
     if user_id:
-        db_session = get_session()
-        user = db_session.query(AppUser).filter_by(id=user_id, active=True).first()
-        if user:
-            g.user = user
-            g.user_id = user.id # Expose user_id directly for convenience
+        tenant_id = session.get('tenant_id')
+        principal = get_principal(get_session(), user_id, tenant_id)
+        if principal and principal['user_active']:
+            g.user = PrincipalUser(principal['user_id'], principal['email'], principal['full_name'])
+            g.user_id = principal['user_id']  # Expose user_id directly for convenience
             
-            # Load tenant_id from session
-            tenant_id = session.get('tenant_id')
             if tenant_id:
                 # Verify user has access to this tenant
-                user_tenant = db_session.query(UserTenant).filter_by(
-                    user_id=user.id,
-                    tenant_id=tenant_id,
-                    active=True
-                ).first()
-                
-                if user_tenant:
+                if principal['role']:
                     # ADMIN PANEL: Check if tenant is suspended
-                    from app.models import Tenant
-                    tenant = db_session.query(Tenant).filter_by(id=tenant_id).first()
-                    
-                    if tenant and tenant.is_suspended:
+                    if principal['tenant_suspended']:
                         # Tenant is suspended - block access immediately
                         session.clear()
                         flash('Este negocio ha sido suspendido. Contacta soporte.', 'danger')
@@ -47,7 +40,7 @@ def load_user_and_tenant():
                         return
                     
                     g.tenant_id = tenant_id
-                    g.user_role = user_tenant.role  # PASO 6: Set user role
+                    g.user_role = principal['role']  # PASO 6: Set user role
                 else:
                     # User doesn't have access to this tenant, clear it
                     session.pop('tenant_id', None)
@@ -113,21 +106,14 @@ def require_role(min_role='STAFF'):
                 flash('Acceso denegado.', 'danger')
                 return redirect(url_for('auth.login'))
             
-            # Get user's role for current tenant
-            db_session = get_session()
-            user_tenant = db_session.query(UserTenant).filter_by(
-                user_id=g.user.id,
-                tenant_id=g.tenant_id,
-                active=True
-            ).first()
-            
-            if not user_tenant:
+            # Role was resolved by load_user_and_tenant from the cached principal
+            if not g.user_role:
                 flash('No tienes acceso a este negocio.', 'danger')
                 return redirect(url_for('auth.select_tenant'))
             
             # Check role hierarchy
             role_hierarchy = {'OWNER': 3, 'ADMIN': 2, 'STAFF': 1}
-            user_role_level = role_hierarchy.get(user_tenant.role, 0)
+            user_role_level = role_hierarchy.get(g.user_role, 0)
             required_level = role_hierarchy.get(min_role, 1)
             
             if user_role_level < required_level:
@@ -11,6 +11,7 @@ from app.models.category import Category
 from app.models.product import Product
 from app.models.product_feature import ProductFeature
 from app.models.product_stock import ProductStock
+from app.models.product_sales_daily import ProductSalesDaily
 from app.models.sale import Sale, SaleStatus, PaymentStatus
 from app.models.sale_line import SaleLine
 from app.models.sale_draft import SaleDraft
@@ -37,7 +38,7 @@ __all__ = [
     # SaaS Core
     'Tenant', 'AppUser', 'UserTenant', 'UserRole',
     # Business
-    'UOM', 'Category', 'Product', 'ProductFeature', 'ProductStock',
+    'UOM', 'Category', 'Product', 'ProductFeature', 'ProductStock', 'ProductSalesDaily',
     'Sale', 'SaleStatus', 'PaymentStatus', 'SaleLine', 'SaleDraft', 'SaleDraftLine', 'SalePayment',
     'StockMove', 'StockMoveType', 'StockReferenceType', 'StockMoveLine',
     'FinanceLedger', 'LedgerType', 'LedgerReferenceType', 'PaymentMethod', 'normalize_payment_method',
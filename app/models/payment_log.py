@@ -11,4 +11,5 @@ class PaymentLog(Base):
     amount = Column(Numeric(10, 2), default=0)
     date = Column(DateTime(timezone=True), default=func.now(), server_default=func.now())
     payment_method = Column(String(20), nullable=False, default='CASH', server_default='CASH')
+    idempotency_key = Column(String(64), unique=True, nullable=True)
 
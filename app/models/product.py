@@ -45,22 +45,22 @@ class Product(Base):
             return self.stock.on_hand_qty
         return 0
 
-    @property
-    def image_url(self):
+    @staticmethod
+    def public_url_for(path):
         """
-        Get dynamic public URL for product image.
+        Get dynamic public URL for a stored image path.
         
         Handles:
         1. Legacy full URLs (starts with http) - returns as is
         2. New relative paths (object keys) - joins with S3_PUBLIC_URL
         3. No image - returns None
         """
-        if not self.image_path:
+        if not path:
             return None
             
         # If it's already a full URL (legacy), return it
-        if self.image_path.startswith(('http://', 'https://')):
-            return self.image_path
+        if path.startswith(('http://', 'https://')):
+            return path
             
         # It's a relative object key
         from flask import current_app
@@ -70,9 +70,13 @@ class Product(Base):
         # Ensure no double slashes when joining
         base = public_url.rstrip('/')
         collection = bucket.strip('/')
-        path = self.image_path.lstrip('/')
         
-        return f"{base}/{collection}/{path}"
+        return f"{base}/{collection}/{path.lstrip('/')}"
+
+    @property
+    def image_url(self):
+        """Get dynamic public URL for product image."""
+        return self.public_url_for(self.image_path)
 
     @property
     def image_original_url(self):
@@ -80,24 +84,4 @@ class Product(Base):
         Get dynamic public URL for ORIGINAL product image.
         Uses image_original_path if available, otherwise falls back to image_url (for legacy).
         """
-        target_path = self.image_original_path if self.image_original_path else self.image_path
-
-        if not target_path:
-            return None
-            
-        # If it's already a full URL (legacy), return it
-        if target_path.startswith(('http://', 'https://')):
-            return target_path
-            
-        # It's a relative object key
-        from flask import current_app
-        public_url = current_app.config.get('S3_PUBLIC_URL', 'http://localhost:9000')
-        bucket = current_app.config.get('S3_BUCKET', 'uploads')
-        
-        # Ensure no double slashes when joining
-        base = public_url.rstrip('/')
-        collection = bucket.strip('/')
-        path = target_path.lstrip('/')
-        
-        return f"{base}/{collection}/{path}"
-
+        return self.public_url_for(self.image_original_path or self.image_path)
@@ -0,0 +1,17 @@
+"""Product Sales Daily model (popularity buckets)."""
+from sqlalchemy import Column, BigInteger, Numeric, Date, ForeignKey
+from app.database import Base
+
+
+class ProductSalesDaily(Base):
+    """Confirmed quantity sold per product and day, maintained by the sale services."""
+
+    __tablename__ = 'product_sales_daily'
+
+    tenant_id = Column(BigInteger, ForeignKey('tenant.id'), primary_key=True)
+    product_id = Column(BigInteger, ForeignKey('product.id'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    qty = Column(Numeric(14, 3), nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ProductSalesDaily(product_id={self.product_id}, day={self.day}, qty={self.qty})>"
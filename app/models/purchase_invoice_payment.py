@@ -19,6 +19,7 @@ class PurchaseInvoicePayment(Base):
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     created_by = Column(BigInteger, ForeignKey('app_user.id'), nullable=True)
+    idempotency_key = Column(String(64), unique=True, nullable=True)
     
     # Relationships
     invoice = relationship('PurchaseInvoice', back_populates='payments')
@@ -7,6 +7,7 @@ from app.database import db_session
 from app.models import AppUser, UserTenant
 from sqlalchemy.exc import IntegrityError
 from app.exceptions import BusinessLogicError
+from app.services.principal_service import invalidate_user_principals
 import logging
 
 logger = logging.getLogger(__name__)
@@ -52,6 +53,7 @@ def get_or_create_user_from_google(google_profile):
         user.email_verified = True
         user.active = True  # Ensure user is active
         db_session.commit()
+        invalidate_user_principals(db_session, user.id)
         return user
     
     # Check if user exists by email
@@ -78,6 +80,7 @@ def get_or_create_user_from_google(google_profile):
         user.full_name = full_name or user.full_name
         user.active = True
         db_session.commit()
+        invalidate_user_principals(db_session, user.id)
         
         return user
     
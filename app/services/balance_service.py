@@ -31,18 +31,37 @@ def get_balance_series(
 ) -> List[Dict[str, Any]]:
     """
     Get balance series (income, expense, net) grouped by period (tenant-scoped).
+    
+    Memoized with single-flight recomputation: after a sale invalidates the
+    balance module, only one request per key re-runs the aggregation.
     """
     cache_key = _build_balance_cache_key(view, start, end, method)
     
-    # Try cache
+    def _load() -> List[Dict[str, Any]]:
+        return _query_balance_series(view, start, end, session, tenant_id, method)
+    
     try:
         cache = get_cache()
-        cached_result = cache.get(tenant_id, 'balance', cache_key)
-        if cached_result is not None:
-            return cached_result
     except Exception as e:
         logger.debug(f"[CACHE] Balance error (continuing): {e}")
+        return _load()
     
+    return cache.memoize(
+        tenant_id, 'balance', cache_key, _load,
+        ttl=current_app.config.get('CACHE_BALANCE_TTL', 60),
+        stale_ttl=current_app.config.get('CACHE_BALANCE_STALE_TTL', 30)
+    )
+
+
+def _query_balance_series(
+    view: str,
+    start: date,
+    end: date,
+    session: Session,
+    tenant_id: int,
+    method: str
+) -> List[Dict[str, Any]]:
+    """Aggregate the balance series in PostgreSQL."""
     granularity = {'daily': 'day', 'monthly': 'month', 'yearly': 'year'}.get(view, 'month')
     start_dt = datetime.combine(start, datetime.min.time())
     end_dt = datetime.combine(end, datetime.max.time())
@@ -79,13 +98,6 @@ def get_balance_series(
             'net': inc - exp
         })
     
-    # Save to cache
-    try:
-        ttl = current_app.config.get('CACHE_BALANCE_TTL', 60)
-        get_cache().set(tenant_id, 'balance', cache_key, series, ttl=ttl)
-    except Exception as e:
-        logger.debug(f"[CACHE] Balance save error: {e}")
-    
     return series
 
 
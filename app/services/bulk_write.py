@@ -0,0 +1,35 @@
+"""
+Bulk write helper - one INSERT per table for the child rows of a document.
+
+Sale confirmation, purchase invoices and quote conversion write N lines, N
+stock move lines and a few payments / ledger entries per ticket. Adding them
+one by one through the unit of work builds an ORM object per row and tracks
+it in the identity map until commit. bulk_insert sends plain dicts as a
+single executemany, which SQLAlchemy's insertmanyvalues renders as one
+multi-row INSERT ... VALUES on PostgreSQL, so the write cost stays close to
+constant as the ticket grows.
+
+Rows are written immediately (pending ORM objects are flushed first), but no
+ORM objects are created: relationships already loaded on the parent (e.g.
+sale.lines) are not updated until they are expired / reloaded.
+"""
+
+from typing import Any, Dict, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+
+def bulk_insert(session: Session, model: Any, rows: Sequence[Dict[str, Any]]) -> None:
+    """
+    Insert rows of a mapped class in a single statement.
+
+    Args:
+        model: mapped class (e.g. SaleLine)
+        rows: column values per row, all rows with the same keys
+    """
+    if not rows:
+        return
+
+    session.flush()  # Parent rows first (the app sessions do not autoflush)
+    session.execute(insert(model), list(rows))
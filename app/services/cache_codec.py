@@ -0,0 +1,164 @@
+"""
+Cache payload codecs for CacheService.
+
+Entries are stored as a small frame:
+
+    b'\\x00' + <codec id byte> + <compression byte> + payload
+
+Legacy entries (plain JSON text written before framing existed) never start
+with a NUL byte, so they are still decoded with the original JSON rules
+while old keys age out.
+
+Codecs:
+- 'msgpack': binary, with native ext types for Decimal, datetime and date
+  (requires the optional `msgpack` package; falls back to 'json').
+- 'json': stdlib JSON with the legacy {"__decimal__": "..."} convention.
+
+Payloads larger than the compression threshold are zlib-compressed when
+that actually saves space.
+"""
+
+import json
+import logging
+import zlib
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Any, Dict, Union
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+FRAME_MARKER = b'\x00'
+COMPRESSION_NONE = b'-'
+COMPRESSION_ZLIB = b'z'
+
+# msgpack ext type codes
+_EXT_DECIMAL = 1
+_EXT_DATETIME = 2
+_EXT_DATE = 3
+
+
+class CodecError(ValueError):
+    """Raised when a cached payload cannot be decoded."""
+
+
+class JsonCodec:
+    """Stdlib JSON codec (legacy wire format)."""
+
+    codec_id = b'j'
+
+    @staticmethod
+    def _default(obj: Any) -> Any:
+        if isinstance(obj, (datetime, date)):
+            return obj.isoformat()
+        if isinstance(obj, Decimal):
+            return {"__decimal__": str(obj)}
+        raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
+    @staticmethod
+    def _object_hook(dct: Dict[str, Any]) -> Any:
+        if "__decimal__" in dct:
+            return Decimal(dct["__decimal__"])
+        return dct
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, default=self._default, separators=(',', ':')).encode('utf-8')
+
+    def decode(self, payload: bytes) -> Any:
+        return json.loads(payload, object_hook=self._object_hook)
+
+
+class MsgpackCodec:
+    """Binary codec with native Decimal/datetime/date ext types."""
+
+    codec_id = b'm'
+
+    @staticmethod
+    def _default(obj: Any) -> Any:
+        if isinstance(obj, Decimal):
+            return msgpack.ExtType(_EXT_DECIMAL, str(obj).encode('ascii'))
+        if isinstance(obj, datetime):
+            return msgpack.ExtType(_EXT_DATETIME, obj.isoformat().encode('ascii'))
+        if isinstance(obj, date):
+            return msgpack.ExtType(_EXT_DATE, obj.isoformat().encode('ascii'))
+        raise TypeError(f"Object of type {type(obj)} is not msgpack serializable")
+
+    @staticmethod
+    def _ext_hook(code: int, data: bytes) -> Any:
+        if code == _EXT_DECIMAL:
+            return Decimal(data.decode('ascii'))
+        if code == _EXT_DATETIME:
+            return datetime.fromisoformat(data.decode('ascii'))
+        if code == _EXT_DATE:
+            return date.fromisoformat(data.decode('ascii'))
+        return msgpack.ExtType(code, data)
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=self._default, use_bin_type=True)
+
+    def decode(self, payload: bytes) -> Any:
+        return msgpack.unpackb(payload, ext_hook=self._ext_hook, raw=False, strict_map_key=False)
+
+
+_CODECS = {JsonCodec.codec_id: JsonCodec()}
+if msgpack is not None:
+    _CODECS[MsgpackCodec.codec_id] = MsgpackCodec()
+
+_CODEC_NAMES = {'json': JsonCodec.codec_id, 'msgpack': MsgpackCodec.codec_id}
+
+
+class FramedCodec:
+    """
+    Encode with the configured codec; decode any known frame or legacy JSON.
+
+    Args:
+        name: 'msgpack' or 'json'
+        compress_threshold: compress payloads of at least this many bytes (0 disables)
+        compress_level: zlib level (1 favours speed)
+    """
+
+    def __init__(self, name: str = 'msgpack', compress_threshold: int = 1024, compress_level: int = 1):
+        codec_id = _CODEC_NAMES.get(name)
+        if codec_id is None:
+            raise ValueError(f"Unknown cache codec: {name}")
+        if codec_id not in _CODECS:
+            logger.warning(f"[CACHE] Codec '{name}' unavailable (package not installed), using json")
+            codec_id = JsonCodec.codec_id
+        self.codec = _CODECS[codec_id]
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+    @property
+    def name(self) -> str:
+        return 'msgpack' if self.codec.codec_id == MsgpackCodec.codec_id else 'json'
+
+    def encode(self, value: Any) -> bytes:
+        payload = self.codec.encode(value)
+        compression = COMPRESSION_NONE
+        if self.compress_threshold and len(payload) >= self.compress_threshold:
+            compressed = zlib.compress(payload, self.compress_level)
+            if len(compressed) < len(payload):
+                payload, compression = compressed, COMPRESSION_ZLIB
+        return FRAME_MARKER + self.codec.codec_id + compression + payload
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        try:
+            if not data.startswith(FRAME_MARKER):
+                return _CODECS[JsonCodec.codec_id].decode(data)
+            codec = _CODECS.get(data[1:2])
+            if codec is None:
+                raise CodecError(f"Unsupported cache codec id {data[1:2]!r}")
+            payload = data[3:]
+            if data[2:3] == COMPRESSION_ZLIB:
+                payload = zlib.decompress(payload)
+            return codec.decode(payload)
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(str(e)) from e
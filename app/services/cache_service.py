@@ -1,26 +1,246 @@
 """
 Redis Cache Service for Multi-Tenant Application.
 Provides tenant-isolated caching with graceful degradation.
+
+Two tiers:
+- L1: optional bounded in-process LRU (per worker) for small hot modules.
+- L2: shared Redis.
+Invalidations are broadcast over Redis pub/sub so every worker drops its L1.
+
+Redis health is tracked by a circuit breaker fed by real command outcomes,
+so a healthy read costs one round-trip and an outage costs near zero.
+
+Invalidation is O(1): every tenant/module has a generation counter embedded
+in its keys. invalidate_module INCRs it and old generations expire by TTL.
+
+Payloads are encoded by a pluggable codec (see cache_codec, CACHE_CODEC).
+
+Hits/misses per tier, errors, Redis latency, payload sizes and invalidations
+are exported as Prometheus metrics labelled by module (see blueprints.metrics).
 """
 
 import logging
 import json
-from typing import Any, Optional, Callable, Dict, Union
-from datetime import datetime, date
-from decimal import Decimal
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional, Callable, Dict, Union, Tuple, Iterable, List
 
 import redis
 from redis.exceptions import RedisError, ConnectionError, TimeoutError
 from flask import Flask, current_app
 
+from app.services.cache_codec import FramedCodec, CodecError
+from app.blueprints.metrics import (
+    cache_hits_total, cache_misses_total, cache_errors_total,
+    cache_operation_duration_seconds, cache_payload_bytes, cache_invalidations_total
+)
+
 logger = logging.getLogger(__name__)
 
 
+L1Key = Tuple[int, str, str]
+ItemKey = Tuple[str, str]  # (module, key) within a tenant
+
+# Resolve the module generation and read the entry in one round-trip.
+# KEYS[1] = generation key; ARGV[1] = module prefix, ARGV[2] = entry key
+_GET_SCRIPT = """
+local gen = redis.call('GET', KEYS[1]) or '0'
+return {gen, redis.call('GET', ARGV[1] .. ':g' .. gen .. ':' .. ARGV[2])}
+"""
+
+# Write an entry under the given generation (or the current one if ARGV[5] is empty).
+# Writing under the generation observed before loading keeps a value loaded
+# before an invalidation from landing in the new generation.
+# Returns {written generation, current generation}: they differ when the
+# module was invalidated since the read, and the value must not go to L1.
+_SET_SCRIPT = """
+local current = redis.call('GET', KEYS[1]) or '0'
+local gen = ARGV[5]
+if gen == '' then gen = current end
+redis.call('SETEX', ARGV[1] .. ':g' .. gen .. ':' .. ARGV[2], ARGV[3], ARGV[4])
+return {gen, current}
+"""
+
+# Batch read: resolve each module generation once, then one MGET.
+# KEYS = generation key per item; ARGV = module prefix and entry key per item.
+# Returns a flat list [gen1, value1, gen2, value2, ...].
+_GET_MANY_SCRIPT = """
+local gens = {}
+local data_keys = {}
+for i, gen_key in ipairs(KEYS) do
+    local gen = gens[gen_key]
+    if not gen then
+        gen = redis.call('GET', gen_key) or '0'
+        gens[gen_key] = gen
+    end
+    data_keys[i] = ARGV[2 * i - 1] .. ':g' .. gen .. ':' .. ARGV[2 * i]
+end
+local values = redis.call('MGET', unpack(data_keys))
+local out = {}
+for i = 1, #KEYS do
+    out[2 * i - 1] = gens[KEYS[i]]
+    out[2 * i] = values[i]
+end
+return out
+"""
+
+_DELETE_SCRIPT = """
+local gen = redis.call('GET', KEYS[1]) or '0'
+return redis.call('DEL', ARGV[1] .. ':g' .. gen .. ':' .. ARGV[2])
+"""
+
+# Release a recompute lock only if we still own it (lease may have expired)
+_UNLOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Marker of memoize envelopes: {"__memo__": 1, "v": value, "exp": epoch, "delta": seconds}
+_MEMO_MARKER = '__memo__'
+
+
+class LocalLRUCache:
+    """
+    Bounded in-process LRU with per-entry TTL (L1 tier).
+    
+    Values are stored already deserialized and returned by reference:
+    callers must treat cached values as read-only.
+    """
+    
+    def __init__(self, max_entries: int = 2048, ttl: int = 5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[L1Key, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: L1Key) -> Optional[Any]:
+        """Return cached value or None if missing/expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: L1Key, value: Any, ttl: Optional[int] = None, max_ttl: Optional[int] = None) -> None:
+        """Store value; TTL is capped by the L1 TTL (or by max_ttl for entries with an override)."""
+        cap = self.ttl if max_ttl is None else max_ttl
+        ttl = cap if ttl is None else min(ttl, cap)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+    
+    def delete(self, key: L1Key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def delete_module(self, tenant_id: int, module: str) -> None:
+        """Drop every entry of a tenant/module."""
+        with self._lock:
+            for key in [k for k in self._data if k[0] == tenant_id and k[1] == module]:
+                del self._data[key]
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CircuitBreaker:
+    """
+    Health-state circuit breaker for the Redis connection.
+    
+    - closed: commands flow; consecutive connection failures are counted.
+    - open: commands fail fast until the backoff delay elapses.
+    - half_open: a single probe command is let through; success closes the
+      circuit, failure reopens it with a doubled backoff (capped).
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold: int = 3, base_backoff: float = 1.0, max_backoff: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = self.CLOSED
+        self._failures = 0
+        self._backoff = base_backoff
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+    
+    def allow_request(self) -> bool:
+        """Return True if a Redis command may be attempted now."""
+        if self.state == self.CLOSED:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._retry_at:
+                # Let exactly one probe through; if its outcome is never
+                # recorded, another probe is allowed after the same delay
+                self.state = self.HALF_OPEN
+                self._retry_at = now + self._backoff
+                return True
+            return False
+    
+    def record_success(self) -> None:
+        if self.state == self.CLOSED and self._failures == 0:
+            return
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("[CACHE] ✓ Redis recovered, circuit CLOSED")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._backoff = self.base_backoff
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._backoff = min(self._backoff * 2, self.max_backoff)
+                self._open()
+                return
+            self._failures += 1
+            if self.state == self.CLOSED and self._failures >= self.failure_threshold:
+                self._backoff = self.base_backoff
+                self._open()
+    
+    def trip(self) -> None:
+        """Open the circuit immediately (e.g. Redis unreachable at startup)."""
+        with self._lock:
+            self._open()
+    
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self._retry_at = time.monotonic() + self._backoff
+        logger.warning(f"[CACHE] ⚠ Circuit OPEN, next Redis probe in {self._backoff:.1f}s")
+
+
 class CacheService:
     """
     Redis-based caching service with multi-tenant support.
     
-    Keys pattern: {prefix}:tenant:{tenant_id}:{module}:{key}
+    Keys pattern: {prefix}:tenant:{tenant_id}:{module}:g{generation}:{key}
+    Generation counter: {prefix}:tenant:{tenant_id}:{module}:gen
+    
+    Modules listed in CACHE_L1_MODULES are also kept in a per-worker LRU (L1).
     """
     
     def __init__(self, app: Optional[Flask] = None):
@@ -28,6 +248,23 @@ class CacheService:
         self.client: Optional[redis.Redis] = None
         self._enabled: bool = False
         self._prefix: str = ""
+        self.l1: Optional[LocalLRUCache] = None
+        self._l1_modules: frozenset = frozenset()
+        self._l1_key_ttls: Dict[ItemKey, int] = {}
+        self._listener: Optional[Any] = None
+        self._listener_pid: Optional[int] = None
+        self._listener_lock = threading.Lock()
+        self.breaker = CircuitBreaker()
+        self._generation_ttl: int = 30 * 86400
+        self._get_script: Optional[Any] = None
+        self._set_script: Optional[Any] = None
+        self._delete_script: Optional[Any] = None
+        self._unlock_script: Optional[Any] = None
+        self._get_many_script: Optional[Any] = None
+        self.codec = FramedCodec('json', compress_threshold=0)
+        self._stats: Dict[str, int] = {
+            'l1_hits': 0, 'l1_misses': 0, 'l2_hits': 0, 'l2_misses': 0,
+        }
         
         if app:
             self.init_app(app)
@@ -42,105 +279,447 @@ class CacheService:
             logger.info("[CACHE] Cache is DISABLED via config")
             return
         
-        try:
-            self.client = redis.from_url(
-                redis_url,
-                decode_responses=True,
-                socket_connect_timeout=3,
-                socket_timeout=3,
-                socket_keepalive=True,
-                max_connections=50,
-                retry_on_timeout=True,
-                health_check_interval=30
+        self.codec = FramedCodec(
+            app.config.get('CACHE_CODEC', 'msgpack'),
+            compress_threshold=app.config.get('CACHE_COMPRESS_THRESHOLD', 1024)
+        )
+        
+        self.breaker = CircuitBreaker(
+            failure_threshold=app.config.get('CACHE_BREAKER_FAILURES', 3),
+            base_backoff=app.config.get('CACHE_BREAKER_BASE_BACKOFF', 1.0),
+            max_backoff=app.config.get('CACHE_BREAKER_MAX_BACKOFF', 30.0)
+        )
+        
+        if app.config.get('CACHE_L1_ENABLED', True):
+            self.l1 = LocalLRUCache(
+                max_entries=app.config.get('CACHE_L1_MAX_ENTRIES', 2048),
+                ttl=app.config.get('CACHE_L1_TTL', 5)
             )
+            self._l1_modules = frozenset(app.config.get('CACHE_L1_MODULES', ()))
+            # '{module}:{key}' -> L1 TTL above CACHE_L1_TTL
+            self._l1_key_ttls = {
+                tuple(name.split(':', 1)): ttl
+                for name, ttl in app.config.get('CACHE_L1_KEY_TTLS', {}).items()
+            }
+        
+        socket_timeout = app.config.get('CACHE_SOCKET_TIMEOUT', 3)
+        self.client = redis.from_url(
+            redis_url,
+            decode_responses=False,  # payloads are binary codec frames
+            socket_connect_timeout=socket_timeout,
+            socket_timeout=socket_timeout,
+            socket_keepalive=True,
+            max_connections=50,
+            retry_on_timeout=True,
+            health_check_interval=30
+        )
+        self._generation_ttl = app.config.get('CACHE_GENERATION_TTL', 30 * 86400)
+        self._get_script = self.client.register_script(_GET_SCRIPT)
+        self._set_script = self.client.register_script(_SET_SCRIPT)
+        self._delete_script = self.client.register_script(_DELETE_SCRIPT)
+        self._unlock_script = self.client.register_script(_UNLOCK_SCRIPT)
+        self._get_many_script = self.client.register_script(_GET_MANY_SCRIPT)
+        try:
             self.client.ping()
             logger.info(f"[CACHE] ✓ Redis connected: {redis_url}")
         except (ConnectionError, TimeoutError, RedisError) as e:
-            logger.warning(f"[CACHE] ⚠ Redis connection failed: {e}. Cache DISABLED.")
-            self._enabled = False
-            self.client = None
+            # Keep the client: the breaker probes Redis again with backoff
+            logger.warning(f"[CACHE] ⚠ Redis connection failed: {e}. Cache DEGRADED until Redis recovers.")
+            self.breaker.trip()
     
     def is_available(self) -> bool:
-        """Check if cache is available and healthy."""
+        """
+        Check if cache may be used right now.
+        
+        No network round-trip: health comes from the circuit breaker,
+        which is updated by the outcome of real commands.
+        """
         if not self._enabled or not self.client:
             return False
+        return self.breaker.allow_request()
+    
+    def _record_error(self, error: Exception, operation: str, module: str = '-') -> None:
+        """Count the error and feed connectivity failures to the circuit breaker."""
+        cache_errors_total.labels(module=module, operation=operation).inc()
+        if isinstance(error, (ConnectionError, TimeoutError)):
+            self.breaker.record_failure()
+    
+    def _record_lookup(self, module: str, tier: str, hit: bool) -> None:
+        """Count a hit or miss for stats() and Prometheus."""
+        if hit:
+            self._stats[f'{tier}_hits'] += 1
+            cache_hits_total.labels(module=module, tier=tier).inc()
+        else:
+            self._stats[f'{tier}_misses'] += 1
+            cache_misses_total.labels(module=module, tier=tier).inc()
+    
+    @staticmethod
+    def _observe_latency(module: str, operation: str, started: float) -> None:
+        cache_operation_duration_seconds.labels(module=module, operation=operation).observe(
+            time.perf_counter() - started
+        )
+    
+    def _module_prefix(self, tenant_id: int, module: str) -> str:
+        """Build tenant-isolated module prefix."""
+        return f"{self._prefix}:tenant:{tenant_id}:{module}"
+    
+    def _generation_key(self, tenant_id: int, module: str) -> str:
+        """Key of the tenant/module generation counter."""
+        return f"{self._module_prefix(tenant_id, module)}:gen"
+    
+    def _build_key(self, tenant_id: int, module: str, key: str, generation: Union[int, str] = 0) -> str:
+        """Build tenant-isolated cache key for a generation."""
+        return f"{self._module_prefix(tenant_id, module)}:g{generation}:{key}"
+    
+    # ------------------------------------------------------------------
+    # L1 tier and cross-worker invalidation
+    # ------------------------------------------------------------------
+    
+    @property
+    def _invalidation_channel(self) -> str:
+        return f"{self._prefix}:cache:invalidate"
+    
+    def _uses_l1(self, module: str) -> bool:
+        return self.l1 is not None and module in self._l1_modules
+    
+    def _l1_set(self, tenant_id: int, module: str, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Store in L1, honouring the per-key TTL override (CACHE_L1_KEY_TTLS)."""
+        self.l1.set((tenant_id, module, key), value, ttl, max_ttl=self._l1_key_ttls.get((module, key)))
+    
+    def _ensure_listener(self) -> None:
+        """
+        Subscribe this worker to invalidation broadcasts.
+        
+        Started lazily and per PID, so gunicorn workers forked from a
+        preloaded master each get their own subscriber thread.
+        """
+        if self._listener_pid == os.getpid() or not self.is_available():
+            return
+        with self._listener_lock:
+            if self._listener_pid == os.getpid():
+                return
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{self._invalidation_channel: self._on_invalidation})
+                self._listener = pubsub.run_in_thread(
+                    sleep_time=1.0, daemon=True,
+                    exception_handler=self._on_listener_error
+                )
+                self._listener_pid = os.getpid()
+                self.breaker.record_success()
+            except RedisError as e:
+                # Retried on a later call once the breaker lets commands through
+                self._record_error(e, 'subscribe')
+                logger.warning(f"[CACHE] ✗ Invalidation listener error: {e}")
+    
+    def _on_invalidation(self, message: Dict[str, Any]) -> None:
+        """Drop L1 entries named by an invalidation broadcast."""
+        if self.l1 is None:
+            return
         try:
-            self.client.ping()
-            return True
-        except (ConnectionError, RedisError):
-            return False
+            payload = json.loads(message['data'])
+            if payload.get('key') is None:
+                self.l1.delete_module(payload['tenant_id'], payload['module'])
+            else:
+                self.l1.delete((payload['tenant_id'], payload['module'], payload['key']))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"[CACHE] ✗ Bad invalidation message: {e}")
     
-    def _build_key(self, tenant_id: int, module: str, key: str) -> str:
-        """Build tenant-isolated cache key."""
-        return f"{self._prefix}:tenant:{tenant_id}:{module}:{key}"
-    
-    def _serialize(self, value: Any) -> str:
-        """Serialize Python object to JSON string with Decimal precision."""
-        def default_handler(obj: Any) -> Any:
-            if isinstance(obj, (datetime, date)):
-                return obj.isoformat()
-            elif isinstance(obj, Decimal):
-                # Guardar como un diccionario especial para reconocerlo al deserializar si fuera necesario
-                # O simplemente como string para máxima precisión.
-                return {"__decimal__": str(obj)}
-            raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
-        return json.dumps(value, default=default_handler)
-    
-    def _deserialize(self, value: str) -> Any:
-        """Deserialize JSON string to Python object, reconstructing Decimals."""
-        def object_hook(dct: Dict[str, Any]) -> Any:
-            if "__decimal__" in dct:
-                return Decimal(dct["__decimal__"])
-            return dct
-        return json.loads(value, object_hook=object_hook)
+    def _on_listener_error(self, error: BaseException, pubsub: Any, thread: Any) -> None:
+        """Keep the subscriber alive across Redis outages; L1 TTL bounds staleness."""
+        logger.warning(f"[CACHE] ✗ Invalidation listener: {error}")
+        time.sleep(1.0)
     
-    def get(self, tenant_id: int, module: str, key: str) -> Optional[Any]:
-        """Get value from cache."""
+    def _broadcast_invalidation(self, tenant_id: int, module: str, key: Optional[str] = None) -> None:
+        """Drop local L1 entries and tell the other workers to do the same."""
+        if not self._uses_l1(module):
+            return
+        if key is None:
+            self.l1.delete_module(tenant_id, module)
+        else:
+            self.l1.delete((tenant_id, module, key))
         if not self.is_available():
-            return None
+            return
         try:
-            cache_key = self._build_key(tenant_id, module, key)
-            value = self.client.get(cache_key)
+            payload = json.dumps({'tenant_id': tenant_id, 'module': module, 'key': key})
+            self.client.publish(self._invalidation_channel, payload)
+            self.breaker.record_success()
+        except RedisError as e:
+            self._record_error(e, 'publish', module)
+            logger.warning(f"[CACHE] ✗ Invalidation broadcast error: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Per-tier hit/miss counters and hit ratios for this worker."""
+        stats: Dict[str, Any] = dict(self._stats)
+        for tier in ('l1', 'l2'):
+            lookups = stats[f'{tier}_hits'] + stats[f'{tier}_misses']
+            stats[f'{tier}_hit_ratio'] = round(stats[f'{tier}_hits'] / lookups, 4) if lookups else None
+        stats['l1_entries'] = len(self.l1) if self.l1 is not None else 0
+        stats['breaker_state'] = self.breaker.state
+        return stats
+    
+    def _serialize(self, value: Any) -> bytes:
+        """Encode a Python object with the configured codec (Decimal/date aware)."""
+        return self.codec.encode(value)
+    
+    def _deserialize(self, value: Union[bytes, str]) -> Any:
+        """Decode a codec frame or a legacy JSON entry."""
+        return self.codec.decode(value)
+    
+    def _get_entry(self, tenant_id: int, module: str, key: str) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        Get (value, generation) from cache (L1 first for L1 modules, then Redis).
+        
+        generation is the module generation seen by Redis, or None if Redis
+        was not consulted.
+        """
+        use_l1 = self._uses_l1(module)
+        if use_l1:
+            self._ensure_listener()
+            value = self.l1.get((tenant_id, module, key))
+            self._record_lookup(module, 'l1', value is not None)
+            if value is not None:
+                return value, None
+        if not self.is_available():
+            return None, None
+        try:
+            started = time.perf_counter()
+            generation, value = self._get_script(
+                keys=[self._generation_key(tenant_id, module)],
+                args=[self._module_prefix(tenant_id, module), key]
+            )
+            self._observe_latency(module, 'get', started)
+            self.breaker.record_success()
+            self._record_lookup(module, 'l2', value is not None)
             if value is None:
-                return None
-            return self._deserialize(value)
-        except (RedisError, json.JSONDecodeError) as e:
+                return None, generation
+            cache_payload_bytes.labels(module=module, operation='get').observe(len(value))
+            result = self._deserialize(value)
+            if use_l1:
+                self._l1_set(tenant_id, module, key, result)
+            return result, generation
+        except (RedisError, CodecError) as e:
+            self._record_error(e, 'get', module)
             logger.warning(f"[CACHE] ✗ Get error: {e}")
-            return None
+            return None, None
     
-    def set(self, tenant_id: int, module: str, key: str, value: Any, ttl: Optional[int] = None) -> bool:
-        """Set value in cache with TTL."""
-        if not self.is_available():
-            return False
+    @staticmethod
+    def _unwrap(value: Any) -> Any:
+        """Return the payload of a memoize envelope, or the value itself."""
+        if isinstance(value, dict) and value.get(_MEMO_MARKER):
+            return value['v']
+        return value
+    
+    def get(self, tenant_id: int, module: str, key: str) -> Optional[Any]:
+        """Get value from cache (one Redis round-trip on L1 miss)."""
+        return self._unwrap(self._get_entry(tenant_id, module, key)[0])
+    
+    def set(self, tenant_id: int, module: str, key: str, value: Any, ttl: Optional[int] = None,
+            generation: Optional[str] = None) -> bool:
+        """
+        Set value in cache with TTL.
+        
+        If generation is given (as returned by a previous read), the value is
+        written under that generation, so it is never visible if the module was
+        invalidated in between. L1 only takes such a value once Redis confirms
+        the generation has not moved.
+        """
+        if ttl is None:
+            ttl = current_app.config.get('CACHE_DEFAULT_TTL', 60)
+        stale = generation is not None
+        stored = False
+        if self.is_available():
+            try:
+                serialized = self._serialize(value)
+                cache_payload_bytes.labels(module=module, operation='set').observe(len(serialized))
+                started = time.perf_counter()
+                written, current = self._set_script(
+                    keys=[self._generation_key(tenant_id, module)],
+                    args=[self._module_prefix(tenant_id, module), key, ttl, serialized, generation or '']
+                )
+                self._observe_latency(module, 'set', started)
+                self.breaker.record_success()
+                stale, stored = written != current, True
+            except (RedisError, TypeError) as e:
+                self._record_error(e, 'set', module)
+                logger.warning(f"[CACHE] ✗ Set error: {e}")
+        if self._uses_l1(module) and not stale:
+            self._l1_set(tenant_id, module, key, value, ttl)
+        return stored
+    
+    # ------------------------------------------------------------------
+    # Batch API: one network hop for a page's whole working set
+    # ------------------------------------------------------------------
+    
+    def _get_many_entries(self, tenant_id: int, keys: Iterable[ItemKey]) -> Tuple[Dict[ItemKey, Any], Dict[ItemKey, str]]:
+        """Batch version of _get_entry: (raw values of hits, generation per key read from Redis)."""
+        found: Dict[ItemKey, Any] = {}
+        generations: Dict[ItemKey, str] = {}
+        pending: List[ItemKey] = []
+        
+        for item in dict.fromkeys(keys):
+            module, key = item
+            if self._uses_l1(module):
+                self._ensure_listener()
+                value = self.l1.get((tenant_id, module, key))
+                self._record_lookup(module, 'l1', value is not None)
+                if value is not None:
+                    found[item] = value
+                    continue
+            pending.append(item)
+        
+        if not pending or not self.is_available():
+            return found, generations
+        
         try:
-            cache_key = self._build_key(tenant_id, module, key)
-            serialized = self._serialize(value)
-            if ttl is None:
-                ttl = current_app.config.get('CACHE_DEFAULT_TTL', 60)
-            self.client.setex(cache_key, ttl, serialized)
-            return True
-        except (RedisError, TypeError) as e:
-            logger.warning(f"[CACHE] ✗ Set error: {e}")
-            return False
+            started = time.perf_counter()
+            flat = self._get_many_script(
+                keys=[self._generation_key(tenant_id, module) for module, _ in pending],
+                args=[part for module, key in pending for part in (self._module_prefix(tenant_id, module), key)]
+            )
+            self._observe_latency('batch', 'get_many', started)
+            self.breaker.record_success()
+        except RedisError as e:
+            self._record_error(e, 'get_many', 'batch')
+            logger.warning(f"[CACHE] ✗ Get many error: {e}")
+            return found, generations
+        
+        for index, item in enumerate(pending):
+            generation, raw = flat[2 * index], flat[2 * index + 1]
+            generations[item] = generation
+            self._record_lookup(item[0], 'l2', raw is not None)
+            if raw is None:
+                continue
+            cache_payload_bytes.labels(module=item[0], operation='get').observe(len(raw))
+            try:
+                value = self._deserialize(raw)
+            except CodecError as e:
+                self._record_error(e, 'get', item[0])
+                logger.warning(f"[CACHE] ✗ Get many decode error for {item}: {e}")
+                continue
+            found[item] = value
+            if self._uses_l1(item[0]):
+                self._l1_set(tenant_id, item[0], item[1], value)
+        return found, generations
+    
+    def get_many(self, tenant_id: int, keys: Iterable[ItemKey]) -> Dict[ItemKey, Any]:
+        """
+        Get several values in one round-trip (single Lua call with MGET).
+        
+        Args:
+            keys: (module, key) pairs; modules may differ
+        
+        Returns:
+            dict {(module, key): value} containing cache hits only
+        """
+        found, _ = self._get_many_entries(tenant_id, keys)
+        return {item: self._unwrap(value) for item, value in found.items()}
+    
+    def set_many(self, tenant_id: int, entries: Iterable[Tuple[str, str, Any, Optional[int]]],
+                 generations: Optional[Dict[ItemKey, str]] = None) -> bool:
+        """
+        Set several values with per-key TTLs in one pipelined round-trip.
+        
+        Args:
+            entries: (module, key, value, ttl) tuples; ttl None uses CACHE_DEFAULT_TTL
+            generations: optional {(module, key): generation} read before loading
+        """
+        default_ttl = current_app.config.get('CACHE_DEFAULT_TTL', 60)
+        generations = generations or {}
+        prepared = [(module, key, value, default_ttl if ttl is None else ttl)
+                    for module, key, value, ttl in entries]
+        # Same L1 rule as set(): values read under a generation wait for Redis
+        stale = [(module, key) in generations for module, key, _, _ in prepared]
+        stored = False
+        
+        if prepared and self.is_available():
+            try:
+                pipeline = self.client.pipeline(transaction=False)
+                for module, key, value, ttl in prepared:
+                    serialized = self._serialize(value)
+                    cache_payload_bytes.labels(module=module, operation='set').observe(len(serialized))
+                    self._set_script(
+                        keys=[self._generation_key(tenant_id, module)],
+                        args=[self._module_prefix(tenant_id, module), key, ttl, serialized,
+                              generations.get((module, key)) or ''],
+                        client=pipeline
+                    )
+                started = time.perf_counter()
+                results = pipeline.execute()
+                self._observe_latency('batch', 'set_many', started)
+                self.breaker.record_success()
+                stale, stored = [written != current for written, current in results], True
+            except (RedisError, TypeError) as e:
+                self._record_error(e, 'set_many', 'batch')
+                logger.warning(f"[CACHE] ✗ Set many error: {e}")
+        
+        for (module, key, value, ttl), is_stale in zip(prepared, stale):
+            if self._uses_l1(module) and not is_stale:
+                self._l1_set(tenant_id, module, key, value, ttl)
+        return stored
+    
+    def memoize_many(self, tenant_id: int, loaders: Dict[ItemKey, Tuple[Callable[[], Any], Optional[int]]]) -> Dict[ItemKey, Any]:
+        """
+        Cache-aside for a working set: one batch read, run loaders for the
+        misses, one pipelined write.
+        
+        Plain cache-aside without single-flight; use memoize for expensive
+        aggregations that need stampede protection.
+        
+        Args:
+            loaders: {(module, key): (loader_fn, ttl)}
+        
+        Returns:
+            dict {(module, key): value} for every requested key
+        """
+        found, generations = self._get_many_entries(tenant_id, loaders.keys())
+        results = {item: self._unwrap(value) for item, value in found.items()}
+        
+        to_store = []
+        for item, (loader_fn, ttl) in loaders.items():
+            if item in results:
+                continue
+            try:
+                value = loader_fn()
+            except Exception as e:
+                logger.exception(f"[CACHE] ✗ Loader error for {item}: {e}")
+                raise
+            results[item] = value
+            to_store.append((item[0], item[1], value, ttl))
+        
+        if to_store:
+            self.set_many(tenant_id, to_store, generations=generations)
+        return results
     
     def delete(self, tenant_id: int, module: str, key: str) -> bool:
         """Delete specific key from cache."""
+        cache_invalidations_total.labels(module=module, scope='key').inc()
+        self._broadcast_invalidation(tenant_id, module, key)
         if not self.is_available():
             return False
         try:
-            cache_key = self._build_key(tenant_id, module, key)
-            self.client.delete(cache_key)
+            self._delete_script(
+                keys=[self._generation_key(tenant_id, module)],
+                args=[self._module_prefix(tenant_id, module), key]
+            )
+            self.breaker.record_success()
             return True
         except RedisError as e:
+            self._record_error(e, 'delete', module)
             logger.warning(f"[CACHE] ✗ Delete error: {e}")
             return False
     
     def delete_pattern(self, tenant_id: int, module: str, pattern: str = "*") -> int:
-        """Delete all keys matching a pattern for a tenant/module."""
+        """
+        Delete all keys matching a pattern for a tenant/module, in every generation.
+        
+        Walks the keyspace with SCAN: meant for maintenance, not hot paths.
+        Use invalidate_module to drop a whole module.
+        """
         if not self.is_available():
             return 0
         try:
-            full_pattern = self._build_key(tenant_id, module, pattern)
+            full_pattern = self._build_key(tenant_id, module, pattern, generation='*')
             deleted_count = 0
             cursor = 0
             while True:
@@ -153,29 +732,222 @@ class CacheService:
                     deleted_count += len(keys)
                 if cursor == 0:
                     break
+            self.breaker.record_success()
             if deleted_count > 0:
                 logger.info(f"[CACHE] INVALIDATE: {full_pattern} ({deleted_count} keys)")
             return deleted_count
         except RedisError as e:
+            self._record_error(e, 'delete_pattern', module)
             logger.warning(f"[CACHE] ✗ Invalidate error: {e}")
             return 0
     
-    def memoize(self, tenant_id: int, module: str, key: str, loader_fn: Callable[[], Any], ttl: Optional[int] = None) -> Any:
-        """Cache-aside pattern: get from cache, or load and cache."""
-        cached = self.get(tenant_id, module, key)
-        if cached is not None:
-            return cached
+    # ------------------------------------------------------------------
+    # Single-flight recomputation
+    # ------------------------------------------------------------------
+    
+    def _lock_key(self, tenant_id: int, module: str, key: str) -> str:
+        return f"{self._module_prefix(tenant_id, module)}:lock:{key}"
+    
+    def _acquire_lock(self, lock_key: str, lease: float) -> Optional[str]:
+        """Try to take the recompute lock (SET NX PX). Returns the owner token."""
+        if not self.is_available():
+            return None
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.client.set(lock_key, token, nx=True, px=int(lease * 1000))
+            self.breaker.record_success()
+            return token if acquired else None
+        except RedisError as e:
+            self._record_error(e, 'lock')
+            logger.warning(f"[CACHE] ✗ Lock error: {e}")
+            return None
+    
+    def _release_lock(self, lock_key: str, token: str) -> None:
+        if not self.is_available():
+            return
+        try:
+            self._unlock_script(keys=[lock_key], args=[token])
+            self.breaker.record_success()
+        except RedisError as e:
+            self._record_error(e, 'unlock')
+            logger.warning(f"[CACHE] ✗ Unlock error: {e}")
+    
+    @staticmethod
+    def _should_refresh(envelope: Dict[str, Any], beta: float) -> bool:
+        """
+        Probabilistic early expiration (XFetch).
+        
+        Refresh when now - delta * beta * ln(rand) >= expiry: the closer to
+        expiry and the slower the loader, the likelier a caller refreshes
+        early, so one request recomputes before everyone misses at once.
+        """
+        now = time.time()
+        if now >= envelope['exp']:
+            return True
+        if beta <= 0:
+            return False
+        return now - envelope.get('delta', 0) * beta * math.log(random.random() or 1e-12) >= envelope['exp']
+    
+    def _load_and_store(self, tenant_id: int, module: str, key: str, loader_fn: Callable[[], Any],
+                        ttl: int, stale_ttl: int, generation: Optional[str]) -> Any:
+        """Run the loader and store its result in a memoize envelope."""
+        started = time.time()
         try:
             value = loader_fn()
-            self.set(tenant_id, module, key, value, ttl)
-            return value
         except Exception as e:
             logger.exception(f"[CACHE] ✗ Loader error: {e}")
             raise
+        envelope = {
+            _MEMO_MARKER: 1,
+            'v': value,
+            'exp': time.time() + ttl,
+            'delta': round(time.time() - started, 4),
+        }
+        self.set(tenant_id, module, key, envelope, ttl + stale_ttl, generation=generation)
+        return value
+    
+    def memoize(self, tenant_id: int, module: str, key: str, loader_fn: Callable[[], Any], ttl: Optional[int] = None,
+                stale_ttl: int = 0, beta: Optional[float] = None) -> Any:
+        """
+        Cache-aside pattern with stampede protection.
+        
+        - Single-flight: on a miss only the caller holding a short Redis lock
+          runs loader_fn; the others wait briefly for its result.
+        - Serve-stale: entries stay in Redis for stale_ttl seconds past their
+          logical expiry; while one caller recomputes, others get the stale value.
+        - Early refresh: with beta > 0, entries are probabilistically refreshed
+          shortly before expiry (XFetch), weighted by how long the loader took.
+        
+        Args:
+            ttl: Logical freshness in seconds (CACHE_DEFAULT_TTL if None)
+            stale_ttl: Extra seconds a stale value may be served during recompute
+            beta: Early refresh aggressiveness (CACHE_EARLY_REFRESH_BETA if None, 0 disables)
+        """
+        if ttl is None:
+            ttl = current_app.config.get('CACHE_DEFAULT_TTL', 60)
+        if beta is None:
+            beta = current_app.config.get('CACHE_EARLY_REFRESH_BETA', 1.0)
+        
+        cached, generation = self._get_entry(tenant_id, module, key)
+        
+        envelope = cached if isinstance(cached, dict) and cached.get(_MEMO_MARKER) else None
+        if cached is not None and envelope is None:
+            return cached  # Plain value written by set()
+        if envelope is not None and not self._should_refresh(envelope, beta):
+            return envelope['v']
+        
+        if not self.is_available():
+            if envelope is not None:
+                return envelope['v']
+            return self._load_and_store(tenant_id, module, key, loader_fn, ttl, stale_ttl, generation)
+        
+        lease = current_app.config.get('CACHE_LOCK_LEASE', 10)
+        lock_key = self._lock_key(tenant_id, module, key)
+        token = self._acquire_lock(lock_key, lease)
+        
+        if token is None:
+            if envelope is not None:
+                # Someone else is recomputing: serve stale
+                return envelope['v']
+            # Miss while someone else recomputes: wait for their result
+            deadline = time.monotonic() + current_app.config.get('CACHE_LOCK_WAIT', 2.0)
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                cached, generation = self._get_entry(tenant_id, module, key)
+                if isinstance(cached, dict) and cached.get(_MEMO_MARKER):
+                    return cached['v']
+                if cached is not None:
+                    return cached
+            logger.info(f"[CACHE] Lock wait timed out for {lock_key}, loading directly")
+            return self._load_and_store(tenant_id, module, key, loader_fn, ttl, stale_ttl, generation)
+        
+        try:
+            return self._load_and_store(tenant_id, module, key, loader_fn, ttl, stale_ttl, generation)
+        finally:
+            self._release_lock(lock_key, token)
     
     def invalidate_module(self, tenant_id: int, module: str) -> int:
-        """Invalidate all cache for a module."""
-        return self.delete_pattern(tenant_id, module, "*")
+        """
+        Invalidate all cache for a module (all tiers, all workers).
+        
+        O(1) regardless of keyspace size: bumps the module generation so
+        existing keys become unreachable and expire by their own TTL.
+        
+        Returns:
+            The new generation, or 0 if Redis is unavailable.
+        """
+        cache_invalidations_total.labels(module=module, scope='module').inc()
+        self._broadcast_invalidation(tenant_id, module)
+        if not self.is_available():
+            return 0
+        try:
+            generation_key = self._generation_key(tenant_id, module)
+            pipeline = self.client.pipeline(transaction=True)
+            pipeline.incr(generation_key)
+            pipeline.expire(generation_key, self._generation_ttl)
+            generation, _ = pipeline.execute()
+            self.breaker.record_success()
+            logger.info(f"[CACHE] INVALIDATE: {generation_key} -> {generation}")
+            return generation
+        except RedisError as e:
+            self._record_error(e, 'invalidate', module)
+            logger.warning(f"[CACHE] ✗ Invalidate error: {e}")
+            return 0
+
+    
+    # ------------------------------------------------------------------
+    # Idempotency reservations (not generation-scoped: survive invalidation)
+    # ------------------------------------------------------------------
+    
+    def _idempotency_key(self, tenant_id: int, scope: str, key: str) -> str:
+        return f"{self._prefix}:tenant:{tenant_id}:idempotency:{scope}:{key}"
+    
+    def reserve_idempotency_key(self, tenant_id: int, scope: str, key: str, marker: str,
+                                ttl: int) -> Tuple[Optional[bool], Optional[str]]:
+        """
+        Atomically reserve a request key (SET NX EX) before doing the work.
+        
+        Returns:
+            (True, None) when reserved, (False, current value) when another
+            request already holds or completed it (value None if it expired
+            in between), (None, None) when Redis is unavailable.
+        """
+        if not self.is_available():
+            return None, None
+        redis_key = self._idempotency_key(tenant_id, scope, key)
+        try:
+            if self.client.set(redis_key, marker, nx=True, ex=ttl):
+                self.breaker.record_success()
+                return True, None
+            current = self.client.get(redis_key)
+            self.breaker.record_success()
+            return False, current.decode('utf-8') if current is not None else None
+        except RedisError as e:
+            self._record_error(e, 'idempotency_reserve', scope)
+            logger.warning(f"[CACHE] ✗ Idempotency reserve error: {e}")
+            return None, None
+    
+    def complete_idempotency_key(self, tenant_id: int, scope: str, key: str, value: str, ttl: int) -> None:
+        """Replace the reservation with the final result (replayed to duplicates for ttl)."""
+        if not self.is_available():
+            return
+        try:
+            self.client.set(self._idempotency_key(tenant_id, scope, key), value, ex=ttl)
+            self.breaker.record_success()
+        except RedisError as e:
+            self._record_error(e, 'idempotency_complete', scope)
+            logger.warning(f"[CACHE] ✗ Idempotency complete error: {e}")
+    
+    def release_idempotency_key(self, tenant_id: int, scope: str, key: str, marker: str) -> None:
+        """Drop the reservation if it is still ours (the work failed, the client may retry)."""
+        if not self.is_available():
+            return
+        try:
+            self._unlock_script(keys=[self._idempotency_key(tenant_id, scope, key)], args=[marker])
+            self.breaker.record_success()
+        except RedisError as e:
+            self._record_error(e, 'idempotency_release', scope)
+            logger.warning(f"[CACHE] ✗ Idempotency release error: {e}")
 
 
 _cache_service: Optional[CacheService] = None
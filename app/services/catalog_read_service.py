@@ -0,0 +1,241 @@
+"""
+Catalog read models - cached category, UOM and product lookup data, paged product list.
+
+The catalog, POS and settings screens only need small, flat projections of
+the master data. They are cached per tenant in the modules already
+invalidated by catalog.invalidate_products_cache and
+settings.invalidate_settings_cache:
+
+- 'categories' -> list
+- 'uom'        -> list
+- 'products'   -> product counts per UOM / category and the barcode / SKU
+                  lookup index used by the POS scanner
+
+Several read models are fetched in one round-trip (CacheService.memoize_many).
+The catalog list itself is NOT cached: it is read one keyset page at a time
+(get_product_page) with fresh stock, so cost is bounded by the page size.
+
+Rows are plain dicts (Jinja attribute access works on them). Lists coming
+from L1 are shared between requests and must not be mutated by callers.
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.models import Product, ProductStock, UOM, Category
+from app.services.cache_service import get_cache
+from app.services.pagination import capped_count, keyset_page
+from app.services.product_search_service import report_search_error, substring_filter
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES_MODULE = 'categories'
+UOM_MODULE = 'uom'
+PRODUCTS_MODULE = 'products'
+
+# Catalog list counts stop here ("more than N products")
+COUNT_CAP = 1000
+
+
+def _load_categories(db_session: Session, tenant_id: int) -> List[Dict[str, Any]]:
+    rows = db_session.query(Category.id, Category.name, Category.created_at).filter(
+        Category.tenant_id == tenant_id
+    ).order_by(Category.name).all()
+    return [{'id': r.id, 'name': r.name, 'created_at': r.created_at} for r in rows]
+
+
+def _load_uoms(db_session: Session, tenant_id: int) -> List[Dict[str, Any]]:
+    rows = db_session.query(UOM.id, UOM.name, UOM.symbol, UOM.created_at).filter(
+        UOM.tenant_id == tenant_id
+    ).order_by(UOM.name).all()
+    return [{'id': r.id, 'name': r.name, 'symbol': r.symbol, 'created_at': r.created_at} for r in rows]
+
+
+def normalize_code(code: str) -> str:
+    """Barcode / SKU lookup key (case-insensitive, surrounding spaces ignored)."""
+    return code.strip().lower()
+
+
+def _load_code_index(db_session: Session, tenant_id: int) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Exact-match index {'barcode': {code: product}, 'sku': {code: product}}.
+
+    Product entries carry id, name, category_id and active. On case-only
+    collisions the lowest id wins, like an ORDER BY id ... LIMIT 1 lookup.
+    """
+    rows = db_session.query(
+        Product.id, Product.name, Product.sku, Product.barcode,
+        Product.category_id, Product.active
+    ).filter(
+        Product.tenant_id == tenant_id,
+        (Product.barcode.isnot(None)) | (Product.sku.isnot(None))
+    ).order_by(Product.id).all()
+
+    index: Dict[str, Dict[str, Dict[str, Any]]] = {'barcode': {}, 'sku': {}}
+    for r in rows:
+        entry = {'id': r.id, 'name': r.name, 'category_id': r.category_id, 'active': r.active}
+        for field, code in (('barcode', r.barcode), ('sku', r.sku)):
+            if code and code.strip():
+                index[field].setdefault(normalize_code(code), entry)
+    return index
+
+
+def _load_counts(column: Any) -> Callable[[Session, int], List[List[int]]]:
+    """Loader for product counts grouped by column, as [id, count] pairs (codec-safe keys)."""
+    def load(db_session: Session, tenant_id: int) -> List[List[int]]:
+        rows = db_session.query(column, func.count(Product.id)).filter(
+            Product.tenant_id == tenant_id, column.isnot(None)
+        ).group_by(column).all()
+        return [[ref_id, count] for ref_id, count in rows]
+    return load
+
+
+# name -> (module, key, loader, ttl config key, default ttl)
+_READ_MODELS: Dict[str, Tuple[str, str, Callable[[Session, int], Any], str, int]] = {
+    'categories': (CATEGORIES_MODULE, 'list', _load_categories, 'CACHE_CATEGORIES_TTL', 300),
+    'uoms': (UOM_MODULE, 'list', _load_uoms, 'CACHE_UOM_TTL', 3600),
+    'uom_counts': (PRODUCTS_MODULE, 'count:uom', _load_counts(Product.uom_id), 'CACHE_PRODUCTS_TTL', 60),
+    'category_counts': (PRODUCTS_MODULE, 'count:category', _load_counts(Product.category_id), 'CACHE_PRODUCTS_TTL', 60),
+    'code_index': (PRODUCTS_MODULE, 'lookup:codes', _load_code_index, 'CACHE_PRODUCT_CODES_TTL', 600),
+}
+
+
+def get_read_models(db_session: Session, tenant_id: int, *names: str) -> Dict[str, Any]:
+    """
+    Get several catalog read models in one cache round-trip.
+
+    Args:
+        names: any of 'categories', 'uoms', 'uom_counts', 'category_counts', 'code_index'
+
+    Returns:
+        dict {name: value}; misses are loaded from PostgreSQL and stored
+    """
+    loaders = {}
+    for name in names:
+        module, key, loader, ttl_key, default_ttl = _READ_MODELS[name]
+        ttl = current_app.config.get(ttl_key, default_ttl)
+        loaders[(module, key)] = ((lambda loader=loader: loader(db_session, tenant_id)), ttl)
+
+    try:
+        values = get_cache().memoize_many(tenant_id, loaders)
+    except RuntimeError as e:
+        logger.debug(f"[CACHE] Catalog read models uncached: {e}")
+        values = {item: loader_fn() for item, (loader_fn, _) in loaders.items()}
+
+    return {name: values[_READ_MODELS[name][:2]] for name in names}
+
+
+def get_categories(db_session: Session, tenant_id: int) -> List[Dict[str, Any]]:
+    """Categories of the tenant ordered by name: id, name, created_at."""
+    return get_read_models(db_session, tenant_id, 'categories')['categories']
+
+
+def get_uoms(db_session: Session, tenant_id: int) -> List[Dict[str, Any]]:
+    """UOMs of the tenant ordered by name: id, name, symbol, created_at."""
+    return get_read_models(db_session, tenant_id, 'uoms')['uoms']
+
+
+def get_categories_with_count(db_session: Session, tenant_id: int) -> List[Tuple[Dict[str, Any], int]]:
+    """(category, product_count) pairs for the settings list."""
+    models = get_read_models(db_session, tenant_id, 'categories', 'category_counts')
+    counts = dict(models['category_counts'])
+    return [(c, counts.get(c['id'], 0)) for c in models['categories']]
+
+
+def get_uoms_with_count(db_session: Session, tenant_id: int) -> List[Tuple[Dict[str, Any], int]]:
+    """(uom, product_count) pairs for the settings list."""
+    models = get_read_models(db_session, tenant_id, 'uoms', 'uom_counts')
+    counts = dict(models['uom_counts'])
+    return [(u, counts.get(u['id'], 0)) for u in models['uoms']]
+
+
+def find_product_by_code(db_session: Session, tenant_id: int, code: str,
+                         fields: Tuple[str, ...] = ('barcode', 'sku')) -> Optional[Dict[str, Any]]:
+    """
+    Exact barcode / SKU lookup from the cached code index.
+
+    The index stays in each worker's L1 for CACHE_PRODUCT_CODES_TTL
+    (CACHE_L1_KEY_TTLS) and is dropped by the products invalidation broadcast.
+
+    Args:
+        fields: index fields to try, in priority order
+
+    Returns:
+        {'id', 'name', 'category_id', 'active'} or None (inactive products included)
+    """
+    key = normalize_code(code)
+    if not key:
+        return None
+    index = get_read_models(db_session, tenant_id, 'code_index')['code_index']
+    for field in fields:
+        entry = index[field].get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def get_product_page(db_session: Session, tenant_id: int, search_query: str = '',
+                     category_id: Optional[int] = None, stock_filter: str = '',
+                     cursor: Optional[str] = None, limit: int = 50,
+                     with_count: bool = False) -> Dict[str, Any]:
+    """
+    One keyset page of the catalog list, ordered by (name, id).
+
+    Only the page rows are read from PostgreSQL (with fresh on_hand_qty);
+    uom / category dicts come from the cached read models.
+
+    Args:
+        stock_filter: '' (all), 'out' (no stock) or 'low' (0 < stock <= minimum)
+        cursor: next_cursor of the previous page (None for the first page)
+        with_count: also return 'total' = capped_count of the filtered rows
+
+    Returns:
+        keyset_page dict whose items are product dicts with image_url, uom and category
+    """
+    on_hand = func.coalesce(ProductStock.on_hand_qty, 0)
+    min_stock = func.coalesce(Product.min_stock_qty, 0)
+    query = db_session.query(
+        Product.id, Product.name, Product.sku, Product.barcode,
+        Product.category_id, Product.uom_id, Product.sale_price,
+        min_stock.label('min_stock_qty'), Product.active, Product.is_unlimited_stock,
+        Product.image_path, on_hand.label('on_hand_qty')
+    ).outerjoin(ProductStock, ProductStock.product_id == Product.id).filter(
+        Product.tenant_id == tenant_id
+    )
+
+    if category_id is not None:
+        query = query.filter(Product.category_id == category_id)
+    if search_query:
+        query = query.filter(substring_filter(db_session, search_query))
+    if stock_filter == 'out':
+        query = query.filter(on_hand <= 0)
+    elif stock_filter == 'low':
+        query = query.filter(min_stock > 0, on_hand > 0, on_hand <= min_stock)
+
+    try:
+        page = keyset_page(query, (Product.name, Product.id), lambda r: (r.name, r.id), cursor, limit)
+    except DBAPIError as e:
+        if search_query:
+            report_search_error(e)
+        raise
+
+    models = get_read_models(db_session, tenant_id, 'uoms', 'categories')
+    uoms = {u['id']: u for u in models['uoms']}
+    categories = {c['id']: c for c in models['categories']}
+    page['items'] = [
+        dict(
+            row._asdict(),
+            image_url=Product.public_url_for(row.image_path),
+            uom=uoms.get(row.uom_id),
+            category=categories.get(row.category_id),
+        )
+        for row in page['items']
+    ]
+    if with_count:
+        page['total'] = capped_count(query, COUNT_CAP)
+    return page
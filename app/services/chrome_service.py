@@ -0,0 +1,120 @@
+"""
+Layout chrome service - per-tenant bundle rendered by base.html.
+
+The sidebar needs invoice alert counts, the tenant name and the logo URL.
+They are computed once per tenant, cached until midnight (due-date counts
+change with the calendar day) and exposed to templates lazily, so HTMX
+fragments that never touch the chrome do not pay for it.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+
+from flask import current_app, g
+from sqlalchemy.orm import Session
+from werkzeug.local import LocalProxy
+
+from app.models import Tenant
+from app.services.cache_service import get_cache
+from app.services.invoice_alerts_service import get_invoice_alert_counts
+
+logger = logging.getLogger(__name__)
+
+CHROME_MODULE = 'chrome'
+
+EMPTY_ALERTS = {'due_tomorrow_count': 0, 'overdue_count': 0, 'total_critical': 0}
+
+
+def _seconds_until_midnight(now: Optional[datetime] = None) -> int:
+    """Seconds left in the current day (at least 1)."""
+    now = now or datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return max(1, int((midnight - now).total_seconds()))
+
+
+def _build_chrome(db_session: Session, tenant_id: int, today: date) -> Dict[str, Any]:
+    """Compute the chrome bundle from PostgreSQL."""
+    from app.services.storage_service import get_storage_service
+
+    tenant = db_session.query(Tenant).filter_by(id=tenant_id).first()
+    if not tenant:
+        return {'invoice_alerts': dict(EMPTY_ALERTS), 'tenant': None, 'logo_public_url': None}
+
+    logo_public_url = None
+    if tenant.logo_url:
+        logo_public_url = get_storage_service().get_public_url(tenant.logo_url)
+
+    return {
+        'invoice_alerts': get_invoice_alert_counts(db_session, today, tenant_id=tenant_id),
+        'tenant': {'id': tenant.id, 'name': tenant.name, 'logo_url': tenant.logo_url},
+        'logo_public_url': logo_public_url,
+    }
+
+
+def get_layout_chrome(db_session: Session, tenant_id: int) -> Dict[str, Any]:
+    """
+    Get the layout chrome bundle for a tenant (cache-aside).
+
+    The key embeds today's date and the TTL never crosses midnight,
+    so due-tomorrow/overdue counts roll over with the day.
+
+    Returns:
+        dict with invoice_alerts, tenant (id, name, logo_url) and logo_public_url
+    """
+    today = date.today()
+    cache_key = f"bundle:{today.isoformat()}"
+
+    try:
+        cache = get_cache()
+        cached = cache.get(tenant_id, CHROME_MODULE, cache_key)
+        if cached is not None:
+            return cached
+    except Exception as e:
+        logger.debug(f"[CACHE] Chrome error (continuing): {e}")
+
+    chrome = _build_chrome(db_session, tenant_id, today)
+
+    try:
+        ttl = min(current_app.config.get('CACHE_CHROME_TTL', 300), _seconds_until_midnight())
+        get_cache().set(tenant_id, CHROME_MODULE, cache_key, chrome, ttl=ttl)
+    except Exception as e:
+        logger.debug(f"[CACHE] Chrome save error: {e}")
+
+    return chrome
+
+
+def invalidate_layout_chrome(tenant_id: int) -> None:
+    """Invalidate the chrome bundle (invoice create/pay/edit/delete, logo upload)."""
+    try:
+        get_cache().invalidate_module(tenant_id, CHROME_MODULE)
+    except Exception:
+        pass  # Graceful degradation
+
+
+def _request_chrome() -> Dict[str, Any]:
+    """Chrome bundle for the current request, computed at most once."""
+    if '_layout_chrome' not in g:
+        chrome = {'invoice_alerts': dict(EMPTY_ALERTS), 'tenant': None, 'logo_public_url': None}
+        if g.get('user') and g.get('tenant_id'):
+            try:
+                from app.database import get_session
+                chrome = get_layout_chrome(get_session(), g.tenant_id)
+            except Exception as e:
+                current_app.logger.warning(f"Error loading layout chrome: {e}")
+        g._layout_chrome = chrome
+    return g._layout_chrome
+
+
+def chrome_context() -> Dict[str, Any]:
+    """
+    Template context for the layout chrome.
+
+    Values are LocalProxy objects: nothing is loaded until a template
+    actually reads invoice_alerts, current_tenant or logo_public_url.
+    """
+    return {
+        'invoice_alerts': LocalProxy(lambda: _request_chrome()['invoice_alerts']),
+        'current_tenant': LocalProxy(lambda: _request_chrome()['tenant']),
+        'logo_public_url': LocalProxy(lambda: _request_chrome()['logo_public_url']),
+    }
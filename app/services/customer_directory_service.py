@@ -0,0 +1,157 @@
+"""
+Customer directory - cached per-tenant customer list for the POS typeahead.
+
+The POS customer selector searches on every keystroke. Instead of a
+lower(col) LIKE '%q%' query per keystroke, the tenant's customers are cached
+once as compact rows [id, name, tax_id, phone, name_key, search_key] (module
+'customers', also kept in L1) and filtered in memory: name prefix matches
+first, then word prefix matches, then substring matches on name / tax_id /
+phone, each in name order.
+
+Tenants with more than CUSTOMER_DIRECTORY_MAX_ROWS customers are not cached;
+their searches go to PostgreSQL, served by the idx_customer_search_trgm GIN
+trigram index (db/migrations/20261017_customer_search_index.sql). Both paths
+are case and accent insensitive: the index expression applies
+immutable_unaccent(lower(...)) and the query is normalized with normalize_text.
+
+The directory is invalidated on customer create / update / delete
+(invalidate_customer_directory).
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import func, literal_column
+from sqlalchemy.orm import Session
+
+from app.models import Customer
+from app.services.cache_service import get_cache
+from app.services.product_search_service import MAX_QUERY_LENGTH, normalize_text
+
+logger = logging.getLogger(__name__)
+
+CUSTOMERS_MODULE = 'customers'
+
+DEFAULT_MAX_ROWS = 5000
+
+# Must match the idx_customer_search_trgm index expression
+_SEP = literal_column("' '")
+_EMPTY = literal_column("''")
+SEARCH_DOCUMENT = func.immutable_unaccent(func.lower(
+    Customer.name + _SEP + func.coalesce(Customer.tax_id, _EMPTY) + _SEP + func.coalesce(Customer.phone, _EMPTY)
+))
+_NAME_DOCUMENT = func.immutable_unaccent(func.lower(Customer.name))
+
+# Compact row layout
+_ID, _NAME, _TAX_ID, _PHONE, _NAME_KEY, _KEY = range(6)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _to_result(row: List[Any]) -> Dict[str, Any]:
+    return {'id': row[_ID], 'name': row[_NAME], 'tax_id': row[_TAX_ID], 'phone': row[_PHONE]}
+
+
+def _load_directory(db_session: Session, tenant_id: int, max_rows: int) -> Dict[str, Any]:
+    """
+    Directory rows ordered by name, or {'rows': None} above max_rows
+    (the "too large" decision is cached too).
+    """
+    rows = db_session.query(Customer.id, Customer.name, Customer.tax_id, Customer.phone).filter(
+        Customer.tenant_id == tenant_id
+    ).order_by(Customer.name, Customer.id).limit(max_rows + 1).all()
+
+    if len(rows) > max_rows:
+        return {'rows': None}
+    return {'rows': [
+        [r.id, r.name, r.tax_id, r.phone, normalize_text(r.name),
+         normalize_text(' '.join(v for v in (r.name, r.tax_id, r.phone) if v))]
+        for r in rows
+    ]}
+
+
+def get_directory(db_session: Session, tenant_id: int) -> Optional[List[List[Any]]]:
+    """
+    Cached directory rows of the tenant (shared, do not mutate).
+
+    Returns:
+        list of [id, name, tax_id, phone, name_key, search_key] ordered by name, or None
+        when the tenant is above CUSTOMER_DIRECTORY_MAX_ROWS
+    """
+    max_rows = current_app.config.get('CUSTOMER_DIRECTORY_MAX_ROWS', DEFAULT_MAX_ROWS)
+    ttl = current_app.config.get('CACHE_CUSTOMERS_TTL', 600)
+
+    try:
+        directory = get_cache().memoize(tenant_id, CUSTOMERS_MODULE, 'directory',
+                                        lambda: _load_directory(db_session, tenant_id, max_rows), ttl=ttl)
+    except RuntimeError as e:
+        logger.debug(f"[CACHE] Customer directory uncached: {e}")
+        directory = _load_directory(db_session, tenant_id, max_rows)
+    return directory['rows']
+
+
+def filter_directory(rows: List[List[Any]], query: str, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    In-memory search, ranked: names starting with the query, then names with
+    a word starting with it, then other matches on name, tax_id or phone.
+    Each group keeps the directory's name order.
+    """
+    needle = normalize_text(query[:MAX_QUERY_LENGTH])
+    if not needle:
+        return [_to_result(r) for r in rows[:limit]]
+
+    starts, word_starts, contains = [], [], []
+    word_prefix = ' ' + needle
+    for row in rows:
+        if needle not in row[_KEY]:
+            continue
+        name_key = row[_NAME_KEY]
+        if name_key.startswith(needle):
+            starts.append(row)
+            if len(starts) == limit:
+                break
+        elif word_prefix in name_key:
+            if len(word_starts) < limit:
+                word_starts.append(row)
+        elif len(contains) < limit:
+            contains.append(row)
+
+    return [_to_result(r) for r in (starts + word_starts + contains)[:limit]]
+
+
+def _search_database(db_session: Session, tenant_id: int, query: str, limit: int) -> List[Dict[str, Any]]:
+    """Trigram-indexed fallback for tenants too large to cache."""
+    db_query = db_session.query(Customer.id, Customer.name, Customer.tax_id, Customer.phone).filter(
+        Customer.tenant_id == tenant_id
+    )
+    needle = normalize_text(query[:MAX_QUERY_LENGTH])
+    if needle:
+        escaped = _escape_like(needle)
+        db_query = db_query.filter(SEARCH_DOCUMENT.like(f'%{escaped}%', escape='\\')).order_by(
+            _NAME_DOCUMENT.like(f'{escaped}%', escape='\\').desc()
+        )
+    rows = db_query.order_by(Customer.name, Customer.id).limit(limit).all()
+    return [{'id': r.id, 'name': r.name, 'tax_id': r.tax_id, 'phone': r.phone} for r in rows]
+
+
+def search_customers(db_session: Session, tenant_id: int, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Typeahead search: id, name, tax_id, phone of up to limit customers.
+
+    An empty query returns the first customers by name ("show all on focus").
+    """
+    rows = get_directory(db_session, tenant_id)
+    if rows is None:
+        return _search_database(db_session, tenant_id, query, limit)
+    return filter_directory(rows, query, limit)
+
+
+def invalidate_customer_directory(tenant_id: int) -> None:
+    """Invalidate the directory (customer create / update / delete / quick create)."""
+    try:
+        get_cache().invalidate_module(tenant_id, CUSTOMERS_MODULE)
+    except Exception:
+        pass  # Graceful degradation
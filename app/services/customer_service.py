@@ -1,7 +1,15 @@
 """Customer service for default customer management."""
+import logging
+from typing import Any, Dict
+
+from flask import current_app
 from app.models import Customer
 from sqlalchemy.exc import IntegrityError
 from app.exceptions import BusinessLogicError
+from app.services.cache_service import get_cache
+from app.services.customer_directory_service import CUSTOMERS_MODULE, invalidate_customer_directory
+
+logger = logging.getLogger(__name__)
 
 
 def get_or_create_default_customer_id(session, tenant_id: int) -> int:
@@ -57,3 +65,41 @@ def get_or_create_default_customer_id(session, tenant_id: int) -> int:
         
         # This should never happen, but handle it gracefully
         raise BusinessLogicError(f'No se pudo crear o recuperar el cliente por defecto para el negocio {tenant_id}')
+
+
+def get_default_customer(session, tenant_id: int) -> Dict[str, Any]:
+    """
+    Get the default customer of a tenant as {'id', 'name'} (cached).
+    
+    Cached in the 'customers' module, so invalidate_customer_directory also
+    drops it. If the tenant has no default customer yet it is created and
+    committed: call before any other pending write in the request.
+    """
+    try:
+        cached = get_cache().get(tenant_id, CUSTOMERS_MODULE, 'default')
+        if cached is not None:
+            return cached
+    except Exception as e:
+        logger.debug(f"[CACHE] Default customer error (continuing): {e}")
+    
+    customer = session.query(Customer.id, Customer.name).filter(
+        Customer.tenant_id == tenant_id,
+        Customer.is_default == True
+    ).first()
+    
+    if customer is None:
+        get_or_create_default_customer_id(session, tenant_id)
+        session.commit()
+        invalidate_customer_directory(tenant_id)
+        customer = session.query(Customer.id, Customer.name).filter(
+            Customer.tenant_id == tenant_id,
+            Customer.is_default == True
+        ).one()
+    
+    default = {'id': customer.id, 'name': customer.name}
+    try:
+        get_cache().set(tenant_id, CUSTOMERS_MODULE, 'default', default,
+                        ttl=current_app.config.get('CACHE_CUSTOMERS_TTL', 600))
+    except Exception as e:
+        logger.debug(f"[CACHE] Default customer save error: {e}")
+    return default
@@ -0,0 +1,94 @@
+"""
+Idempotency service - Redis reservation of request keys before any DB work.
+
+Forms that create money movements (POS sale confirmation, purchase invoice
+payments, customer debt payments) submit an idempotency key. The key is
+reserved in Redis with SET NX and a short lease before the transaction
+starts, so a double submit never reaches the stock locks:
+
+- first request: runs the work, then stores the result id for
+  IDEMPOTENCY_RESULT_TTL
+- duplicate after completion: gets the original result id back immediately
+- duplicate while the first is still running: DuplicateRequestError (409)
+- the work fails: the reservation is released so the user can retry
+
+When Redis is unavailable (or the lease expires before the work completes)
+the database is the fallback: sale.idempotency_key,
+purchase_invoice_payment.idempotency_key and payment_log.idempotency_key are
+unique, and the payment services return the payment already stored under the
+key instead of registering it again.
+"""
+
+import logging
+import uuid
+from typing import Callable, Optional
+
+from flask import current_app
+
+from app.exceptions import DuplicateRequestError
+from app.services.cache_service import get_cache
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 64
+
+_PENDING = 'pending:'
+_DONE = 'done:'
+
+
+def new_idempotency_key() -> str:
+    """Key for a server-rendered form (one per render, shared by its resubmits)."""
+    return uuid.uuid4().hex
+
+
+def normalize_idempotency_key(key: Optional[str]) -> Optional[str]:
+    """Submitted key as stored in Redis and in the idempotency_key columns (None if empty)."""
+    return (key or '').strip()[:MAX_KEY_LENGTH] or None
+
+
+def run_idempotent(tenant_id: int, scope: str, key: Optional[str], work: Callable[[], int]) -> int:
+    """
+    Run work once per (tenant, scope, key).
+
+    Args:
+        scope: kind of operation, e.g. 'sale' or 'invoice_payment'
+        key: client-generated idempotency key (None / empty: no protection)
+        work: runs and commits the operation, returns the id of what it created
+
+    Returns:
+        the id returned by work, or by the first request with the same key
+
+    Raises:
+        DuplicateRequestError: the same key is still being processed
+    """
+    key = normalize_idempotency_key(key)
+    if not key:
+        return work()
+
+    try:
+        cache = get_cache()
+    except RuntimeError:
+        return work()
+
+    marker = f'{_PENDING}{uuid.uuid4().hex}'
+    reserved, current = cache.reserve_idempotency_key(
+        tenant_id, scope, key, marker, current_app.config.get('IDEMPOTENCY_PENDING_TTL', 60)
+    )
+    if reserved is None:
+        logger.debug(f"[IDEMPOTENCY] Redis unavailable, {scope} {key} unguarded")
+        return work()
+    if not reserved:
+        if current and current.startswith(_DONE):
+            logger.info(f"[IDEMPOTENCY] Duplicate {scope} {key}: replaying {current}")
+            return int(current[len(_DONE):])
+        raise DuplicateRequestError()
+
+    try:
+        result = work()
+    except BaseException:
+        cache.release_idempotency_key(tenant_id, scope, key, marker)
+        raise
+
+    cache.complete_idempotency_key(tenant_id, scope, key, f'{_DONE}{result}',
+                                   current_app.config.get('IDEMPOTENCY_RESULT_TTL', 86400))
+    return result
@@ -0,0 +1,217 @@
+"""
+Invoice search service - structured search for the purchase invoice list.
+
+The search box accepts a single term that is classified before querying:
+
+- date ("15/03/2026", "2026-03-15", "03/2026"): invoice_date or due_date
+  range, served by the (tenant_id, invoice_date / due_date) indexes
+- amount ("1.234,56", "$ 1234", "1234.5"): total_amount range covering the
+  typed precision ("1234" matches 1234,00 - 1234,99); digit-only terms also
+  match the invoice number
+- status keyword ("pendiente", "pagada", "parcial", "vencida")
+- free text: invoice number or supplier name substring, served by the
+  lower(...) trigram GIN indexes (db/migrations/20261017_invoice_search_indexes.sql)
+
+No column is cast to text, so every predicate is sargable.
+"""
+
+import re
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, func, literal_column, or_, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.models import InvoiceStatus, PurchaseInvoice, Supplier
+from app.services.invoice_alerts_service import is_invoice_overdue
+from app.services.pagination import capped_count, keyset_page
+from app.services.product_search_service import MAX_QUERY_LENGTH, normalize_text
+from app.utils.number_format import parse_ar_number
+
+# Invoices without due date sort last; must match idx_invoice_tenant_due_order
+NO_DUE_DATE = date(9999, 12, 31)
+_DUE_SORT = func.coalesce(PurchaseInvoice.due_date, literal_column("'9999-12-31'"))
+
+# Sort key: due date ascending (nulls last), newest invoice first
+_SORT_COLUMNS = (_DUE_SORT, -PurchaseInvoice.id)
+
+COUNT_CAP = 1000
+
+STATUS_KEYWORDS = {
+    'pendiente': 'PENDING', 'pendientes': 'PENDING', 'pending': 'PENDING',
+    'parcial': 'PARTIALLY_PAID', 'parciales': 'PARTIALLY_PAID', 'partially_paid': 'PARTIALLY_PAID',
+    'pagada': 'PAID', 'pagadas': 'PAID', 'pagado': 'PAID', 'pagados': 'PAID', 'paid': 'PAID',
+    'vencida': 'OVERDUE', 'vencidas': 'OVERDUE', 'caducada': 'OVERDUE', 'caducadas': 'OVERDUE',
+    'overdue': 'OVERDUE',
+}
+
+_DAY_PATTERN = re.compile(r'^(\d{1,2})[/.-](\d{1,2})[/.-](\d{2}|\d{4})$')
+_ISO_DAY_PATTERN = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})$')
+_MONTH_PATTERN = re.compile(r'^(\d{1,2})[/-](\d{4})$')
+_AMOUNT_PATTERN = re.compile(r'^\$?\s*([\d.,]+)$')
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def parse_date_term(term: str) -> Optional[Dict[str, date]]:
+    """[start, end) date range for a day or month term, None if not a date."""
+    try:
+        match = _DAY_PATTERN.match(term)
+        if match:
+            day, month, year = (int(g) for g in match.groups())
+            if year < 100:
+                year += 2000
+            start = date(year, month, day)
+            return {'start': start, 'end': start + timedelta(days=1)}
+
+        match = _ISO_DAY_PATTERN.match(term)
+        if match:
+            start = date(*(int(g) for g in match.groups()))
+            return {'start': start, 'end': start + timedelta(days=1)}
+
+        match = _MONTH_PATTERN.match(term)
+        if match:
+            month, year = int(match.group(1)), int(match.group(2))
+            start = date(year, month, 1)
+            end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+            return {'start': start, 'end': end}
+    except ValueError:
+        return None  # 31/02/2026, 13/2026...
+    return None
+
+
+def parse_amount_term(term: str) -> Optional[Dict[str, Decimal]]:
+    """[min, max) amount range covering the typed precision, None if not an amount."""
+    match = _AMOUNT_PATTERN.match(term)
+    if not match:
+        return None
+    try:
+        value = parse_ar_number(match.group(1))
+    except ValueError:
+        return None
+    step = Decimal(1).scaleb(min(value.as_tuple().exponent, 0))
+    return {'min': value, 'max': value + step}
+
+
+def parse_invoice_query(raw: str) -> Optional[Dict[str, Any]]:
+    """
+    Classify a search term.
+
+    Returns:
+        None for an empty term, else a dict with 'kind' and its values:
+        {'kind': 'date', 'start', 'end'}, {'kind': 'amount', 'min', 'max', 'number'},
+        {'kind': 'status', 'status'} or {'kind': 'text', 'text'}
+    """
+    term = ' '.join(raw[:MAX_QUERY_LENGTH].split())
+    if not term:
+        return None
+
+    status = STATUS_KEYWORDS.get(normalize_text(term))
+    if status:
+        return {'kind': 'status', 'status': status}
+
+    date_range = parse_date_term(term)
+    if date_range:
+        return {'kind': 'date', **date_range}
+
+    amount_range = parse_amount_term(term)
+    if amount_range:
+        # Invoice numbers are often plain digits
+        return {'kind': 'amount', **amount_range, 'number': term if term.isdigit() else None}
+
+    return {'kind': 'text', 'text': term}
+
+
+def _text_filter(tenant_id: int, text: str) -> Any:
+    pattern = f'%{_escape_like(text.lower())}%'
+    supplier_ids = select(Supplier.id).where(
+        Supplier.tenant_id == tenant_id,
+        func.lower(Supplier.name).like(pattern, escape='\\')
+    )
+    return or_(
+        func.lower(PurchaseInvoice.invoice_number).like(pattern, escape='\\'),
+        PurchaseInvoice.supplier_id.in_(supplier_ids)
+    )
+
+
+def search_filter(tenant_id: int, parsed: Dict[str, Any], today: Optional[date] = None) -> Any:
+    """WHERE clause for a parse_invoice_query result."""
+    kind = parsed['kind']
+
+    if kind == 'status':
+        if parsed['status'] == 'OVERDUE':
+            # Same rule as is_invoice_overdue
+            return and_(
+                PurchaseInvoice.status == InvoiceStatus.PENDING,
+                PurchaseInvoice.due_date < (today or date.today())
+            )
+        return PurchaseInvoice.status == InvoiceStatus[parsed['status']]
+
+    if kind == 'date':
+        start, end = parsed['start'], parsed['end']
+        return or_(
+            and_(PurchaseInvoice.invoice_date >= start, PurchaseInvoice.invoice_date < end),
+            and_(PurchaseInvoice.due_date >= start, PurchaseInvoice.due_date < end)
+        )
+
+    if kind == 'amount':
+        clause = and_(PurchaseInvoice.total_amount >= parsed['min'], PurchaseInvoice.total_amount < parsed['max'])
+        if parsed['number']:
+            clause = or_(clause, _text_filter(tenant_id, parsed['number']))
+        return clause
+
+    return _text_filter(tenant_id, parsed['text'])
+
+
+def get_invoice_page(db_session: Session, tenant_id: int, search_query: str = '',
+                     supplier_id: Optional[int] = None, status: str = '',
+                     due_soon: bool = False, overdue: bool = False,
+                     cursor: Optional[str] = None, limit: int = 50,
+                     with_count: bool = False) -> Dict[str, Any]:
+    """
+    One page of purchase invoices, by due date (no due date last), newest first.
+
+    Args:
+        search_query: term classified by parse_invoice_query
+        cursor: next_cursor of the previous page
+        with_count: also return 'total' = capped_count of the filtered rows
+
+    Returns:
+        keyset_page dict (plus 'total'); items carry is_overdue
+    """
+    today = date.today()
+    query = db_session.query(PurchaseInvoice).options(joinedload(PurchaseInvoice.supplier)).filter(
+        PurchaseInvoice.tenant_id == tenant_id
+    )
+
+    if supplier_id:
+        query = query.filter(PurchaseInvoice.supplier_id == supplier_id)
+    if status in InvoiceStatus.__members__:
+        query = query.filter(PurchaseInvoice.status == InvoiceStatus[status])
+    if due_soon:
+        query = query.filter(
+            PurchaseInvoice.status == InvoiceStatus.PENDING,
+            PurchaseInvoice.due_date == today + timedelta(days=1)
+        )
+    if overdue:
+        query = query.filter(
+            PurchaseInvoice.status == InvoiceStatus.PENDING,
+            PurchaseInvoice.due_date < today
+        )
+
+    parsed = parse_invoice_query(search_query)
+    if parsed:
+        query = query.filter(search_filter(tenant_id, parsed, today))
+
+    page = keyset_page(query, _SORT_COLUMNS,
+                       lambda i: (i.due_date or NO_DUE_DATE, -i.id), cursor, limit)
+
+    for invoice in page['items']:
+        invoice.is_overdue = is_invoice_overdue(invoice, today)
+
+    if with_count:
+        page['total'] = capped_count(query, COUNT_CAP)
+    return page
@@ -11,6 +11,8 @@ from app.models import (
     InvoiceStatus, StockMoveType, StockReferenceType
 )
 from app.exceptions import BusinessLogicError, NotFoundError
+from app.services.bulk_write import bulk_insert
+from app.services.chrome_service import invalidate_layout_chrome
 
 
 def create_invoice_with_lines(payload: Dict[str, Any], session: Session) -> int:
@@ -121,22 +123,20 @@ def create_invoice_with_lines(payload: Dict[str, Any], session: Session) -> int:
         session.flush()
 
         for l in validated_lines:
-            # Invoice Line
-            session.add(PurchaseInvoiceLine(
-                invoice_id=invoice.id, product_id=l['product_id'],
-                qty=l['qty'], unit_cost=l['unit_cost'], line_total=l['line_total']
-            ))
-            
             # Update product cost
             l['product'].cost = l['unit_cost']
-            
-            # Stock line
-            session.add(StockMoveLine(
-                stock_move_id=stock_move.id, product_id=l['product_id'],
-                qty=l['qty'], uom_id=l['product'].uom_id, unit_cost=l['unit_cost']
-            ))
+
+        bulk_insert(session, PurchaseInvoiceLine, [{
+            'invoice_id': invoice.id, 'product_id': l['product_id'],
+            'qty': l['qty'], 'unit_cost': l['unit_cost'], 'line_total': l['line_total']
+        } for l in validated_lines])
+        bulk_insert(session, StockMoveLine, [{
+            'stock_move_id': stock_move.id, 'product_id': l['product_id'],
+            'qty': l['qty'], 'uom_id': l['product'].uom_id, 'unit_cost': l['unit_cost']
+        } for l in validated_lines])
 
         session.commit()
+        invalidate_layout_chrome(tenant_id)
         return invoice.id
         
     except (BusinessLogicError, NotFoundError) as e:
@@ -0,0 +1,137 @@
+"""
+Ledger history service - paginated and streamed finance_ledger reads.
+
+finance_ledger grows with every sale and payment, so the list view never
+materialises the full filtered result:
+
+- get_ledger_page: keyset page on (datetime, id), newest first, served by
+  idx_ledger_tenant_datetime
+- get_period_totals: count / sum(amount) per type aggregated in PostgreSQL
+- iter_ledger_entries: server-side cursor (stream_results) yielding rows in
+  chunks, for the streamed HTML / CSV export
+"""
+
+import csv
+import io
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+
+from app.models import FinanceLedger, LedgerType
+from app.services.pagination import keyset_page
+
+STREAM_CHUNK_SIZE = 500
+
+# Filter value -> stored payment_method
+PAYMENT_METHOD_FILTERS = {
+    'cash': 'CASH',
+    'transfer': 'TRANSFER',
+    'card': 'CARD',
+    'cuenta_corriente': 'CUENTA_CORRIENTE',
+}
+
+
+def build_ledger_query(db_session: Session, tenant_id: int, entry_type: str = '', method: str = 'all',
+                       start: Optional[date] = None, end: Optional[date] = None) -> Query:
+    """
+    Filtered finance_ledger query (tenant-scoped, unordered).
+
+    Args:
+        entry_type: 'INCOME', 'EXPENSE', 'INVOICE' or '' (all)
+        method: 'all' or a PAYMENT_METHOD_FILTERS key
+        start, end: inclusive date range
+    """
+    query = db_session.query(FinanceLedger).filter(FinanceLedger.tenant_id == tenant_id)
+
+    if entry_type in LedgerType.__members__:
+        query = query.filter(FinanceLedger.type == LedgerType[entry_type])
+    if method in PAYMENT_METHOD_FILTERS:
+        query = query.filter(FinanceLedger.payment_method == PAYMENT_METHOD_FILTERS[method])
+    if start:
+        query = query.filter(FinanceLedger.datetime >= datetime.combine(start, time.min))
+    if end:
+        query = query.filter(FinanceLedger.datetime < datetime.combine(end + timedelta(days=1), time.min))
+    return query
+
+
+def get_ledger_page(query: Query, cursor: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+    """One newest-first keyset page of a build_ledger_query query."""
+    return keyset_page(query, (FinanceLedger.datetime, FinanceLedger.id),
+                       lambda e: (e.datetime, e.id), cursor, limit, descending=True)
+
+
+def get_period_totals(query: Query) -> Dict[str, Any]:
+    """
+    Totals of the whole filtered period, aggregated in SQL.
+
+    Returns:
+        {'count', 'by_type': {type name: {'count', 'amount'}}, 'net'} where
+        net = INCOME - EXPENSE (INVOICE entries are accrual, not cash)
+    """
+    rows = query.order_by(None).with_entities(
+        FinanceLedger.type, func.count(FinanceLedger.id), func.coalesce(func.sum(FinanceLedger.amount), 0)
+    ).group_by(FinanceLedger.type).all()
+
+    by_type = {t.name: {'count': 0, 'amount': Decimal('0')} for t in LedgerType}
+    for entry_type, count, amount in rows:
+        by_type[entry_type.name] = {'count': count, 'amount': Decimal(str(amount))}
+
+    return {
+        'count': sum(v['count'] for v in by_type.values()),
+        'by_type': by_type,
+        'net': by_type['INCOME']['amount'] - by_type['EXPENSE']['amount'],
+    }
+
+
+def iter_ledger_entries(query: Query, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[FinanceLedger]:
+    """
+    Entries newest first through a server-side cursor, chunk_size rows at a time.
+
+    Worker memory stays bounded by the chunk size whatever the date range.
+    """
+    # 2.0-style execution: legacy Query iteration uniques ORM rows, which
+    # is incompatible with yield_per
+    statement = query.order_by(FinanceLedger.datetime.desc(), FinanceLedger.id.desc()).statement
+    yield from query.session.scalars(statement, execution_options={'stream_results': True,
+                                                                   'yield_per': chunk_size})
+
+
+CSV_HEADER = ['id', 'fecha', 'tipo', 'metodo', 'monto', 'origen', 'ref_id', 'categoria', 'notas']
+
+# Leading characters that make spreadsheet apps evaluate a cell as a formula
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_text(value: Optional[str]) -> str:
+    """Free-text cell, quoted with ' when it would be read as a formula."""
+    value = value or ''
+    return f"'{value}" if value.startswith(CSV_FORMULA_PREFIXES) else value
+
+
+def iter_ledger_csv(query: Query, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """CSV export of the entries, yielded in chunks of chunk_size lines."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    buffer.write('\ufeff')  # UTF-8 BOM so spreadsheet apps detect the encoding
+    writer.writerow(CSV_HEADER)
+    for i, entry in enumerate(iter_ledger_entries(query, chunk_size), start=1):
+        writer.writerow([
+            entry.id,
+            entry.datetime.isoformat(sep=' ', timespec='seconds'),
+            entry.type.value,
+            entry.payment_method,
+            entry.amount,
+            entry.reference_type.value,
+            entry.reference_id or '',
+            _csv_text(entry.category),
+            _csv_text(entry.notes),
+        ])
+        if i % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,109 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Pages are fetched with WHERE (k1, k2) > (:v1, :v2) ORDER BY k1, k2 LIMIT n+1
+instead of OFFSET, so every page costs the same index range scan no matter
+how deep the user scrolls. The sort key must be unique (end it with the
+primary key).
+
+Cursors are opaque URL-safe tokens holding the sort key of the last row of
+the previous page. Invalid or tampered cursors decode to None (first page).
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Query
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'n': str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        if 'n' in value:
+            return Decimal(value['n'])
+        raise ValueError(f"Unknown cursor value: {value}")
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor token for a sort key."""
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: Optional[str], size: int) -> Optional[List[Any]]:
+    """Sort key from a cursor token; None if missing or invalid."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = [_decode_value(v) for v in json.loads(raw)]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    return values if len(values) == size else None
+
+
+def keyset_page(query: Query, columns: Sequence[Any], key: Callable[[Any], Sequence[Any]],
+                cursor: Optional[str], limit: int, descending: bool = False) -> Dict[str, Any]:
+    """
+    Fetch one page of query ordered by columns.
+
+    Args:
+        columns: unique sort key columns (e.g. Product.name, Product.id)
+        key: extracts the sort key values from a result row
+        cursor: token returned as next_cursor by the previous page
+        descending: newest-first pages (all columns DESC)
+
+    Returns:
+        dict with items, next_cursor (None on the last page) and has_more
+    """
+    after = decode_cursor(cursor, len(columns))
+    if after is not None:
+        row_key, after_key = tuple_(*columns), tuple_(*after)
+        # The redundant leading-column bound lets an index on a prefix of the
+        # sort key (e.g. (tenant_id, datetime)) serve the range scan.
+        if descending:
+            query = query.filter(columns[0] <= after[0], row_key < after_key)
+        else:
+            query = query.filter(columns[0] >= after[0], row_key > after_key)
+
+    order = [c.desc() for c in columns] if descending else list(columns)
+    rows = query.order_by(*order).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    items = rows[:limit]
+
+    return {
+        'items': items,
+        'next_cursor': encode_cursor(key(items[-1])) if has_more else None,
+        'has_more': has_more,
+    }
+
+
+def capped_count(query: Query, cap: int) -> Dict[str, Any]:
+    """
+    Count matching rows, stopping at cap (cost bounded by cap, not table size).
+
+    Returns:
+        dict with count (at most cap) and exact (False when more rows exist)
+    """
+    limited = query.order_by(None).limit(cap + 1).subquery()
+    count = query.session.query(func.count()).select_from(limited).scalar()
+    return {'count': min(count, cap), 'exact': count <= cap}
@@ -11,6 +11,7 @@ from app.models import (
 )
 from app.utils.formatters import money_ar_2
 from app.services.cache_service import get_cache
+from app.services.chrome_service import invalidate_layout_chrome
 from app.exceptions import BusinessLogicError, NotFoundError
 
 
@@ -22,10 +23,14 @@ def register_invoice_payment(
     paid_at: datetime,
     notes: Optional[str] = None,
     user_id: Optional[int] = None,
-    session: Session = None
+    session: Session = None,
+    idempotency_key: Optional[str] = None
 ) -> PurchaseInvoicePayment:
     """
     Register a payment for a purchase invoice (partial or full).
+
+    A resubmit with the idempotency_key of a stored payment returns that
+    payment unchanged (the invoice lock serializes concurrent resubmits).
     """
     try:
         # 1. Lock invoice and validate tenant
@@ -37,6 +42,13 @@ def register_invoice_payment(
         if not invoice:
             raise NotFoundError(f'Factura #{invoice_id} no encontrada.')
         
+        if idempotency_key:
+            existing = session.query(PurchaseInvoicePayment).filter_by(
+                invoice_id=invoice.id, idempotency_key=idempotency_key
+            ).first()
+            if existing:
+                return existing
+        
         if invoice.status == InvoiceStatus.PAID:
             raise BusinessLogicError('La factura ya está totalmente pagada.')
             
@@ -54,7 +66,8 @@ def register_invoice_payment(
         payment = PurchaseInvoicePayment(
             tenant_id=tenant_id, invoice_id=invoice_id,
             payment_method=method_norm, amount=amount,
-            paid_at=paid_at, notes=notes, created_by=user_id
+            paid_at=paid_at, notes=notes, created_by=user_id,
+            idempotency_key=idempotency_key
         )
         session.add(payment)
         
@@ -89,6 +102,7 @@ def register_invoice_payment(
             cache.invalidate_module(tenant_id, 'balance')
         except Exception:
             pass
+        invalidate_layout_chrome(tenant_id)
             
         return payment
 
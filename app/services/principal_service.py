@@ -0,0 +1,152 @@
+"""
+Request principal service - cached auth snapshot for load_user_and_tenant.
+
+Every authenticated request needs the same three facts: is the user active,
+which role does it hold in the selected tenant, and is that tenant suspended.
+They are stored as a small snapshot keyed by user+tenant, held in Redis and
+in the CacheService L1 tier ('principal' is an L1 module), so the steady
+state costs zero queries.
+
+Invalidation is explicit: every write to AppUser.active / email / full_name,
+to a UserTenant membership or role, or to Tenant.is_suspended must call the
+matching invalidate_* helper after commit (user admin routes, OAuth login
+reactivation in auth_service, invitations and business creation).
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from flask import current_app
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from app.models import AppUser, UserTenant, Tenant
+from app.services.cache_service import get_cache
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_MODULE = 'principal'
+
+# Tenant id used for principals loaded without a selected tenant
+NO_TENANT = 0
+
+
+class PrincipalUser:
+    """
+    Lightweight stand-in for AppUser stored in g.user.
+
+    Exposes only the attributes used by layouts and request guards
+    (id, email, full_name). Views needing the full row must load AppUser.
+    """
+
+    __slots__ = ('id', 'email', 'full_name')
+
+    def __init__(self, id: int, email: str, full_name: Optional[str]):
+        self.id = id
+        self.email = email
+        self.full_name = full_name
+
+    def __repr__(self) -> str:
+        return f"<PrincipalUser(id={self.id}, email='{self.email}')>"
+
+
+def _cache_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def _load_snapshot(db_session: Session, user_id: int, tenant_id: int) -> Optional[Dict[str, Any]]:
+    """Load the principal snapshot from PostgreSQL in a single query."""
+    if tenant_id == NO_TENANT:
+        row = db_session.query(
+            AppUser.id, AppUser.email, AppUser.full_name, AppUser.active
+        ).filter(AppUser.id == user_id).first()
+        if not row:
+            return None
+        role, tenant_suspended = None, False
+    else:
+        row = db_session.query(
+            AppUser.id, AppUser.email, AppUser.full_name, AppUser.active,
+            UserTenant.role, Tenant.is_suspended
+        ).outerjoin(
+            UserTenant, and_(
+                UserTenant.user_id == AppUser.id,
+                UserTenant.tenant_id == tenant_id,
+                UserTenant.active == True
+            )
+        ).outerjoin(
+            Tenant, Tenant.id == UserTenant.tenant_id
+        ).filter(AppUser.id == user_id).first()
+        if not row:
+            return None
+        role, tenant_suspended = row.role, bool(row.is_suspended)
+
+    return {
+        'user_id': row.id,
+        'email': row.email,
+        'full_name': row.full_name,
+        'user_active': bool(row.active),
+        'tenant_id': tenant_id or None,
+        'role': role,
+        'tenant_suspended': tenant_suspended,
+    }
+
+
+def get_principal(db_session: Session, user_id: int, tenant_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Get the principal snapshot for user_id in tenant_id.
+
+    Lookup order: L1 (in-process) -> Redis -> PostgreSQL.
+    Snapshots without tenant membership are not cached, so a freshly
+    accepted invitation is visible on the next request.
+
+    Returns:
+        dict with user_id, email, full_name, user_active, tenant_id,
+        role and tenant_suspended, or None if the user does not exist.
+    """
+    tenant_key = tenant_id or NO_TENANT
+
+    cache = None
+    try:
+        cache = get_cache()
+        snapshot = cache.get(tenant_key, PRINCIPAL_MODULE, _cache_key(user_id))
+    except Exception as e:
+        logger.debug(f"[CACHE] Principal error (continuing): {e}")
+        snapshot = None
+
+    if snapshot is None:
+        snapshot = _load_snapshot(db_session, user_id, tenant_key)
+        if snapshot is None:
+            return None
+        if tenant_key != NO_TENANT and snapshot['role'] is None:
+            return snapshot
+        if cache is not None:
+            ttl = current_app.config.get('CACHE_PRINCIPAL_TTL', 300)
+            cache.set(tenant_key, PRINCIPAL_MODULE, _cache_key(user_id), snapshot, ttl=ttl)
+
+    return snapshot
+
+
+def invalidate_principal(tenant_id: int, user_id: int) -> None:
+    """Invalidate the cached principal of one user in one tenant (role change, removal)."""
+    try:
+        get_cache().delete(tenant_id, PRINCIPAL_MODULE, _cache_key(user_id))
+    except Exception:
+        pass  # Graceful degradation
+
+
+def invalidate_tenant_principals(tenant_id: int) -> None:
+    """Invalidate every cached principal of a tenant (suspend/reactivate)."""
+    try:
+        get_cache().invalidate_module(tenant_id, PRINCIPAL_MODULE)
+    except Exception:
+        pass
+
+
+def invalidate_user_principals(db_session: Session, user_id: int) -> None:
+    """Invalidate a user's principals in every tenant (profile changes)."""
+    tenant_ids = [
+        row.tenant_id for row in
+        db_session.query(UserTenant.tenant_id).filter(UserTenant.user_id == user_id).all()
+    ]
+    for tenant_id in [NO_TENANT] + tenant_ids:
+        invalidate_principal(tenant_id, user_id)
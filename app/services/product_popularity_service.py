@@ -0,0 +1,102 @@
+"""
+Product popularity service - incrementally maintained sales quantities.
+
+product_sales_daily holds the confirmed quantity sold per (tenant, product,
+day). The sale services apply their deltas in the same transaction as the
+sale itself:
+
+- confirm_sale / confirm_sale_from_draft: +qty per line
+- adjust_sale: new qty - old qty per product
+- delete_sale_with_reversal: -qty per line
+
+Readers sum the buckets of the last POPULARITY_WINDOW_DAYS days instead of
+aggregating the sale / sale_line history.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from flask import current_app, has_app_context
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models import Product, ProductSalesDaily
+
+DEFAULT_WINDOW_DAYS = 90
+
+
+def _bucket_day(when: Union[datetime, date, None]) -> date:
+    if when is None:
+        return date.today()
+    return when.date() if isinstance(when, datetime) else when
+
+
+def window_start(window_days: Optional[int] = None) -> date:
+    """First day included in the popularity window."""
+    if window_days is None:
+        window_days = (current_app.config.get('POPULARITY_WINDOW_DAYS', DEFAULT_WINDOW_DAYS)
+                       if has_app_context() else DEFAULT_WINDOW_DAYS)
+    return date.today() - timedelta(days=window_days - 1)
+
+
+def record_quantities(session: Session, tenant_id: int, when: Union[datetime, date, None],
+                      quantities: Iterable[Tuple[int, Any]]) -> None:
+    """
+    Add signed quantities to the day bucket of each product.
+
+    Must be called inside the caller's transaction (no commit here) so the
+    buckets stay consistent with the sale rows.
+
+    Args:
+        when: sale datetime (bucketed by its date)
+        quantities: (product_id, qty) pairs; negative qty subtracts
+    """
+    deltas: Dict[int, Decimal] = defaultdict(Decimal)
+    for product_id, qty in quantities:
+        deltas[int(product_id)] += Decimal(str(qty))
+    rows = [
+        {'tenant_id': tenant_id, 'product_id': product_id, 'day': _bucket_day(when), 'qty': qty}
+        for product_id, qty in sorted(deltas.items()) if qty != 0
+    ]
+    if not rows:
+        return
+
+    dialect = postgresql if session.get_bind().dialect.name == 'postgresql' else sqlite
+    stmt = dialect.insert(ProductSalesDaily.__table__).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['tenant_id', 'product_id', 'day'],
+        set_={'qty': ProductSalesDaily.__table__.c.qty + stmt.excluded.qty}
+    )
+    session.execute(stmt)
+
+
+def totals_subquery(tenant_id: int, window_days: Optional[int] = None) -> Any:
+    """Subquery (product_id, total_sold) over the popularity window."""
+    return (
+        select(ProductSalesDaily.product_id, func.sum(ProductSalesDaily.qty).label('total_sold'))
+        .where(ProductSalesDaily.tenant_id == tenant_id,
+               ProductSalesDaily.day >= window_start(window_days))
+        .group_by(ProductSalesDaily.product_id)
+        .subquery('product_popularity')
+    )
+
+
+def popularity_score(tenant_id: int, window_days: Optional[int] = None) -> Any:
+    """
+    Correlated quantity-sold expression for ORDER BY on Product queries.
+
+    Evaluated only for the rows that pass the query filters, each one a
+    primary key range scan of at most window_days buckets.
+    """
+    return func.coalesce(
+        select(func.sum(ProductSalesDaily.qty))
+        .where(ProductSalesDaily.tenant_id == tenant_id,
+               ProductSalesDaily.product_id == Product.id,
+               ProductSalesDaily.day >= window_start(window_days))
+        .correlate(Product)
+        .scalar_subquery(),
+        0
+    )
@@ -0,0 +1,160 @@
+"""
+Product search service - trigram-indexed name/SKU/barcode search.
+
+Backed by the idx_product_search_trgm GIN index on
+product_search_text(name, sku, barcode) (db/migrations/20261017_product_trigram_search.sql):
+lower-cased, accent-free text matched with LIKE '%q%' or trigram word
+similarity, ranked by similarity.
+
+If the migration has not been applied (product_search_text() missing), or
+PRODUCT_SEARCH_BACKEND is 'like', the legacy lower(col) LIKE filter is used.
+Availability is checked once per process; only a missing function or
+extension (SQLSTATE 42883 / 42704) switches a running worker to LIKE, other
+database errors (timeouts, dropped connections) propagate unchanged.
+"""
+
+import logging
+import unicodedata
+from typing import Any, List, Optional
+
+from flask import current_app
+from sqlalchemy import and_, desc, func, literal, or_, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Query, Session
+
+from app.models import Product
+from app.services.product_popularity_service import popularity_score
+from app.services.transaction_retry import sqlstate
+
+logger = logging.getLogger(__name__)
+
+MAX_QUERY_LENGTH = 100
+
+# Per-process result of the product_search_text() availability check
+_trigram_available: Optional[bool] = None
+
+# undefined_function / undefined_object: the trigram backend is gone
+MISSING_BACKEND_SQLSTATES = {'42883', '42704'}
+
+
+def normalize_text(value: str) -> str:
+    """Lower-case, strip accents and collapse whitespace, like product_search_text()."""
+    decomposed = unicodedata.normalize('NFKD', value.lower())
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.split())
+
+
+def normalize_query(query: str) -> str:
+    """normalize_text for user input, capped at MAX_QUERY_LENGTH."""
+    return normalize_text(query[:MAX_QUERY_LENGTH])
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _search_text() -> Any:
+    return func.product_search_text(Product.name, Product.sku, Product.barcode)
+
+
+def trigram_search_available(db_session: Session) -> bool:
+    """Whether the trigram search function exists (checked once per process)."""
+    global _trigram_available
+    backend = current_app.config.get('PRODUCT_SEARCH_BACKEND', 'auto')
+    if backend != 'auto':
+        return backend == 'trigram'
+    if _trigram_available is None:
+        # to_regprocedure() returns NULL instead of raising for a missing function
+        _trigram_available = bool(db_session.execute(
+            text("SELECT to_regprocedure('product_search_text(text,text,text)') IS NOT NULL")
+        ).scalar())
+        if not _trigram_available:
+            logger.info("[SEARCH] product_search_text() not installed, using LIKE search")
+    return _trigram_available
+
+
+def report_search_error(error: DBAPIError) -> None:
+    """Switch this worker to LIKE search if error means the trigram backend is missing."""
+    global _trigram_available
+    if sqlstate(error) in MISSING_BACKEND_SQLSTATES:
+        _trigram_available = False
+        logger.warning(f"[SEARCH] Trigram backend missing, using LIKE search: {error}")
+
+
+def like_filter(query: str) -> Any:
+    """Legacy case-insensitive substring filter on name, SKU and barcode."""
+    pattern = f'%{_escape_like(query[:MAX_QUERY_LENGTH].lower())}%'
+    return or_(
+        func.lower(Product.name).like(pattern, escape='\\'),
+        and_(Product.sku.isnot(None), func.lower(Product.sku).like(pattern, escape='\\')),
+        and_(Product.barcode.isnot(None), func.lower(Product.barcode).like(pattern, escape='\\'))
+    )
+
+
+def trigram_filter(query: str) -> Any:
+    """Index-backed filter: substring match or trigram word similarity (typos)."""
+    normalized = normalize_query(query)
+    search_text = _search_text()
+    return or_(
+        search_text.like(f'%{_escape_like(normalized)}%', escape='\\'),
+        literal(normalized).op('<%')(search_text)
+    )
+
+
+def substring_filter(db_session: Session, query: str) -> Any:
+    """
+    Plain substring match (no typo tolerance) for list filters.
+
+    Accent-insensitive and GIN-indexed when the trigram backend is available,
+    the legacy LIKE filter otherwise.
+    """
+    if trigram_search_available(db_session):
+        return _search_text().like(f'%{_escape_like(normalize_query(query))}%', escape='\\')
+    return like_filter(query)
+
+
+def trigram_rank(query: str) -> Any:
+    """Similarity rank for ORDER BY (higher is better)."""
+    return func.word_similarity(literal(normalize_query(query)), _search_text())
+
+
+def apply_search(db_session: Session, base_query: Query, query: str, ranked: bool = True) -> Query:
+    """
+    Add the search filter (and optional similarity ORDER BY) to a Product query.
+
+    Uses the trigram backend when available, the LIKE filter otherwise.
+    Callers add their own secondary ordering.
+    """
+    if trigram_search_available(db_session):
+        filtered = base_query.filter(trigram_filter(query))
+        return filtered.order_by(desc(trigram_rank(query))) if ranked else filtered
+    return base_query.filter(like_filter(query))
+
+
+def search_products(db_session: Session, tenant_id: int, query: str, limit: int = 20,
+                    category_id: Optional[int] = None, active_only: bool = True) -> List[Product]:
+    """
+    Ranked product search for a tenant.
+
+    Trigram results are ordered by similarity, popularity (quantity sold in
+    the popularity window) and name; LIKE results by popularity and name. If
+    the trigram backend was dropped, this request fails and the worker uses
+    LIKE from then on.
+    """
+    base = db_session.query(Product).filter(Product.tenant_id == tenant_id)
+    if active_only:
+        base = base.filter(Product.active == True)
+    if category_id is not None:
+        base = base.filter(Product.category_id == category_id)
+
+    popularity = desc(popularity_score(tenant_id))
+
+    if trigram_search_available(db_session):
+        try:
+            return (apply_search(db_session, base, query)
+                    .order_by(popularity, Product.name).limit(limit).all())
+        except DBAPIError as e:
+            report_search_error(e)
+            raise
+
+    return base.filter(like_filter(query)).order_by(popularity, Product.name).limit(limit).all()
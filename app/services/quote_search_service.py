@@ -0,0 +1,113 @@
+"""
+Quote search service - indexed search and keyset pagination for the quote list.
+
+Free text is matched against a single search document
+lower(quote_number || customer_name || customer_phone || notes), served by
+the idx_quote_search_trgm GIN trigram index
+(db/migrations/20261017_quote_search_index.sql). As an expression index it
+is maintained by PostgreSQL on every write, with no trigger or extra column.
+
+Date and amount terms (same formats as the invoice search) become ranges on
+issued_at / valid_until / total_amount, digit-only terms also match the quote
+id. Expiry is computed in SQL and the list is paginated newest first on
+(issued_at, id).
+"""
+
+from datetime import date, datetime, time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, case, func, literal_column, or_
+from sqlalchemy.orm import Session
+
+from app.models import Quote
+from app.services.invoice_search_service import parse_amount_term, parse_date_term
+from app.services.pagination import capped_count, keyset_page
+from app.services.product_search_service import MAX_QUERY_LENGTH
+
+COUNT_CAP = 1000
+
+QUOTE_STATUSES = ('DRAFT', 'SENT', 'ACCEPTED', 'CANCELED')
+
+# Must match the idx_quote_search_trgm index expression
+_SEP = literal_column("' '")
+_EMPTY = literal_column("''")
+SEARCH_DOCUMENT = func.lower(
+    Quote.quote_number + _SEP + Quote.customer_name + _SEP
+    + func.coalesce(Quote.customer_phone, _EMPTY) + _SEP + func.coalesce(Quote.notes, _EMPTY)
+)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def expired_condition(today: date) -> Any:
+    """Open (DRAFT / SENT) quotes past valid_until, same rule as Quote.is_expired."""
+    return and_(Quote.status.in_(['DRAFT', 'SENT']), Quote.valid_until < today)
+
+
+def search_filter(term: str) -> Optional[Any]:
+    """WHERE clause for a search term (None when empty)."""
+    term = ' '.join(term[:MAX_QUERY_LENGTH].split())
+    if not term:
+        return None
+
+    clauses = [SEARCH_DOCUMENT.like(f'%{_escape_like(term.lower())}%', escape='\\')]
+
+    date_range = parse_date_term(term)
+    if date_range:
+        start = datetime.combine(date_range['start'], time.min)
+        end = datetime.combine(date_range['end'], time.min)
+        clauses.append(and_(Quote.issued_at >= start, Quote.issued_at < end))
+        clauses.append(and_(Quote.valid_until >= date_range['start'], Quote.valid_until < date_range['end']))
+    else:
+        amount_range = parse_amount_term(term)
+        if amount_range:
+            clauses.append(and_(Quote.total_amount >= amount_range['min'],
+                                Quote.total_amount < amount_range['max']))
+        if term.isdigit():
+            clauses.append(Quote.id == int(term))
+
+    return or_(*clauses)
+
+
+def get_quote_page(db_session: Session, tenant_id: int, search: str = '', status: str = '',
+                   cursor: Optional[str] = None, limit: int = 50,
+                   with_count: bool = False) -> Dict[str, Any]:
+    """
+    One page of quotes, newest first.
+
+    Args:
+        search: free text, date, amount or quote id
+        status: one of QUOTE_STATUSES, or 'EXPIRED' for open quotes past valid_until
+        cursor: next_cursor of the previous page
+        with_count: also return 'total' = capped_count of the filtered rows
+
+    Returns:
+        keyset_page dict (plus 'total'); items carry display_expired
+    """
+    today = date.today()
+    query = db_session.query(Quote).filter(Quote.tenant_id == tenant_id)
+
+    if status in QUOTE_STATUSES:
+        query = query.filter(Quote.status == status)
+    elif status == 'EXPIRED':
+        query = query.filter(expired_condition(today))
+
+    clause = search_filter(search)
+    if clause is not None:
+        query = query.filter(clause)
+
+    expired = case((expired_condition(today), True), else_=False).label('display_expired')
+    page = keyset_page(query.add_columns(expired), (Quote.issued_at, Quote.id),
+                       lambda row: (row[0].issued_at, row[0].id), cursor, limit, descending=True)
+
+    quotes = []
+    for quote, display_expired in page['items']:
+        quote.display_expired = bool(display_expired)
+        quotes.append(quote)
+    page['items'] = quotes
+
+    if with_count:
+        page['total'] = capped_count(query, COUNT_CAP)
+    return page
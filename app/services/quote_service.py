@@ -22,6 +22,9 @@ from app.models import (
     LedgerType, LedgerReferenceType, PaymentMethod, normalize_payment_method
 )
 from app.exceptions import BusinessLogicError, NotFoundError, InsufficientStockError
+from app.services.bulk_write import bulk_insert
+from app.services.product_popularity_service import record_quantities
+from app.services.transaction_retry import lock_wait, run_with_retry
 
 
 def _render_quote_pdf(cart_data: Dict[str, Any], business_info: Dict[str, Any]) -> BytesIO:
@@ -291,7 +294,12 @@ def create_quote_from_cart(cart: dict, session: Session, tenant_id: int, custome
 
 
 def convert_quote_to_sale(quote_id: int, session: Session, tenant_id: int) -> int:
-    """Convert a quote to a confirmed sale."""
+    """Convert a quote to a confirmed sale (retried on deadlock / serialization failure)."""
+    return run_with_retry('convert_quote_to_sale', session,
+                          lambda: _convert_quote_to_sale(quote_id, session, tenant_id))
+
+
+def _convert_quote_to_sale(quote_id: int, session: Session, tenant_id: int) -> int:
     try:
         session.begin_nested()
         quote = session.query(Quote).filter(Quote.id == quote_id, Quote.tenant_id == tenant_id).with_for_update().first()
@@ -303,10 +311,16 @@ def convert_quote_to_sale(quote_id: int, session: Session, tenant_id: int) -> in
 
         # 1. Product validation and stock locking
         product_ids = [line.product_id for line in quote.lines]
-        stocks = session.query(ProductStock).join(Product).filter(
-            ProductStock.product_id.in_(product_ids), Product.tenant_id == tenant_id
-        ).with_for_update().all()
+        with lock_wait('convert_quote_to_sale'):
+            stocks = session.query(ProductStock).join(Product).filter(
+                ProductStock.product_id.in_(product_ids), Product.tenant_id == tenant_id
+            ).order_by(ProductStock.product_id).with_for_update().all()
         stocks_dict = {s.product_id: s for s in stocks}
+        products = {p.id: p for p in session.query(Product).filter(
+            Product.id.in_(product_ids), Product.tenant_id == tenant_id
+        ).all()}
+        if len(products) != len(set(product_ids)):
+            raise NotFoundError('Uno o más productos del presupuesto ya no existen.')
 
         # 2. Create Sale
         sale = Sale(tenant_id=tenant_id, datetime=datetime.now(), total=quote.total_amount, status=SaleStatus.CONFIRMED)
@@ -316,22 +330,27 @@ def convert_quote_to_sale(quote_id: int, session: Session, tenant_id: int) -> in
         # 3. Process lines
         for line in quote.lines:
             stock = stocks_dict.get(line.product_id)
-            product = session.query(Product).get(line.product_id)
+            product = products[line.product_id]
             if not product.is_unlimited_stock and (not stock or stock.on_hand_qty < line.qty):
                 raise InsufficientStockError(f'Stock insuficiente para {product.name if product else "producto"}')
 
-            session.add(SaleLine(sale_id=sale.id, product_id=line.product_id, qty=line.qty, unit_price=line.unit_price, line_total=line.line_total))
+        bulk_insert(session, SaleLine, [
+            {'sale_id': sale.id, 'product_id': line.product_id, 'qty': line.qty,
+             'unit_price': line.unit_price, 'line_total': line.line_total}
+            for line in quote.lines
+        ])
 
         # 4. Stock Movement
         move = StockMove(tenant_id=tenant_id, date=sale.datetime, type=StockMoveType.OUT, reference_type=StockReferenceType.SALE, reference_id=sale.id)
         session.add(move)
         session.flush()
 
-        for line in quote.lines:
-            p = session.query(Product).get(line.product_id)
-            if p.is_unlimited_stock:
-                continue  # Don't deduct stock for unlimited products
-            session.add(StockMoveLine(stock_move_id=move.id, product_id=line.product_id, qty=line.qty, uom_id=p.uom_id))
+        # Don't deduct stock for unlimited products
+        bulk_insert(session, StockMoveLine, [
+            {'stock_move_id': move.id, 'product_id': line.product_id, 'qty': line.qty,
+             'uom_id': products[line.product_id].uom_id}
+            for line in quote.lines if not products[line.product_id].is_unlimited_stock
+        ])
 
         # 5. Finance
         session.add(FinanceLedger(
@@ -340,7 +359,11 @@ def convert_quote_to_sale(quote_id: int, session: Session, tenant_id: int) -> in
             payment_method=normalize_payment_method(quote.payment_method)
         ))
 
-        # 6. Finalize Quote
+        # 6. Update popularity buckets
+        record_quantities(session, tenant_id, sale.datetime,
+                          [(line.product_id, line.qty) for line in quote.lines])
+
+        # 7. Finalize Quote
         quote.status = 'ACCEPTED'
         quote.sale_id = sale.id
         
@@ -12,6 +12,7 @@ from app.models import (
     FinanceLedger, LedgerType, LedgerReferenceType, normalize_payment_method
 )
 from app.exceptions import BusinessLogicError, NotFoundError, InsufficientStockError
+from app.services.product_popularity_service import record_quantities
 
 
 def adjust_sale(sale_id: int, new_lines_data: List[Dict[str, Any]], session: Session, tenant_id: int) -> None:
@@ -86,7 +87,7 @@ def adjust_sale(sale_id: int, new_lines_data: List[Dict[str, Any]], session: Ses
             pids_to_lock = sorted(deltas.keys())
             stocks = session.query(ProductStock).filter(
                 ProductStock.product_id.in_(pids_to_lock)
-            ).with_for_update().all()
+            ).order_by(ProductStock.product_id).with_for_update().all()
             stocks_dict = {s.product_id: s for s in stocks}
             
             for pid, delta in deltas.items():
@@ -128,7 +129,10 @@ def adjust_sale(sale_id: int, new_lines_data: List[Dict[str, Any]], session: Ses
                     uom_id=products_dict[pid].uom_id
                 ))
 
-        # 8. Create Ledger Adjustment
+        # 8. Update popularity buckets of the sale's day
+        record_quantities(session, tenant_id, sale.datetime, deltas.items())
+
+        # 9. Create Ledger Adjustment
         diff = new_total - old_total
         if diff != 0:
             session.add(FinanceLedger(
@@ -6,6 +6,7 @@ from app.models import (
     Product, ProductStock, SaleStatus, StockMoveType, StockReferenceType,
     LedgerReferenceType
 )
+from app.services.product_popularity_service import record_quantities
 
 
 def delete_sale_with_reversal(sale_id: int, session, tenant_id: int) -> dict:
@@ -57,7 +58,7 @@ def delete_sale_with_reversal(sale_id: int, session, tenant_id: int) -> dict:
         # Step 3: Get all sale lines first (before deletion)
         sale_lines = session.query(SaleLine).filter(
             SaleLine.sale_id == sale_id
-        ).all()
+        ).order_by(SaleLine.product_id).all()  # Stock locks below in product_id order
         
         if not sale_lines:
             raise ValueError(
@@ -104,6 +105,10 @@ def delete_sale_with_reversal(sale_id: int, session, tenant_id: int) -> dict:
                 'new_stock': new_stock
             })
         
+        # Remove the sale from the popularity buckets of its day
+        record_quantities(session, tenant_id, sale.datetime,
+                          [(line.product_id, -line.qty) for line in sale_lines])
+        
         # Step 5: Delete finance ledger entries (using enum)
         ledger_entries = session.query(FinanceLedger).filter(
             and_(
@@ -3,7 +3,7 @@
 from decimal import Decimal
 from datetime import datetime
 from typing import Optional, Dict, Any, Tuple
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from app.models import SaleDraft, SaleDraftLine, Product
 from app.exceptions import BusinessLogicError, NotFoundError, InsufficientStockError
 
@@ -181,6 +181,23 @@ def calculate_draft_totals(draft: SaleDraft) -> Dict[str, Any]:
     }
 
 
+def load_draft_for_confirmation(session: Session, draft_id: int, tenant_id: int, user_id: int) -> Optional[SaleDraft]:
+    """
+    Get draft with its lines, products and UOMs in a single query.
+
+    Confirmation walks every line several times (totals, stock check, sale
+    lines, stock movement); loading everything up front keeps the query count
+    constant regardless of the number of lines.
+    """
+    return session.query(SaleDraft).options(
+        joinedload(SaleDraft.lines).joinedload(SaleDraftLine.product).joinedload(Product.uom)
+    ).filter(
+        SaleDraft.id == draft_id,
+        SaleDraft.tenant_id == tenant_id,
+        SaleDraft.user_id == user_id
+    ).first()
+
+
 def get_draft_with_totals(session: Session, tenant_id: int, user_id: int) -> Tuple[Optional[SaleDraft], Dict[str, Any]]:
     """Get draft with totals dictionary."""
     draft = session.query(SaleDraft).filter(SaleDraft.tenant_id == tenant_id, SaleDraft.user_id == user_id).first()
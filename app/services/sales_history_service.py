@@ -0,0 +1,81 @@
+"""
+Sales history service - keyset-paginated list of confirmed sales.
+
+Pages are ordered newest first on (datetime, id) and served by
+idx_sale_tenant_datetime; deep pages and "jump to date" cost the same
+index range scan as the first page (no OFFSET). Totals are aggregated in
+PostgreSQL, for the page rows and (when a date range is set) for the range.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session, joinedload
+
+from app.models import Customer, Sale, SaleStatus
+from app.services.pagination import encode_cursor, keyset_page
+
+# Sort key (newest first)
+_SORT_COLUMNS = (Sale.datetime, Sale.id)
+
+
+def _totals(query: Query) -> Dict[str, Any]:
+    """count / total / amount_paid aggregated in SQL over query's rows."""
+    rows = query.order_by(None).with_entities(Sale.id, Sale.total, Sale.amount_paid).subquery()
+    count, total, paid = query.session.query(
+        func.count(rows.c.id),
+        func.coalesce(func.sum(rows.c.total), 0),
+        func.coalesce(func.sum(rows.c.amount_paid), 0)
+    ).one()
+    return {'count': count, 'total': total, 'amount_paid': paid}
+
+
+def jump_cursor(day: date) -> str:
+    """Cursor that starts a newest-first page at the end of day."""
+    return encode_cursor([datetime.combine(day + timedelta(days=1), time.min), 0])
+
+
+def get_sales_page(db_session: Session, tenant_id: int, search_query: str = '',
+                   start: Optional[date] = None, end: Optional[date] = None,
+                   cursor: Optional[str] = None, jump_to: Optional[date] = None,
+                   limit: int = 50) -> Dict[str, Any]:
+    """
+    One page of confirmed sales, newest first.
+
+    Args:
+        search_query: sale id (digits) or customer name substring
+        start, end: inclusive date range
+        cursor: next_cursor of the previous page
+        jump_to: start the page at the last sale of this day (ignored with cursor)
+
+    Returns:
+        keyset_page dict plus page_totals and range_totals (None without a
+        date range), each {'count', 'total', 'amount_paid'}
+    """
+    query = db_session.query(Sale).filter(
+        Sale.tenant_id == tenant_id,
+        Sale.status == SaleStatus.CONFIRMED
+    )
+
+    if search_query:
+        if search_query.isdigit():
+            query = query.filter(Sale.id == int(search_query))
+        else:
+            query = query.join(Customer).filter(Customer.name.ilike(f'%{search_query}%'))
+
+    if start:
+        query = query.filter(Sale.datetime >= datetime.combine(start, time.min))
+    if end:
+        query = query.filter(Sale.datetime < datetime.combine(end + timedelta(days=1), time.min))
+
+    if cursor is None and jump_to is not None:
+        cursor = jump_cursor(jump_to)
+
+    page = keyset_page(query.options(joinedload(Sale.customer)), _SORT_COLUMNS,
+                       lambda s: (s.datetime, s.id), cursor, limit, descending=True)
+
+    ids = [s.id for s in page['items']]
+    page['page_totals'] = _totals(db_session.query(Sale).filter(Sale.id.in_(ids))) if ids else None
+    page['range_totals'] = _totals(query) if (start or end) else None
+    return page
@@ -7,20 +7,28 @@ from datetime import datetime
 from typing import List, Dict, Optional, Any, Tuple
 from sqlalchemy import text
 from app.models import (
-    Product, ProductStock, Sale, SaleLine, SalePayment, SaleDraft,
+    Product, ProductStock, Sale, SaleLine, SalePayment,
     StockMove, StockMoveLine, FinanceLedger,
     SaleStatus, StockMoveType, StockReferenceType, PaymentStatus,
     LedgerType, LedgerReferenceType, normalize_payment_method
 )
 from app.exceptions import BusinessLogicError, NotFoundError, InsufficientStockError
-from app.services.sale_draft_service import calculate_draft_totals
+from app.services.sale_draft_service import calculate_draft_totals, load_draft_for_confirmation
+from app.services.product_popularity_service import record_quantities
+from app.services.bulk_write import bulk_insert
+from app.services.transaction_retry import lock_wait, retry_reason, run_with_retry
 
 
 def confirm_sale(cart: dict, session, payment_method: str = 'CASH', tenant_id: int = None, customer_id: int = None) -> int:
     """
     Confirm sale with full transactional processing (tenant-scoped).
-    Basic version used for simple carts.
+    Basic version used for simple carts. Retried on deadlock / serialization failure.
     """
+    return run_with_retry('confirm_sale', session,
+                          lambda: _confirm_sale(cart, session, payment_method, tenant_id, customer_id))
+
+
+def _confirm_sale(cart: dict, session, payment_method: str, tenant_id: int, customer_id: int) -> int:
     if not cart or not cart.get('items'):
         raise BusinessLogicError('El carrito está vacío')
     
@@ -46,7 +54,7 @@ def confirm_sale(cart: dict, session, payment_method: str = 'CASH', tenant_id: i
                 raise BusinessLogicError(f'El producto "{p.name}" no está activo')
 
         # 2. Lock stock levels
-        stock_dict = _lock_stocks(session, product_ids, tenant_id)
+        stock_dict = _lock_stocks(session, product_ids, tenant_id, 'confirm_sale')
         
         # 3. Prepare data and validate stock
         sale_lines_data = []
@@ -88,15 +96,15 @@ def confirm_sale(cart: dict, session, payment_method: str = 'CASH', tenant_id: i
         session.flush()
         
         # 5. Create SaleLines
-        for line in sale_lines_data:
-            session.add(SaleLine(
-                sale_id=sale.id,
-                product_id=line['product_id'],
-                qty=line['qty'],
-                unit_price=line['unit_price'],
-                line_total=line['line_total']
-            ))
+        bulk_insert(session, SaleLine, [{
+            'sale_id': sale.id,
+            'product_id': line['product_id'],
+            'qty': line['qty'],
+            'unit_price': line['unit_price'],
+            'line_total': line['line_total']
+        } for line in sale_lines_data])
             
+
         # 6. Create Stock Movement
         _create_stock_movement(session, tenant_id, sale.id, sale_lines_data)
         
@@ -104,6 +112,10 @@ def confirm_sale(cart: dict, session, payment_method: str = 'CASH', tenant_id: i
         payments = [{'method': payment_method, 'amount': sale_total}]
         _create_ledger_entries(session, tenant_id, sale.id, payments, sale_total)
         
+        # 8. Update popularity buckets
+        record_quantities(session, tenant_id, sale.datetime,
+                          [(line['product_id'], line['qty']) for line in sale_lines_data])
+        
         session.commit()
         _invalidate_balance_cache(tenant_id)
         return sale.id
@@ -113,6 +125,8 @@ def confirm_sale(cart: dict, session, payment_method: str = 'CASH', tenant_id: i
         raise e
     except Exception as e:
         session.rollback()
+        if retry_reason(e):
+            raise  # Retried by run_with_retry
         raise Exception(f'Error al confirmar venta: {str(e)}')
 
 
@@ -127,17 +141,36 @@ def confirm_sale_from_draft(
 ) -> int:
     """
     Confirm sale from draft with idempotency and mixed payments.
+
+    The caller reserves idempotency_key in Redis (idempotency_service.run_idempotent,
+    scope 'sale') before loading the draft; sale.idempotency_key stays unique
+    as the fallback. Retried on deadlock / serialization failure.
     """
+    return run_with_retry('confirm_sale_from_draft', session, lambda: _confirm_sale_from_draft(
+        draft_id, payments, idempotency_key, session, tenant_id, user_id, customer_id
+    ))
+
+
+def _confirm_sale_from_draft(
+    draft_id: int,
+    payments: List[Dict[str, Any]],
+    idempotency_key: str,
+    session,
+    tenant_id: int,
+    user_id: int,
+    customer_id: int
+) -> int:
     try:
         # 1. Idempotency check
         existing_sale = session.query(Sale).filter_by(idempotency_key=idempotency_key).first()
         if existing_sale:
             raise BusinessLogicError(f'Esta venta ya fue procesada (ID: {existing_sale.id})')
             
-        # 2. Get draft
-        draft = session.query(SaleDraft).filter_by(id=draft_id, tenant_id=tenant_id, user_id=user_id).first()
+        # 2. Get draft (lines, products and UOMs in one query)
+        draft = load_draft_for_confirmation(session, draft_id, tenant_id, user_id)
         if not draft or not draft.lines:
             raise NotFoundError('Carrito no encontrado o vacío')
+        products = {line.product_id: line.product for line in draft.lines}
             
         # 3. Calculate and validate payments
         totals = calculate_draft_totals(draft)
@@ -180,10 +213,10 @@ def confirm_sale_from_draft(
             
         # 4. Lock and validate stock
         product_ids = [line['product_id'] for line in totals['lines']]
-        stock_dict = _lock_stocks(session, product_ids, tenant_id)
+        stock_dict = _lock_stocks(session, product_ids, tenant_id, 'confirm_sale_from_draft')
         
         for line in totals['lines']:
-            product = session.query(Product).get(line['product_id'])
+            product = products[line['product_id']]
             if not product.is_unlimited_stock and stock_dict.get(line['product_id'], Decimal('0')) < line['qty']:
                 raise InsufficientStockError(f'Stock insuficiente para "{line["product_name"]}"')
                 
@@ -203,58 +236,65 @@ def confirm_sale_from_draft(
         
         # 6. Create SaleLines & Payments
         sale_lines_data = []
+        sale_line_rows = []
         for line in totals['lines']:
             final_unit_price = (line['line_total'] / line['qty']).quantize(Decimal('0.01'))
-            session.add(SaleLine(
-                sale_id=sale.id,
-                product_id=line['product_id'],
-                qty=line['qty'],
-                unit_price=final_unit_price,
-                line_total=line['line_total']
-            ))
-            product = session.query(Product).get(line['product_id'])
+            sale_line_rows.append({
+                'sale_id': sale.id,
+                'product_id': line['product_id'],
+                'qty': line['qty'],
+                'unit_price': final_unit_price,
+                'line_total': line['line_total']
+            })
             sale_lines_data.append({
                 'product_id': line['product_id'],
                 'qty': line['qty'],
-                'product': product
+                'product': products[line['product_id']]
             })
+        bulk_insert(session, SaleLine, sale_line_rows)
             
         # Create SalePayments for non-CC payments
+        payment_rows = []
         for p in non_cc_payments:
             method = p['method'].upper()
             if method not in ['CASH', 'TRANSFER', 'CARD']:
                 raise BusinessLogicError(f'Método de pago inválido: {method}')
-            session.add(SalePayment(
-                sale_id=sale.id,
-                payment_method=method,
-                amount=Decimal(str(p['amount'])),
-                amount_received=Decimal(str(p.get('amount_received', 0))) if method == 'CASH' else None,
-                change_amount=Decimal(str(p.get('change_amount', 0))) if method == 'CASH' else None
-            ))
+            payment_rows.append({
+                'sale_id': sale.id,
+                'payment_method': method,
+                'amount': Decimal(str(p['amount'])),
+                'amount_received': Decimal(str(p.get('amount_received', 0))) if method == 'CASH' else None,
+                'change_amount': Decimal(str(p.get('change_amount', 0))) if method == 'CASH' else None
+            })
+        bulk_insert(session, SalePayment, payment_rows)
             
         # 7. Create Stock Movement & Finance Entries
         _create_stock_movement(session, tenant_id, sale.id, sale_lines_data)
         
         # Ledger entries for non-CC payments (INCOME)
-        if non_cc_payments:
-            _create_ledger_entries(session, tenant_id, sale.id, non_cc_payments, sale_total)
+        ledger_rows = _ledger_rows(tenant_id, sale.id, non_cc_payments, sale_total)
         
         # Ledger entry for CC portion (INVOICE - devengado)
         if has_cuenta_corriente:
             cc_amount = sum(Decimal(str(p.get('amount', 0))) for p in cc_payments) if not is_full_cuenta_corriente else sale_total
-            session.add(FinanceLedger(
-                tenant_id=tenant_id,
-                datetime=datetime.now(),
-                type=LedgerType.INVOICE,
-                amount=cc_amount,
-                category='Ventas',
-                reference_type=LedgerReferenceType.SALE,
-                reference_id=sale.id,
-                notes='Creacion de factura' if is_full_cuenta_corriente else f'Porcion cuenta corriente de venta #{sale.id}',
-                payment_method='CUENTA_CORRIENTE'
-            ))
+            ledger_rows.append({
+                'tenant_id': tenant_id,
+                'datetime': datetime.now(),
+                'type': LedgerType.INVOICE,
+                'amount': cc_amount,
+                'category': 'Ventas',
+                'reference_type': LedgerReferenceType.SALE,
+                'reference_id': sale.id,
+                'notes': 'Creacion de factura' if is_full_cuenta_corriente else f'Porcion cuenta corriente de venta #{sale.id}',
+                'payment_method': 'CUENTA_CORRIENTE'
+            })
+        bulk_insert(session, FinanceLedger, ledger_rows)
+        
+        # 8. Update popularity buckets
+        record_quantities(session, tenant_id, sale.datetime,
+                          [(line['product_id'], line['qty']) for line in sale_lines_data])
         
-        # 8. Clean up
+        # 9. Clean up
         session.delete(draft)
         session.commit()
         _invalidate_balance_cache(tenant_id)
@@ -266,6 +306,8 @@ def confirm_sale_from_draft(
         raise e
     except Exception as e:
         session.rollback()
+        if retry_reason(e):
+            raise  # Retried by run_with_retry
         raise Exception(f'Error al confirmar venta: {str(e)}')
 
 
@@ -273,10 +315,16 @@ def confirm_sale_from_draft(
 # PRIVATE HELPERS
 # =====================================================
 
-def _lock_stocks(session, product_ids: List[int], tenant_id: int) -> Dict[int, Decimal]:
-    """Lock product_stock rows FOR UPDATE and return current levels."""
+def _lock_stocks(session, product_ids: List[int], tenant_id: int, operation: str) -> Dict[int, Decimal]:
+    """
+    Lock product_stock rows FOR UPDATE and return current levels.
+
+    Locks are taken in product_id order (the order of every stock locker), so
+    concurrent sales with overlapping products queue instead of deadlocking.
+    """
     if not product_ids:
         return {}
+    product_ids = sorted(set(product_ids))
         
     placeholders = ', '.join([f':pid{i}' for i in range(len(product_ids))])
     query = text(f"""
@@ -285,12 +333,14 @@ def _lock_stocks(session, product_ids: List[int], tenant_id: int) -> Dict[int, D
         INNER JOIN product p ON p.id = ps.product_id
         WHERE ps.product_id IN ({placeholders})
           AND p.tenant_id = :tenant_id
+        ORDER BY ps.product_id
         FOR UPDATE OF ps
     """)
     
     params = {f'pid{i}': pid for i, pid in enumerate(product_ids)}
     params['tenant_id'] = tenant_id
-    results = session.execute(query, params).fetchall()
+    with lock_wait(operation):
+        results = session.execute(query, params).fetchall()
     return {row[0]: Decimal(str(row[1])) for row in results}
 
 
@@ -307,34 +357,39 @@ def _create_stock_movement(session, tenant_id: int, sale_id: int, lines: List[Di
     session.add(move)
     session.flush()
     
-    for line in lines:
-        if line['product'].is_unlimited_stock:
-            continue  # Don't deduct stock for unlimited products
-        session.add(StockMoveLine(
-            stock_move_id=move.id,
-            product_id=line['product_id'],
-            qty=line['qty'],
-            uom_id=line['product'].uom_id
-        ))
+    # Don't deduct stock for unlimited products
+    bulk_insert(session, StockMoveLine, [{
+        'stock_move_id': move.id,
+        'product_id': line['product_id'],
+        'qty': line['qty'],
+        'uom_id': line['product'].uom_id
+    } for line in lines if not line['product'].is_unlimited_stock])
 
 
-def _create_ledger_entries(session, tenant_id: int, sale_id: int, payments: List[Dict[str, Any]], total: Decimal):
-    """Generate financial ledger entries for each payment."""
+def _ledger_rows(tenant_id: int, sale_id: int, payments: List[Dict[str, Any]], total: Decimal) -> List[Dict[str, Any]]:
+    """Financial ledger rows (INCOME) for each payment."""
+    rows = []
     for p in payments:
         method = p.get('method', 'CASH').upper()
         amount = Decimal(str(p.get('amount', total)))
         
-        session.add(FinanceLedger(
-            tenant_id=tenant_id,
-            datetime=datetime.now(),
-            type=LedgerType.INCOME,
-            amount=amount,
-            category='Ventas',
-            reference_type=LedgerReferenceType.SALE,
-            reference_id=sale_id,
-            notes=f'Ingreso por venta #{sale_id} ({method})',
-            payment_method=normalize_payment_method(method)
-        ))
+        rows.append({
+            'tenant_id': tenant_id,
+            'datetime': datetime.now(),
+            'type': LedgerType.INCOME,
+            'amount': amount,
+            'category': 'Ventas',
+            'reference_type': LedgerReferenceType.SALE,
+            'reference_id': sale_id,
+            'notes': f'Ingreso por venta #{sale_id} ({method})',
+            'payment_method': normalize_payment_method(method)
+        })
+    return rows
+
+
+def _create_ledger_entries(session, tenant_id: int, sale_id: int, payments: List[Dict[str, Any]], total: Decimal):
+    """Generate financial ledger entries for each payment."""
+    bulk_insert(session, FinanceLedger, _ledger_rows(tenant_id, sale_id, payments, total))
 
 
 def _invalidate_balance_cache(tenant_id: int):
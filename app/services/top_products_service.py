@@ -1,13 +1,16 @@
 from decimal import Decimal
-from datetime import datetime, timedelta
 from sqlalchemy import func, desc
-from app.models import Product, Sale, SaleLine, ProductStock
+from app.models import Product, ProductStock
+from app.services.product_popularity_service import totals_subquery
 
 
 def get_top_selling_products(session, tenant_id: int, limit=10):
     """
     Get top selling products based on total quantity sold (tenant-scoped).
     
+    Reads the incrementally maintained popularity buckets of the last
+    POPULARITY_WINDOW_DAYS days instead of the sales history.
+    
     Args:
         session: SQLAlchemy session
         tenant_id: Tenant ID (REQUIRED for multi-tenant filtering)
@@ -18,8 +21,8 @@ def get_top_selling_products(session, tenant_id: int, limit=10):
         - id, name, sale_price, on_hand_qty, image_url, sku, barcode
     """
     try:
-        # Calculate date threshold in Python (safer than SQL interval casting)
-        cutoff_date = datetime.now() - timedelta(days=90)
+        # Quantities sold in the popularity window (product_sales_daily buckets)
+        popularity = totals_subquery(tenant_id)
         
         # Query for top selling products (tenant-scoped)
         query = (
@@ -31,26 +34,14 @@ def get_top_selling_products(session, tenant_id: int, limit=10):
                 Product.sku.label('sku'),
                 Product.barcode.label('barcode'),
                 func.coalesce(ProductStock.on_hand_qty, Decimal('0')).label('stock'),
-                func.sum(SaleLine.qty).label('total_sold')
+                popularity.c.total_sold.label('total_sold')
             )
-            .join(SaleLine, SaleLine.product_id == Product.id)
-            .join(Sale, Sale.id == SaleLine.sale_id)
+            .join(popularity, popularity.c.product_id == Product.id)
             .outerjoin(ProductStock, ProductStock.product_id == Product.id)
-            .filter(Sale.tenant_id == tenant_id)  # CRITICAL: tenant filter
-            .filter(Sale.status == 'CONFIRMED')  # Only confirmed sales
             .filter(Product.tenant_id == tenant_id)  # CRITICAL: tenant filter
             .filter(Product.active == True)  # Only active products
-            .filter(Sale.datetime >= cutoff_date) # Last 90 days
-            .group_by(
-                Product.id,
-                Product.name,
-                Product.sale_price,
-                Product.image_path,
-                Product.sku,
-                Product.barcode,
-                ProductStock.on_hand_qty
-            )
-            .order_by(desc('total_sold'))
+            .filter(popularity.c.total_sold > 0)
+            .order_by(desc('total_sold'), Product.name)
             .limit(limit)
         )
         
@@ -0,0 +1,94 @@
+"""
+Transaction retry - bounded retries for deadlocks and serialization failures.
+
+Two POS terminals confirming tickets with overlapping products lock the same
+product_stock rows. Every stock locker takes its locks in product_id order,
+which removes the lock-order deadlock between sales; what remains (locks
+taken by triggers, other writers, SERIALIZABLE conflicts) is retried here:
+the whole transaction is rolled back and run again after a short random
+delay (exponential backoff with full jitter), at most MAX_ATTEMPTS times.
+
+Retries, final failures and the time spent acquiring stock locks are
+exported as Prometheus metrics labelled by operation (see blueprints.metrics).
+"""
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TypeVar
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.blueprints.metrics import (
+    db_lock_wait_seconds, db_transaction_retries_total, db_transaction_conflicts_failed_total
+)
+from app.exceptions import ConcurrencyError
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+BASE_DELAY = 0.05  # seconds, doubled per attempt
+
+# PostgreSQL SQLSTATE -> metric reason
+RETRYABLE_SQLSTATES = {
+    '40P01': 'deadlock',
+    '40001': 'serialization',
+}
+
+T = TypeVar('T')
+
+
+def sqlstate(error: BaseException) -> Optional[str]:
+    """PostgreSQL SQLSTATE of a database error (psycopg2 or psycopg 3), else None."""
+    if not isinstance(error, DBAPIError):
+        return None
+    orig = error.orig
+    return getattr(orig, 'pgcode', None) or getattr(orig, 'sqlstate', None)
+
+
+def retry_reason(error: BaseException) -> Optional[str]:
+    """'deadlock' / 'serialization' for retryable database errors, else None."""
+    return RETRYABLE_SQLSTATES.get(sqlstate(error))
+
+
+def run_with_retry(operation: str, session: Session, work: Callable[[], T],
+                   max_attempts: int = MAX_ATTEMPTS, base_delay: float = BASE_DELAY) -> T:
+    """
+    Run a transactional unit of work, retrying it on deadlock / serialization failure.
+
+    work must run the whole transaction (reads included) and commit it, so a
+    retry starts from scratch on a clean session.
+
+    Raises:
+        ConcurrencyError: still conflicting after max_attempts
+    """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return work()
+        except DBAPIError as e:
+            reason = retry_reason(e)
+            if reason is None:
+                raise
+            session.rollback()
+
+            if attempt == max_attempts:
+                db_transaction_conflicts_failed_total.labels(operation=operation, reason=reason).inc()
+                logger.warning(f"[TX] {operation}: {reason} after {attempt} attempts, giving up")
+                raise ConcurrencyError() from e
+
+            db_transaction_retries_total.labels(operation=operation, reason=reason).inc()
+            delay = random.uniform(0, base_delay * 2 ** (attempt - 1))
+            logger.info(f"[TX] {operation}: {reason}, retry {attempt}/{max_attempts - 1} in {delay * 1000:.0f} ms")
+            time.sleep(delay)
+
+
+@contextmanager
+def lock_wait(operation: str) -> Iterator[None]:
+    """Time a lock acquisition block into db_lock_wait_seconds."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        db_lock_wait_seconds.labels(operation=operation).observe(time.perf_counter() - started)
@@ -52,6 +52,29 @@ class Config:
     # Stock Configuration (MEJORA 10 - Stock Filters)
     LOW_STOCK_THRESHOLD = int(os.getenv('LOW_STOCK_THRESHOLD', '10'))
     
+    # Catalog list page size (keyset pagination + infinite scroll)
+    CATALOG_PAGE_SIZE = int(os.getenv('CATALOG_PAGE_SIZE', '50'))
+    
+    # Sales history page size (cursor pagination, newest first)
+    SALES_PAGE_SIZE = int(os.getenv('SALES_PAGE_SIZE', '50'))
+    
+    # Finance ledger page size (cursor pagination, newest first; exports are streamed)
+    LEDGER_PAGE_SIZE = int(os.getenv('LEDGER_PAGE_SIZE', '100'))
+    
+    # Purchase invoice list page size (keyset pagination + infinite scroll)
+    INVOICES_PAGE_SIZE = int(os.getenv('INVOICES_PAGE_SIZE', '50'))
+    
+    # Quote list page size (keyset pagination + infinite scroll)
+    QUOTES_PAGE_SIZE = int(os.getenv('QUOTES_PAGE_SIZE', '50'))
+    
+    # Product search backend: 'auto' (trigram if db/migrations/20261017_product_trigram_search.sql
+    # is applied, LIKE otherwise), 'trigram' or 'like'
+    PRODUCT_SEARCH_BACKEND = os.getenv('PRODUCT_SEARCH_BACKEND', 'auto')
+
+    # Product popularity window (days of product_sales_daily buckets used for
+    # top products and search ordering)
+    POPULARITY_WINDOW_DAYS = int(os.getenv('POPULARITY_WINDOW_DAYS', '90'))
+
     # Business Information (for quotes/invoices)
     BUSINESS_NAME = os.getenv('BUSINESS_NAME', 'Mi Negocio')
     BUSINESS_ADDRESS = os.getenv('BUSINESS_ADDRESS', '')
@@ -101,8 +124,54 @@ class Config:
     CACHE_PRODUCTS_TTL = int(os.getenv('CACHE_PRODUCTS_TTL', '60'))
     CACHE_CATEGORIES_TTL = int(os.getenv('CACHE_CATEGORIES_TTL', '300'))
     CACHE_UOM_TTL = int(os.getenv('CACHE_UOM_TTL', '3600'))
+    CACHE_PRODUCT_CODES_TTL = int(os.getenv('CACHE_PRODUCT_CODES_TTL', '600'))  # Barcode/SKU index (invalidated on product writes)
+    CACHE_CUSTOMERS_TTL = int(os.getenv('CACHE_CUSTOMERS_TTL', '600'))  # POS customer directory (invalidated on customer writes)
+    CUSTOMER_DIRECTORY_MAX_ROWS = int(os.getenv('CUSTOMER_DIRECTORY_MAX_ROWS', '5000'))  # Larger tenants search in PostgreSQL
     CACHE_BALANCE_TTL = int(os.getenv('CACHE_BALANCE_TTL', '60'))
+    CACHE_BALANCE_STALE_TTL = int(os.getenv('CACHE_BALANCE_STALE_TTL', '30'))  # Serve-stale window while recomputing
     CACHE_NEGATIVE_TTL = int(os.getenv('CACHE_NEGATIVE_TTL', '15'))  # For "cache miss"
     CACHE_KEY_PREFIX = os.getenv('CACHE_KEY_PREFIX', 'stock')
+    # memoize stampede protection: recompute lock lease, max wait for another worker's result,
+    # and probabilistic early refresh aggressiveness (0 disables)
+    CACHE_LOCK_LEASE = float(os.getenv('CACHE_LOCK_LEASE', '10'))
+    CACHE_LOCK_WAIT = float(os.getenv('CACHE_LOCK_WAIT', '2'))
+    CACHE_EARLY_REFRESH_BETA = float(os.getenv('CACHE_EARLY_REFRESH_BETA', '1.0'))
+    # Lifetime of per-tenant/module generation counters; must exceed every cache TTL
+    CACHE_GENERATION_TTL = int(os.getenv('CACHE_GENERATION_TTL', str(30 * 86400)))
+    # Payload codec ('msgpack' or 'json'; legacy JSON entries stay readable) and
+    # zlib compression for payloads of at least this many bytes (0 disables)
+    CACHE_CODEC = os.getenv('CACHE_CODEC', 'msgpack')
+    CACHE_COMPRESS_THRESHOLD = int(os.getenv('CACHE_COMPRESS_THRESHOLD', '1024'))
+    
+    # Redis health: circuit breaker fed by real command outcomes (no PING per operation)
+    CACHE_SOCKET_TIMEOUT = float(os.getenv('CACHE_SOCKET_TIMEOUT', '3'))
+    CACHE_BREAKER_FAILURES = int(os.getenv('CACHE_BREAKER_FAILURES', '3'))  # Consecutive failures to open
+    CACHE_BREAKER_BASE_BACKOFF = float(os.getenv('CACHE_BREAKER_BASE_BACKOFF', '1'))  # seconds, doubles per failed probe
+    CACHE_BREAKER_MAX_BACKOFF = float(os.getenv('CACHE_BREAKER_MAX_BACKOFF', '30'))
+    
+    # In-process L1 tier (per worker) in front of Redis, only for the listed modules.
+    # Invalidations are broadcast over pub/sub; the TTL bounds staleness if a broadcast is lost.
+    CACHE_L1_ENABLED = os.getenv('CACHE_L1_ENABLED', 'true').lower() == 'true'
+    CACHE_L1_TTL = int(os.getenv('CACHE_L1_TTL', '5'))
+    CACHE_L1_MAX_ENTRIES = int(os.getenv('CACHE_L1_MAX_ENTRIES', '2048'))
+    CACHE_L1_MODULES = tuple(
+        m.strip() for m in os.getenv('CACHE_L1_MODULES', 'principal,chrome,categories,uom,products,customers').split(',') if m.strip()
+    )
+    # Entries ('{module}:{key}') kept in L1 longer than CACHE_L1_TTL: large read models
+    # whose module invalidation is broadcast, so the TTL only bounds a lost broadcast
+    CACHE_L1_KEY_TTLS = {
+        'products:lookup:codes': CACHE_PRODUCT_CODES_TTL,  # Barcode/SKU index (scanner path)
+    }
+    
+    # Idempotency reservations (SET NX) for sale confirmation and payments: lease of an
+    # in-flight request, and how long a completed request's result is replayed to duplicates
+    IDEMPOTENCY_PENDING_TTL = int(os.getenv('IDEMPOTENCY_PENDING_TTL', '60'))
+    IDEMPOTENCY_RESULT_TTL = int(os.getenv('IDEMPOTENCY_RESULT_TTL', '86400'))
+    
+    # Request principal cache (user active flag, role, tenant suspended flag)
+    CACHE_PRINCIPAL_TTL = int(os.getenv('CACHE_PRINCIPAL_TTL', '300'))
+    
+    # Layout chrome bundle (invoice alerts, tenant name, logo). TTL is also capped at midnight.
+    CACHE_CHROME_TTL = int(os.getenv('CACHE_CHROME_TTL', '300'))
 
 
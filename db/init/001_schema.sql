@@ -11,8 +11,10 @@
 
 BEGIN;
 
--- Optional (recommended) for better product search:
--- CREATE EXTENSION IF NOT EXISTS pg_trgm;
+-- Product search: trigram GIN index, accent-insensitive (see product_search_text below)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
 
 -- =========================
 -- SAAS CORE TABLES
@@ -228,6 +230,7 @@ CREATE TABLE IF NOT EXISTS product (
 
 CREATE INDEX IF NOT EXISTS idx_product_tenant_id ON product(tenant_id);
 CREATE INDEX IF NOT EXISTS idx_product_tenant_name ON product(tenant_id, name);
+CREATE INDEX IF NOT EXISTS idx_product_tenant_name_id ON product(tenant_id, name, id);  -- catalog keyset pagination
 CREATE INDEX IF NOT EXISTS idx_product_tenant_category ON product(tenant_id, category_id);
 CREATE INDEX IF NOT EXISTS idx_product_tenant_active ON product(tenant_id, active);
 CREATE INDEX IF NOT EXISTS idx_product_category ON product(category_id);
@@ -242,6 +245,20 @@ CREATE UNIQUE INDEX IF NOT EXISTS product_tenant_sku_uniq
 CREATE UNIQUE INDEX IF NOT EXISTS product_tenant_barcode_uniq 
     ON product(tenant_id, barcode) WHERE barcode IS NOT NULL;
 
+-- Product search (POS typeahead / catalog): normalized text + trigram GIN index
+CREATE OR REPLACE FUNCTION immutable_unaccent(text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
+CREATE OR REPLACE FUNCTION product_search_text(name text, sku text, barcode text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$ SELECT immutable_unaccent(lower(concat_ws(' ', name, sku, barcode))) $$;
+
+CREATE INDEX IF NOT EXISTS idx_product_search_trgm
+    ON product USING gin (tenant_id, product_search_text(name, sku, barcode) gin_trgm_ops);
+
 -- Stock current snapshot (fast reads)
 CREATE TABLE IF NOT EXISTS product_stock (
   product_id  BIGINT PRIMARY KEY REFERENCES product(id) ON UPDATE RESTRICT ON DELETE CASCADE,
@@ -301,6 +318,18 @@ CREATE TABLE IF NOT EXISTS sale_line (
 CREATE INDEX IF NOT EXISTS idx_sale_line_sale ON sale_line(sale_id);
 CREATE INDEX IF NOT EXISTS idx_sale_line_product ON sale_line(product_id);
 
+-- Popularity buckets: confirmed qty sold per product and day
+-- (maintained by the sale services, read by top products / search ordering)
+CREATE TABLE IF NOT EXISTS product_sales_daily (
+  tenant_id   BIGINT NOT NULL REFERENCES tenant(id) ON DELETE CASCADE,
+  product_id  BIGINT NOT NULL REFERENCES product(id) ON DELETE CASCADE,
+  day         DATE NOT NULL,
+  qty         NUMERIC(14,3) NOT NULL DEFAULT 0,
+  PRIMARY KEY (tenant_id, product_id, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_product_sales_daily_tenant_day ON product_sales_daily(tenant_id, day);
+
 -- Mixed payment methods per sale
 CREATE TABLE IF NOT EXISTS sale_payment (
     id BIGSERIAL PRIMARY KEY,
@@ -367,6 +396,8 @@ CREATE TABLE IF NOT EXISTS supplier (
 
 CREATE INDEX IF NOT EXISTS idx_supplier_tenant_id ON supplier(tenant_id);
 CREATE UNIQUE INDEX IF NOT EXISTS supplier_tenant_name_uniq ON supplier(tenant_id, name);
+CREATE INDEX IF NOT EXISTS idx_supplier_name_trgm
+    ON supplier USING gin (tenant_id, lower(name) gin_trgm_ops);  -- invoice search
 
 CREATE TABLE IF NOT EXISTS purchase_invoice (
   id            BIGSERIAL PRIMARY KEY,
@@ -396,6 +427,14 @@ CREATE INDEX IF NOT EXISTS idx_invoice_status ON purchase_invoice(status);
 CREATE INDEX IF NOT EXISTS idx_invoice_due_date ON purchase_invoice(due_date);
 CREATE INDEX IF NOT EXISTS idx_invoice_date ON purchase_invoice(invoice_date);
 
+-- Invoice search (invoice_search_service) and keyset pagination of the list
+CREATE INDEX IF NOT EXISTS idx_invoice_number_trgm
+    ON purchase_invoice USING gin (tenant_id, lower(invoice_number) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_invoice_tenant_invoice_date ON purchase_invoice(tenant_id, invoice_date);
+CREATE INDEX IF NOT EXISTS idx_invoice_tenant_total ON purchase_invoice(tenant_id, total_amount);
+CREATE INDEX IF NOT EXISTS idx_invoice_tenant_due_order
+    ON purchase_invoice(tenant_id, COALESCE(due_date, '9999-12-31'::date), (-id));
+
 -- Tenant-scoped unique for invoice number per supplier
 CREATE UNIQUE INDEX IF NOT EXISTS purchase_invoice_tenant_supplier_number_uniq 
     ON purchase_invoice(tenant_id, supplier_id, invoice_number);
@@ -414,10 +453,13 @@ CREATE TABLE IF NOT EXISTS purchase_invoice_payment (
     paid_at TIMESTAMPTZ NOT NULL DEFAULT now(),
     notes TEXT,
     created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
-    created_by BIGINT REFERENCES app_user(id)
+    created_by BIGINT REFERENCES app_user(id),
+    idempotency_key VARCHAR(64)
 );
 
 CREATE INDEX IF NOT EXISTS idx_invoice_payment_tenant ON purchase_invoice_payment(tenant_id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_invoice_payment_idempotency
+    ON purchase_invoice_payment(idempotency_key) WHERE idempotency_key IS NOT NULL;
 CREATE INDEX IF NOT EXISTS idx_invoice_payment_invoice ON purchase_invoice_payment(invoice_id);
 CREATE INDEX IF NOT EXISTS idx_invoice_payment_date ON purchase_invoice_payment(paid_at DESC);
 
@@ -559,6 +601,15 @@ CREATE INDEX IF NOT EXISTS idx_quote_customer_phone ON quote(customer_phone);
 CREATE UNIQUE INDEX IF NOT EXISTS quote_tenant_quote_number_uniq 
     ON quote(tenant_id, quote_number);
 
+-- Quote search document (quote_search_service.SEARCH_DOCUMENT) and keyset pagination
+CREATE INDEX IF NOT EXISTS idx_quote_search_trgm
+    ON quote USING gin (
+        tenant_id,
+        lower(quote_number || ' ' || customer_name || ' ' || coalesce(customer_phone, '') || ' ' || coalesce(notes, ''))
+        gin_trgm_ops
+    );
+CREATE INDEX IF NOT EXISTS idx_quote_tenant_issued_id ON quote(tenant_id, issued_at, id);
+
 CREATE TABLE IF NOT EXISTS quote_line (
     id BIGSERIAL PRIMARY KEY,
     quote_id BIGINT NOT NULL REFERENCES quote(id) ON UPDATE RESTRICT ON DELETE CASCADE,
@@ -692,21 +743,51 @@ $$ LANGUAGE plpgsql;
 CREATE OR REPLACE FUNCTION trg_stock_move_line_after_ins()
 RETURNS TRIGGER AS $$
 DECLARE
-  v_type stock_move_type;
-  v_delta NUMERIC(12,3);
+  v_product_ids BIGINT[];
+  v_deltas NUMERIC[];
+  v_negative BIGINT;
 BEGIN
-  SELECT type INTO v_type FROM stock_move WHERE id = NEW.stock_move_id;
+  -- One join to stock_move, one signed delta per product
+  SELECT array_agg(d.product_id ORDER BY d.product_id),
+         array_agg(d.delta ORDER BY d.product_id)
+    INTO v_product_ids, v_deltas
+  FROM (
+    SELECT nl.product_id,
+           SUM(CASE WHEN sm.type = 'OUT' THEN -nl.qty ELSE nl.qty END) AS delta  -- IN / ADJUST: qty as-is
+    FROM new_lines nl
+    JOIN stock_move sm ON sm.id = nl.stock_move_id
+    GROUP BY nl.product_id
+  ) d;
+
+  IF v_product_ids IS NULL THEN
+    RETURN NULL;
+  END IF;
 
-  IF v_type = 'IN' THEN
-    v_delta := NEW.qty;
-  ELSIF v_type = 'OUT' THEN
-    v_delta := -NEW.qty;
-  ELSE
-    v_delta := NEW.qty;
+  -- Lock the snapshot rows in product_id order before reading them
+  PERFORM 1 FROM product_stock
+  WHERE product_id = ANY(v_product_ids)
+  ORDER BY product_id
+  FOR UPDATE;
+
+  SELECT d.product_id INTO v_negative
+  FROM unnest(v_product_ids, v_deltas) AS d(product_id, delta)
+  LEFT JOIN product_stock ps ON ps.product_id = d.product_id
+  WHERE COALESCE(ps.on_hand_qty, 0) + d.delta < 0
+  ORDER BY d.product_id
+  LIMIT 1;
+
+  IF v_negative IS NOT NULL THEN
+    RAISE EXCEPTION 'Stock would become negative for product_id %', v_negative;
   END IF;
 
-  PERFORM apply_stock_delta(NEW.product_id, v_delta);
-  RETURN NEW;
+  INSERT INTO product_stock AS ps (product_id, on_hand_qty, updated_at)
+  SELECT d.product_id, d.delta, now()
+  FROM unnest(v_product_ids, v_deltas) AS d(product_id, delta)
+  ON CONFLICT (product_id) DO UPDATE
+    SET on_hand_qty = ps.on_hand_qty + EXCLUDED.on_hand_qty,
+        updated_at  = now();
+
+  RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -734,7 +815,8 @@ $$ LANGUAGE plpgsql;
 DROP TRIGGER IF EXISTS stock_move_line_after_ins ON stock_move_line;
 CREATE TRIGGER stock_move_line_after_ins
 AFTER INSERT ON stock_move_line
-FOR EACH ROW
+REFERENCING NEW TABLE AS new_lines
+FOR EACH STATEMENT
 EXECUTE FUNCTION trg_stock_move_line_after_ins();
 
 DROP TRIGGER IF EXISTS stock_move_line_after_del ON stock_move_line;
@@ -812,6 +894,11 @@ CREATE TABLE IF NOT EXISTS customer (
 
 CREATE INDEX IF NOT EXISTS idx_customer_tenant_id ON customer(tenant_id);
 CREATE INDEX IF NOT EXISTS idx_customer_search ON customer(tenant_id, name);
+CREATE INDEX IF NOT EXISTS idx_customer_search_trgm
+    ON customer USING gin (
+        tenant_id,
+        immutable_unaccent(lower(name || ' ' || coalesce(tax_id, '') || ' ' || coalesce(phone, ''))) gin_trgm_ops
+    );  -- POS typeahead fallback for large tenants (customer_directory_service)
 CREATE INDEX IF NOT EXISTS idx_customer_is_default ON customer(is_default) WHERE is_default = true;
 CREATE UNIQUE INDEX IF NOT EXISTS idx_customer_tenant_default 
     ON customer(tenant_id) WHERE is_default = true;
@@ -0,0 +1,43 @@
+-- =============================================================================
+-- CUSTOMERS: índice de trigramas para el typeahead del POS
+-- =============================================================================
+-- Fecha: 2026-10-17
+-- Descripción: El selector de clientes del POS busca en un directorio por
+--              tenant cacheado en memoria (customer_directory_service). Los
+--              tenants con más de CUSTOMER_DIRECTORY_MAX_ROWS clientes buscan
+--              en PostgreSQL con
+--              immutable_unaccent(lower(name || tax_id || phone)) LIKE '%q%',
+--              resuelto por este índice GIN de trigramas. Igual que el
+--              directorio en memoria, la búsqueda ignora mayúsculas y acentos.
+-- =============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS btree_gin;  -- tenant_id inside the GIN index
+
+-- Same wrapper as 20261017_product_trigram_search.sql (unaccent() is only STABLE)
+CREATE OR REPLACE FUNCTION immutable_unaccent(text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
+-- CONCURRENTLY: does not block customer writes while building (run outside a transaction)
+-- The expression must match customer_directory_service.SEARCH_DOCUMENT
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_customer_search_trgm
+    ON customer USING gin (
+        tenant_id,
+        immutable_unaccent(lower(name || ' ' || coalesce(tax_id, '') || ' ' || coalesce(phone, ''))) gin_trgm_ops
+    );
+
+-- =============================================================================
+-- Notas de migración:
+-- =============================================================================
+-- 1. Requiere las extensiones contrib pg_trgm, unaccent y btree_gin
+--    (incluidas en la imagen oficial de PostgreSQL).
+-- 2. Para aplicar: psql -U [username] -d [database] -f db/migrations/20261017_customer_search_index.sql
+--    (no usar -1 / --single-transaction: CREATE INDEX CONCURRENTLY no corre en una transacción)
+-- 3. Si se aplicó una versión anterior de esta migración (índice sobre
+--    lower(...) sin unaccent), el índice existente no coincide con la
+--    búsqueda: ejecutar DROP INDEX CONCURRENTLY idx_customer_search_trgm;
+--    y volver a aplicar.
+-- =============================================================================
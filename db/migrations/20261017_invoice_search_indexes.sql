@@ -0,0 +1,45 @@
+-- =============================================================================
+-- PURCHASE INVOICES: índices para búsqueda estructurada y paginación por cursor
+-- =============================================================================
+-- Fecha: 2026-10-17
+-- Descripción: La búsqueda de boletas clasifica el término (fecha, monto,
+--              estado o texto) y genera predicados indexables en lugar de
+--              castear columnas a texto:
+--              - texto: lower(invoice_number) / lower(supplier.name) LIKE '%q%'
+--                con índices GIN de trigramas
+--              - fecha: rangos sobre invoice_date (due_date ya tiene índice)
+--              - monto: rango sobre total_amount
+--              El listado se pagina por cursor sobre
+--              (COALESCE(due_date, '9999-12-31'), -id).
+-- =============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;  -- tenant_id inside the GIN indexes
+
+-- CONCURRENTLY: does not block invoice writes while building (run outside a transaction)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_invoice_number_trgm
+    ON purchase_invoice USING gin (tenant_id, lower(invoice_number) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_supplier_name_trgm
+    ON supplier USING gin (tenant_id, lower(name) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_invoice_tenant_invoice_date
+    ON purchase_invoice(tenant_id, invoice_date);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_invoice_tenant_total
+    ON purchase_invoice(tenant_id, total_amount);
+
+-- Keyset pagination: due date ascending (no due date last), newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_invoice_tenant_due_order
+    ON purchase_invoice(tenant_id, COALESCE(due_date, '9999-12-31'::date), (-id));
+
+-- =============================================================================
+-- Notas de migración:
+-- =============================================================================
+-- 1. Requiere la extensión contrib pg_trgm y btree_gin (incluidas en la imagen
+--    oficial de PostgreSQL).
+-- 2. Para aplicar: psql -U [username] -d [database] -f db/migrations/20261017_invoice_search_indexes.sql
+--    (no usar -1 / --single-transaction: CREATE INDEX CONCURRENTLY no corre en una transacción)
+-- 3. Sin la migración la búsqueda funciona igual (mismos resultados), pero
+--    con scans secuenciales.
+-- =============================================================================
@@ -0,0 +1,34 @@
+-- =============================================================================
+-- PAGOS: clave de idempotencia única en pagos de boletas y cobranzas
+-- =============================================================================
+-- Fecha: 2026-10-17
+-- Descripción: purchase_invoice_payment y payment_log guardan la clave de
+--              idempotencia del formulario, como sale.idempotency_key. La
+--              reserva en Redis (idempotency_service.run_idempotent) evita el
+--              doble envío mientras Redis responde; si Redis no está
+--              disponible o la reserva vence antes de completar, un reenvío
+--              encuentra el pago ya registrado con esa clave y lo devuelve,
+--              y la restricción UNIQUE impide un segundo pago.
+-- =============================================================================
+
+BEGIN;
+
+ALTER TABLE purchase_invoice_payment ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_invoice_payment_idempotency
+    ON purchase_invoice_payment(idempotency_key) WHERE idempotency_key IS NOT NULL;
+
+ALTER TABLE IF EXISTS payment_log ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_payment_log_idempotency
+    ON payment_log(idempotency_key) WHERE idempotency_key IS NOT NULL;
+
+COMMIT;
+
+-- =============================================================================
+-- Notas de migración:
+-- =============================================================================
+-- 1. Aplicar ANTES de desplegar el código que escribe idempotency_key en los
+--    pagos (registrar un pago sin la columna falla).
+-- 2. Para aplicar: psql -U [username] -d [database] -f db/migrations/20261017_payment_idempotency_key.sql
+-- 3. Los pagos existentes quedan con idempotency_key NULL (no participan del
+--    índice único).
+-- =============================================================================
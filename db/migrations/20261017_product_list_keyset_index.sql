@@ -0,0 +1,23 @@
+-- =============================================================================
+-- PRODUCT LIST: keyset pagination index
+-- =============================================================================
+-- Fecha: 2026-10-17
+-- Descripción: El listado del catálogo se pagina por cursor sobre (name, id)
+--              (WHERE tenant_id = ? AND (name, id) > (?, ?) ORDER BY name, id
+--              LIMIT n). Este índice resuelve cada página con un range scan,
+--              sin importar la profundidad del scroll.
+-- =============================================================================
+
+-- CONCURRENTLY: does not block catalog writes while building (run outside a transaction)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_product_tenant_name_id
+    ON product(tenant_id, name, id);
+
+-- =============================================================================
+-- Notas de migración:
+-- =============================================================================
+-- 1. Para aplicar: psql -U [username] -d [database] -f db/migrations/20261017_product_list_keyset_index.sql
+--    (no usar -1 / --single-transaction)
+-- 2. idx_product_tenant_name queda cubierto por este índice; se puede eliminar
+--    luego de verificar los planes:
+--    DROP INDEX CONCURRENTLY IF EXISTS idx_product_tenant_name;
+-- =============================================================================
@@ -0,0 +1,51 @@
+-- =============================================================================
+-- PRODUCT POPULARITY: product_sales_daily buckets
+-- =============================================================================
+-- Fecha: 2026-10-17
+-- Descripción: Cantidad vendida por producto y día (ventas confirmadas),
+--              mantenida incrementalmente por confirm_sale,
+--              confirm_sale_from_draft, adjust_sale y
+--              delete_sale_with_reversal. Los productos más vendidos del POS
+--              y el orden de la búsqueda leen estos buckets en lugar de
+--              agregar todo el historial de sale / sale_line.
+-- =============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS product_sales_daily (
+  tenant_id   BIGINT NOT NULL REFERENCES tenant(id) ON DELETE CASCADE,
+  product_id  BIGINT NOT NULL REFERENCES product(id) ON DELETE CASCADE,
+  day         DATE NOT NULL,
+  qty         NUMERIC(14,3) NOT NULL DEFAULT 0,
+  PRIMARY KEY (tenant_id, product_id, day)
+);
+
+-- Window scans for top products: WHERE tenant_id = ? AND day >= ?
+CREATE INDEX IF NOT EXISTS idx_product_sales_daily_tenant_day
+    ON product_sales_daily(tenant_id, day);
+
+COMMENT ON TABLE product_sales_daily IS 'Confirmed quantity sold per product and day (popularity buckets)';
+
+-- Backfill from the existing confirmed sales
+INSERT INTO product_sales_daily (tenant_id, product_id, day, qty)
+SELECT s.tenant_id, sl.product_id, s.datetime::date, SUM(sl.qty)
+FROM sale s
+JOIN sale_line sl ON sl.sale_id = s.id
+WHERE s.status = 'CONFIRMED'
+GROUP BY s.tenant_id, sl.product_id, s.datetime::date
+ON CONFLICT (tenant_id, product_id, day) DO UPDATE SET qty = EXCLUDED.qty;
+
+COMMIT;
+
+-- =============================================================================
+-- Notas de migración:
+-- =============================================================================
+-- 1. Aplicar ANTES de desplegar el código que escribe en product_sales_daily
+--    (confirmar una venta sin la tabla falla).
+-- 2. Para aplicar: psql -U [username] -d [database] -f db/migrations/20261017_product_sales_daily.sql
+-- 3. Los buckets fuera de la ventana (POPULARITY_WINDOW_DAYS, 90 por defecto)
+--    no se leen; se pueden purgar periódicamente:
+--    DELETE FROM product_sales_daily WHERE day < current_date - 400;
+-- 4. Para reconstruir desde el historial: TRUNCATE product_sales_daily; y
+--    volver a ejecutar el INSERT ... SELECT de arriba.
+-- =============================================================================
@@ -0,0 +1,46 @@
+-- =============================================================================
+-- PRODUCT SEARCH: trigram GIN index for POS / catalog search
+-- =============================================================================
+-- Fecha: 2026-10-17
+-- Descripción: Búsqueda de productos por nombre, SKU y código de barras con
+--              índice GIN de trigramas (pg_trgm), insensible a mayúsculas y
+--              acentos (unaccent) y con ranking por similitud.
+--              La app detecta product_search_text() al iniciar la búsqueda;
+--              si la migración no se aplicó usa el filtro LIKE anterior.
+-- =============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS btree_gin;  -- tenant_id inside the GIN index
+
+-- unaccent() is only STABLE (it depends on the dictionary search path), so it
+-- cannot be used in an index expression. Pin the dictionary and declare the
+-- wrapper IMMUTABLE.
+CREATE OR REPLACE FUNCTION immutable_unaccent(text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
+-- Normalized searchable text: lower-case, no accents, name + SKU + barcode.
+-- The application normalizes the query the same way (product_search_service).
+CREATE OR REPLACE FUNCTION product_search_text(name text, sku text, barcode text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$ SELECT immutable_unaccent(lower(concat_ws(' ', name, sku, barcode))) $$;
+
+-- CONCURRENTLY: does not block POS writes while building (run outside a transaction)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_product_search_trgm
+ON product USING gin (tenant_id, product_search_text(name, sku, barcode) gin_trgm_ops);
+
+-- =============================================================================
+-- Notas de migración:
+-- =============================================================================
+-- 1. Requiere las extensiones contrib pg_trgm, unaccent y btree_gin
+--    (incluidas en la imagen oficial de PostgreSQL).
+-- 2. Para aplicar: psql -U [username] -d [database] -f db/migrations/20261017_product_trigram_search.sql
+--    (no usar -1 / --single-transaction: CREATE INDEX CONCURRENTLY no corre en una transacción)
+-- 3. Para revertir (la app vuelve automáticamente al filtro LIKE):
+--    DROP INDEX CONCURRENTLY IF EXISTS idx_product_search_trgm;
+--    DROP FUNCTION IF EXISTS product_search_text(text, text, text);
+--    DROP FUNCTION IF EXISTS immutable_unaccent(text);
+-- =============================================================================
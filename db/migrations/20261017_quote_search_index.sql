@@ -0,0 +1,37 @@
+-- =============================================================================
+-- QUOTES: documento de búsqueda indexado y paginación por cursor
+-- =============================================================================
+-- Fecha: 2026-10-17
+-- Descripción: La búsqueda de presupuestos usa un único documento
+--              lower(número || cliente || teléfono || notas) con índice GIN de
+--              trigramas (LIKE '%q%'), en lugar de ocho predicados con casts a
+--              texto. Al ser un índice de expresión PostgreSQL lo mantiene en
+--              cada escritura (sin triggers ni columnas extra).
+--              El listado se pagina por cursor sobre (issued_at, id).
+-- =============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;  -- tenant_id inside the GIN index
+
+-- CONCURRENTLY: does not block quote writes while building (run outside a transaction)
+-- The expression must match quote_search_service.SEARCH_DOCUMENT
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_quote_search_trgm
+    ON quote USING gin (
+        tenant_id,
+        lower(quote_number || ' ' || customer_name || ' ' || coalesce(customer_phone, '') || ' ' || coalesce(notes, ''))
+        gin_trgm_ops
+    );
+
+-- Keyset pagination, newest first (scanned backwards)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_quote_tenant_issued_id
+    ON quote(tenant_id, issued_at, id);
+
+-- =============================================================================
+-- Notas de migración:
+-- =============================================================================
+-- 1. Requiere las extensiones contrib pg_trgm y btree_gin (incluidas en la
+--    imagen oficial de PostgreSQL).
+-- 2. Para aplicar: psql -U [username] -d [database] -f db/migrations/20261017_quote_search_index.sql
+--    (no usar -1 / --single-transaction: CREATE INDEX CONCURRENTLY no corre en una transacción)
+-- 3. Sin la migración la búsqueda devuelve los mismos resultados, con scan secuencial.
+-- =============================================================================
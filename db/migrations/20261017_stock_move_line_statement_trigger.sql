@@ -0,0 +1,100 @@
+-- =============================================================================
+-- STOCK SNAPSHOT: statement-level AFTER INSERT trigger on stock_move_line
+-- =============================================================================
+-- Fecha: 2026-10-17
+-- Descripción: El trigger por fila releía stock_move.type y llamaba a
+--              apply_stock_delta() una vez por línea insertada. Ahora un
+--              trigger por sentencia (REFERENCING NEW TABLE) une una sola vez
+--              las líneas nuevas con stock_move, agrega el delta por producto
+--              y actualiza product_stock con un único INSERT ... ON CONFLICT.
+--              Con los INSERT multi-fila de bulk_insert (ventas, compras,
+--              presupuestos, ajustes) el costo queda en una sentencia por
+--              movimiento en lugar de una por línea.
+--
+--              Semántica de signos sin cambios:
+--                IN     -> +qty
+--                OUT    -> -qty
+--                ADJUST -> qty con signo (negativo = reduce, positivo = suma)
+-- =============================================================================
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION trg_stock_move_line_after_ins()
+RETURNS TRIGGER AS $$
+DECLARE
+  v_product_ids BIGINT[];
+  v_deltas NUMERIC[];
+  v_negative BIGINT;
+BEGIN
+  -- One join to stock_move, one signed delta per product
+  SELECT array_agg(d.product_id ORDER BY d.product_id),
+         array_agg(d.delta ORDER BY d.product_id)
+    INTO v_product_ids, v_deltas
+  FROM (
+    SELECT nl.product_id,
+           SUM(CASE WHEN sm.type = 'OUT' THEN -nl.qty ELSE nl.qty END) AS delta  -- IN / ADJUST: qty as-is
+    FROM new_lines nl
+    JOIN stock_move sm ON sm.id = nl.stock_move_id
+    GROUP BY nl.product_id
+  ) d;
+
+  IF v_product_ids IS NULL THEN
+    RETURN NULL;
+  END IF;
+
+  -- Lock the snapshot rows in product_id order before reading them
+  PERFORM 1 FROM product_stock
+  WHERE product_id = ANY(v_product_ids)
+  ORDER BY product_id
+  FOR UPDATE;
+
+  SELECT d.product_id INTO v_negative
+  FROM unnest(v_product_ids, v_deltas) AS d(product_id, delta)
+  LEFT JOIN product_stock ps ON ps.product_id = d.product_id
+  WHERE COALESCE(ps.on_hand_qty, 0) + d.delta < 0
+  ORDER BY d.product_id
+  LIMIT 1;
+
+  IF v_negative IS NOT NULL THEN
+    RAISE EXCEPTION 'Stock would become negative for product_id %', v_negative;
+  END IF;
+
+  INSERT INTO product_stock AS ps (product_id, on_hand_qty, updated_at)
+  SELECT d.product_id, d.delta, now()
+  FROM unnest(v_product_ids, v_deltas) AS d(product_id, delta)
+  ON CONFLICT (product_id) DO UPDATE
+    SET on_hand_qty = ps.on_hand_qty + EXCLUDED.on_hand_qty,
+        updated_at  = now();
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS stock_move_line_after_ins ON stock_move_line;
+CREATE TRIGGER stock_move_line_after_ins
+AFTER INSERT ON stock_move_line
+REFERENCING NEW TABLE AS new_lines
+FOR EACH STATEMENT
+EXECUTE FUNCTION trg_stock_move_line_after_ins();
+
+COMMIT;
+
+-- =============================================================================
+-- Notas de migración:
+-- =============================================================================
+-- 1. Requiere PostgreSQL 10+ (tablas de transición); la imagen usa 14 / 16.
+-- 2. Para aplicar: psql -U [username] -d [database] -f db/migrations/20261017_stock_move_line_statement_trigger.sql
+-- 3. El control de stock negativo se hace sobre el neto de la sentencia por
+--    producto: una misma sentencia con -3 y +5 para un producto sin stock ya
+--    no falla a mitad de camino. Los flujos de la app insertan una línea por
+--    producto y movimiento, así que el resultado es el mismo.
+-- 4. El trigger de DELETE (stock_move_line_after_del) y apply_stock_delta()
+--    no cambian.
+-- 5. Benchmark: python scripts/bench_stock_trigger.py --url postgresql://...
+--    (compara ambos triggers dentro de una transacción que se revierte).
+-- 6. Para revertir, en este orden:
+--    DROP TRIGGER IF EXISTS stock_move_line_after_ins ON stock_move_line;
+--    psql ... -f db/migrations/FIX_stock_adjust_trigger.sql   (función por fila)
+--    CREATE TRIGGER stock_move_line_after_ins AFTER INSERT ON stock_move_line
+--    FOR EACH ROW EXECUTE FUNCTION trg_stock_move_line_after_ins();
+-- =============================================================================
@@ -0,0 +1,121 @@
+"""
+Benchmark: per-object session.add vs bulk_insert for the rows of a ticket.
+
+Usage:
+    python scripts/bench_bulk_write.py [--url postgresql://...] [--lines 1 10 50 200] [--repeat 20]
+
+Writes a synthetic ticket (sale, N sale lines, stock move, N stock move lines,
+2 ledger entries) both ways and prints the time per ticket and the number of
+INSERT statements. Without --url it runs on an in-memory SQLite database;
+with --url it uses an existing schema (e.g. the docker PostgreSQL) and rolls
+everything back at the end.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import BigInteger, create_engine, event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import (
+    UOM, FinanceLedger, LedgerReferenceType, LedgerType, Product, Sale, SaleLine,
+    StockMove, StockMoveLine, StockMoveType, StockReferenceType, Tenant
+)
+from app.services.bulk_write import bulk_insert
+
+
+@compiles(BigInteger, 'sqlite')
+def _sqlite_bigint(type_, compiler, **kw):
+    return 'INTEGER'  # SQLite only autoincrements INTEGER PRIMARY KEY
+
+
+def setup_catalog(session, products):
+    tenant = Tenant(slug=f'bench-bulk-{time.time_ns()}', name='Bench bulk write', active=True)
+    session.add(tenant)
+    session.flush()
+    uom = UOM(tenant_id=tenant.id, name='Unidad', symbol='u')
+    session.add(uom)
+    session.flush()
+    items = [Product(tenant_id=tenant.id, name=f'Producto {i}', uom_id=uom.id, active=True,
+                     sale_price=Decimal('10.00'), cost=Decimal('5.00')) for i in range(products)]
+    session.add_all(items)
+    session.flush()
+    return tenant.id, [(p.id, p.uom_id) for p in items]
+
+
+def write_ticket(session, tenant_id, products, bulk):
+    sale = Sale(tenant_id=tenant_id, datetime=datetime.now(), total=Decimal('10.00') * len(products),
+                status='CONFIRMED')
+    session.add(sale)
+    session.flush()
+    move = StockMove(tenant_id=tenant_id, date=sale.datetime, type=StockMoveType.IN,
+                     reference_type=StockReferenceType.SALE, reference_id=sale.id)
+    session.add(move)
+    session.flush()
+
+    sale_lines = [{'sale_id': sale.id, 'product_id': pid, 'qty': Decimal('1'), 'unit_price': Decimal('10.00'),
+                   'line_total': Decimal('10.00')} for pid, _ in products]
+    move_lines = [{'stock_move_id': move.id, 'product_id': pid, 'qty': Decimal('1'), 'uom_id': uom_id}
+                  for pid, uom_id in products]
+    ledger = [{'tenant_id': tenant_id, 'datetime': sale.datetime, 'type': LedgerType.INCOME,
+               'amount': Decimal('5.00'), 'category': 'Ventas', 'reference_type': LedgerReferenceType.SALE,
+               'reference_id': sale.id, 'payment_method': method} for method in ('CASH', 'CARD')]
+
+    for model, rows in ((SaleLine, sale_lines), (StockMoveLine, move_lines), (FinanceLedger, ledger)):
+        if bulk:
+            bulk_insert(session, model, rows)
+        else:
+            session.add_all([model(**row) for row in rows])
+    session.flush()
+
+
+def bench(session, statements, tenant_id, products, bulk, repeat):
+    write_ticket(session, tenant_id, products, bulk)  # warm up
+    statements.clear()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        write_ticket(session, tenant_id, products, bulk)
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    inserts = sum(1 for s in statements if s.lstrip().upper().startswith('INSERT')) / repeat
+    return elapsed, inserts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='sqlite://')
+    parser.add_argument('--lines', type=int, nargs='+', default=[1, 10, 50, 200])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    if engine.dialect.name == 'sqlite':
+        Base.metadata.create_all(engine, tables=[model.__table__ for model in (
+            Tenant, UOM, Product, Sale, SaleLine, StockMove, StockMoveLine, FinanceLedger)])
+    statements = []
+    event.listen(engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        tenant_id, products = setup_catalog(session, max(args.lines))
+        print(f'{engine.dialect.name}, {args.repeat} tickets per size')
+        for count in args.lines:
+            for label, bulk in (('session.add', False), ('bulk_insert', True)):
+                elapsed, inserts = bench(session, statements, tenant_id, products[:count], bulk, args.repeat)
+                print(f'  {count:4d} lines  {label:<12} {elapsed:8.2f} ms/ticket   {inserts:6.1f} INSERTs/ticket')
+    finally:
+        session.rollback()
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Micro-benchmark: cache payload codecs vs the legacy JSON serializer.
+
+Usage:
+    python scripts/bench_cache_codec.py [--rows 365] [--products 500] [--repeat 200]
+
+Prints encode/decode time per call, stored size and whether dates survive
+the round-trip, for a balance series (dates + Decimals) and a product list.
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.cache_codec import FramedCodec, msgpack
+
+
+def legacy_serialize(value):
+    """Serializer used by CacheService before the codec layer."""
+    def default_handler(obj):
+        if isinstance(obj, (datetime, date)):
+            return obj.isoformat()
+        elif isinstance(obj, Decimal):
+            return {"__decimal__": str(obj)}
+        raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+    return json.dumps(value, default=default_handler)
+
+
+def legacy_deserialize(value):
+    def object_hook(dct):
+        if "__decimal__" in dct:
+            return Decimal(dct["__decimal__"])
+        return dct
+    return json.loads(value, object_hook=object_hook)
+
+
+def balance_series(rows):
+    start = date(2025, 1, 1)
+    return [
+        {
+            'period': start + timedelta(days=i),
+            'income': Decimal('1520.35') + i,
+            'expense': Decimal('830.10') + i,
+            'net': Decimal('690.25'),
+        }
+        for i in range(rows)
+    ]
+
+
+def product_list(count):
+    return [
+        {
+            'id': i,
+            'name': f'Producto de prueba {i}',
+            'sku': f'SKU-{i:06d}',
+            'sale_price': Decimal('199.90') + i,
+            'on_hand': Decimal('12.500'),
+            'category': 'Bebidas',
+            'active': True,
+            'updated_at': datetime(2025, 3, 1, 12, 30) + timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def bench(label, encode, decode, value, repeat):
+    encoded = encode(value)
+    # Legacy JSON returns dates as ISO strings, so it is not lossless
+    lossless = 'yes' if decode(encoded) == value else 'no'
+    enc = timeit.timeit(lambda: encode(value), number=repeat) / repeat * 1e6
+    dec = timeit.timeit(lambda: decode(encoded), number=repeat) / repeat * 1e6
+    size = len(encoded.encode('utf-8') if isinstance(encoded, str) else encoded)
+    print(f'  {label:<22} encode {enc:9.1f} us   decode {dec:9.1f} us   {size:8d} bytes   lossless {lossless}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=365)
+    parser.add_argument('--products', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    codecs = [('legacy json', legacy_serialize, legacy_deserialize)]
+    for name in ('json', 'msgpack'):
+        if name == 'msgpack' and msgpack is None:
+            print('msgpack not installed: skipping msgpack codec')
+            continue
+        for threshold in (0, 1024):
+            codec = FramedCodec(name, compress_threshold=threshold)
+            label = f'{name}{"+zlib" if threshold else ""}'
+            codecs.append((label, codec.encode, codec.decode))
+
+    for title, value in (
+        (f'Balance series ({args.rows} rows)', balance_series(args.rows)),
+        (f'Product list ({args.products} items)', product_list(args.products)),
+    ):
+        print(title)
+        for label, encode, decode in codecs:
+            bench(label, encode, decode, value, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -60,6 +60,19 @@ class TestProductIsolation:
         
         assert tenant1_product.id == product1.id
         assert tenant1_product.sale_price == 100
+    
+    def test_product_list_page_is_tenant_scoped(self, app, session, product_tenant1, product_tenant2):
+        """Test that the catalog list page and its cached lookups only contain the tenant's rows."""
+        from app.services.catalog_read_service import get_product_page
+        from app.blueprints.catalog import invalidate_products_cache
+        
+        with app.app_context():
+            invalidate_products_cache(product_tenant1.tenant_id)
+            page = get_product_page(session, product_tenant1.tenant_id, with_count=True)
+        
+        assert [p['id'] for p in page['items']] == [product_tenant1.id]
+        assert page['items'][0]['category']['id'] == product_tenant1.category_id
+        assert page['total'] == {'count': 1, 'exact': True}
 
 
 class TestSaleIsolation:
@@ -0,0 +1,40 @@
+"""
+Shared fixtures for unit tests on an in-memory SQLite database.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+
+
+def _sqlite_engine():
+    engine = create_engine('sqlite://')
+    # BIGINT primary keys do not autoincrement on SQLite, INTEGER PRIMARY KEY does.
+    # Scoped to this engine's type compiler, not registered process-wide.
+    engine.dialect.type_compiler_instance.visit_big_integer = lambda type_, **kw: 'INTEGER'
+    return engine
+
+
+@pytest.fixture
+def sqlite_session():
+    """
+    Factory: sqlite_session(*tables, autoflush=True) -> Session.
+
+    Creates a fresh in-memory database holding only the given tables (models
+    or Table objects); every session is closed at teardown. The engine is
+    session.get_bind().
+    """
+    sessions = []
+
+    def make(*tables, autoflush=True):
+        engine = _sqlite_engine()
+        Base.metadata.create_all(engine, tables=[getattr(t, '__table__', t) for t in tables])
+        session = sessionmaker(bind=engine, autoflush=autoflush)()
+        sessions.append(session)
+        return session
+
+    yield make
+    for session in sessions:
+        session.close()
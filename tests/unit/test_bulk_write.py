@@ -0,0 +1,49 @@
+"""
+Unit tests for the bulk insert helper (SQLite in memory).
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.models import Sale, SaleLine, Tenant
+from app.services.bulk_write import bulk_insert
+
+
+@pytest.fixture
+def db(sqlite_session):
+    session = sqlite_session(Tenant, Sale, SaleLine, autoflush=False)
+    statements = []
+    event.listen(session.get_bind(), 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return session, statements
+
+
+def _rows(count):
+    return [{'id': i, 'sale_id': 1, 'product_id': i, 'qty': Decimal(i),
+             'unit_price': Decimal('2.50'), 'line_total': Decimal('2.50') * i} for i in range(1, count + 1)]
+
+
+class TestBulkInsert:
+    """Tests for single-statement inserts of child rows."""
+
+    @pytest.mark.parametrize('count', [1, 50])
+    def test_one_statement_per_table(self, db, count):
+        session, statements = db
+        session.add(Sale(id=1, tenant_id=1, datetime=datetime.now(), total=Decimal('10'), status='CONFIRMED'))
+
+        bulk_insert(session, SaleLine, _rows(count))
+
+        assert len([s for s in statements if s.startswith('INSERT INTO sale_line')]) == 1
+        assert session.query(SaleLine).count() == count
+        assert session.query(Sale).count() == 1  # pending parent flushed first
+
+    def test_no_rows_is_a_no_op(self, db):
+        session, statements = db
+        session.add(Sale(id=1, tenant_id=1, datetime=datetime.now(), total=Decimal('10'), status='CONFIRMED'))
+
+        bulk_insert(session, SaleLine, [])
+
+        assert statements == []
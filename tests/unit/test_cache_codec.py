@@ -0,0 +1,68 @@
+"""
+Unit tests for cache payload codecs.
+"""
+
+import json
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from app.services.cache_codec import FramedCodec, CodecError, msgpack
+
+
+SAMPLE = {
+    'period': date(2025, 1, 31),
+    'updated_at': datetime(2025, 1, 31, 18, 45, 10),
+    'total': Decimal('1520.35'),
+    'rows': [{'qty': Decimal('0.500'), 'name': 'Yerba'}],
+}
+
+
+class TestFramedCodec:
+    """Tests for framing, compression and legacy compatibility."""
+
+    def test_msgpack_round_trip_preserves_types(self):
+        pytest.importorskip('msgpack')
+        codec = FramedCodec('msgpack', compress_threshold=0)
+
+        assert codec.decode(codec.encode(SAMPLE)) == SAMPLE
+
+    def test_json_round_trip_keeps_decimals(self):
+        codec = FramedCodec('json', compress_threshold=0)
+        decoded = codec.decode(codec.encode(SAMPLE))
+
+        assert decoded['total'] == Decimal('1520.35')
+        assert decoded['period'] == '2025-01-31'
+
+    def test_large_payload_is_compressed(self):
+        codec = FramedCodec('json', compress_threshold=64)
+        value = [{'name': 'Producto', 'price': Decimal('10.00')}] * 50
+        encoded = codec.encode(value)
+
+        assert encoded[2:3] == b'z'
+        assert codec.decode(encoded) == value
+
+    def test_reads_legacy_json_entries(self):
+        codec = FramedCodec('msgpack')
+        legacy = json.dumps({'total': {'__decimal__': '9.99'}, 'items': [1, 2]})
+
+        assert codec.decode(legacy) == {'total': Decimal('9.99'), 'items': [1, 2]}
+        assert codec.decode(legacy.encode('utf-8'))['total'] == Decimal('9.99')
+
+    def test_reads_entries_written_by_other_codec(self):
+        pytest.importorskip('msgpack')
+        written = FramedCodec('json').encode({'a': Decimal('1.5')})
+
+        assert FramedCodec('msgpack').decode(written) == {'a': Decimal('1.5')}
+
+    def test_corrupt_payload_raises_codec_error(self):
+        with pytest.raises(CodecError):
+            FramedCodec('json').decode(b'\x00jz-not-zlib')
+
+    def test_unknown_codec_name_is_rejected(self):
+        with pytest.raises(ValueError):
+            FramedCodec('pickle')
+
+    def test_missing_msgpack_falls_back_to_json(self):
+        if msgpack is not None:
+            pytest.skip('msgpack installed')
+        assert FramedCodec('msgpack').name == 'json'
@@ -0,0 +1,346 @@
+"""
+Unit tests for CacheService (no Redis server required; fakeredis runs the Lua scripts).
+"""
+
+import json
+import fakeredis
+import pytest
+from flask import Flask
+from app.services.cache_service import CacheService, LocalLRUCache, CircuitBreaker
+
+
+@pytest.fixture
+def cache_app():
+    """Minimal Flask app with L1 enabled and Redis unreachable."""
+    app = Flask(__name__)
+    app.config.update(
+        CACHE_ENABLED=True,
+        CACHE_KEY_PREFIX='test',
+        REDIS_URL='redis://127.0.0.1:1/0',
+        CACHE_L1_TTL=30,
+        CACHE_L1_MAX_ENTRIES=3,
+        CACHE_L1_MODULES=('categories',),
+    )
+    return app
+
+
+@pytest.fixture
+def cache(cache_app):
+    with cache_app.app_context():
+        yield CacheService(cache_app)
+
+
+class TestLocalLRUCache:
+    """Tests for the in-process L1 tier."""
+
+    def test_evicts_least_recently_used(self):
+        lru = LocalLRUCache(max_entries=2, ttl=30)
+        lru.set((1, 'm', 'a'), 1)
+        lru.set((1, 'm', 'b'), 2)
+        lru.get((1, 'm', 'a'))
+        lru.set((1, 'm', 'c'), 3)
+
+        assert lru.get((1, 'm', 'a')) == 1
+        assert lru.get((1, 'm', 'b')) is None
+        assert lru.get((1, 'm', 'c')) == 3
+
+    def test_ttl_is_capped_and_expires(self, monkeypatch):
+        import app.services.cache_service as cs
+        now = [100.0]
+        monkeypatch.setattr(cs.time, 'monotonic', lambda: now[0])
+        lru = LocalLRUCache(max_entries=10, ttl=5)
+        lru.set((1, 'm', 'a'), 'v', ttl=60)
+
+        now[0] += 4
+        assert lru.get((1, 'm', 'a')) == 'v'
+        now[0] += 2
+        assert lru.get((1, 'm', 'a')) is None
+
+    def test_max_ttl_overrides_the_cap(self, monkeypatch):
+        import app.services.cache_service as cs
+        now = [100.0]
+        monkeypatch.setattr(cs.time, 'monotonic', lambda: now[0])
+        lru = LocalLRUCache(max_entries=10, ttl=5)
+        lru.set((1, 'm', 'index'), 'v', ttl=600, max_ttl=600)
+
+        now[0] += 300
+        assert lru.get((1, 'm', 'index')) == 'v'
+
+    def test_delete_module_is_tenant_scoped(self):
+        lru = LocalLRUCache()
+        lru.set((1, 'products', 'a'), 1)
+        lru.set((1, 'categories', 'a'), 2)
+        lru.set((2, 'products', 'a'), 3)
+        lru.delete_module(1, 'products')
+
+        assert lru.get((1, 'products', 'a')) is None
+        assert lru.get((1, 'categories', 'a')) == 2
+        assert lru.get((2, 'products', 'a')) == 3
+
+
+class TestCacheServiceL1:
+    """Tests for the L1 tier inside CacheService."""
+
+    def test_l1_serves_without_redis(self, cache):
+        cache.set(1, 'categories', 'list', [{'id': 1}], ttl=60)
+
+        assert cache.get(1, 'categories', 'list') == [{'id': 1}]
+        assert cache.stats()['l1_hits'] == 1
+
+    def test_key_ttl_override_outlives_the_l1_ttl(self, cache_app, monkeypatch):
+        import app.services.cache_service as cs
+        now = [100.0]
+        monkeypatch.setattr(cs.time, 'monotonic', lambda: now[0])
+        cache_app.config['CACHE_L1_KEY_TTLS'] = {'categories:lookup:codes': 600}
+        with cache_app.app_context():
+            cache = CacheService(cache_app)
+            cache.set(1, 'categories', 'lookup:codes', {'7791': 1}, ttl=600)
+            cache.set(1, 'categories', 'list', [1], ttl=600)
+
+            now[0] += 60
+            assert cache.get(1, 'categories', 'lookup:codes') == {'7791': 1}
+            assert cache.get(1, 'categories', 'list') is None
+
+            cache.invalidate_module(1, 'categories')
+            assert cache.get(1, 'categories', 'lookup:codes') is None
+
+    def test_non_l1_module_is_not_cached_locally(self, cache):
+        cache.set(1, 'balance', 'series', [1, 2], ttl=60)
+
+        assert cache.get(1, 'balance', 'series') is None
+
+    def test_invalidate_module_drops_l1(self, cache):
+        cache.set(1, 'categories', 'list', [1], ttl=60)
+        cache.invalidate_module(1, 'categories')
+
+        assert cache.get(1, 'categories', 'list') is None
+
+    def test_invalidation_message_drops_l1(self, cache):
+        cache.set(1, 'categories', 'list', [1], ttl=60)
+        cache.set(1, 'categories', 'tree', [2], ttl=60)
+        cache._on_invalidation({'data': json.dumps({'tenant_id': 1, 'module': 'categories', 'key': 'list'})})
+
+        assert cache.get(1, 'categories', 'list') is None
+        assert cache.get(1, 'categories', 'tree') == [2]
+
+    def test_value_loaded_under_old_generation_skips_l1(self, cache, monkeypatch):
+        current = [b'4']
+        monkeypatch.setattr(cache, 'is_available', lambda: True)
+        monkeypatch.setattr(cache, '_set_script', lambda keys, args: [args[4] or current[0], current[0]])
+
+        # Loaded under generation 3, module invalidated to 4 before the write
+        assert cache.set(1, 'categories', 'list', ['old'], ttl=60, generation=b'3')
+        assert cache.l1.get((1, 'categories', 'list')) is None
+
+        assert cache.set(1, 'categories', 'list', ['new'], ttl=60, generation=b'4')
+        assert cache.l1.get((1, 'categories', 'list')) == ['new']
+
+
+class TestGenerations:
+    """Tests for generation-scoped keys and the Lua scripts (fakeredis)."""
+
+    @pytest.fixture
+    def redis_cache(self, cache_app, monkeypatch):
+        import app.services.cache_service as cs
+        server = fakeredis.FakeServer()
+        monkeypatch.setattr(cs.redis, 'from_url', lambda url, **kwargs: fakeredis.FakeRedis(server=server))
+        with cache_app.app_context():
+            cache = CacheService(cache_app)
+            yield cache
+            if cache._listener is not None:
+                cache._listener.stop()
+
+    def test_invalidate_module_is_a_single_incr(self, redis_cache, monkeypatch):
+        redis_cache.set(1, 'balance', 'series', [1], ttl=60)
+        keys_before = set(redis_cache.client.keys('*'))
+        commands = []
+        pipeline = redis_cache.client.pipeline
+
+        def recording_pipeline(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            execute = pipe.execute
+
+            def run(*exec_args, **exec_kwargs):
+                commands.extend(command_args[0] for command_args, _ in pipe.command_stack)
+                return execute(*exec_args, **exec_kwargs)
+            pipe.execute = run
+            return pipe
+        monkeypatch.setattr(redis_cache.client, 'pipeline', recording_pipeline)
+
+        assert redis_cache.invalidate_module(1, 'balance') == 1
+        assert commands == ['INCRBY', 'EXPIRE']  # redis-py sends INCR as INCRBY 1
+        # Old entries are left to their TTL, not scanned or deleted
+        assert keys_before <= set(redis_cache.client.keys('*'))
+
+    def test_old_generation_entries_are_not_visible(self, redis_cache):
+        redis_cache.set(1, 'balance', 'series', [1], ttl=60)
+        redis_cache.set(2, 'balance', 'series', [2], ttl=60)
+        redis_cache.invalidate_module(1, 'balance')
+
+        assert redis_cache.get(1, 'balance', 'series') is None
+        assert redis_cache.get(2, 'balance', 'series') == [2]
+        redis_cache.set(1, 'balance', 'series', [3], ttl=60)
+        assert redis_cache.get(1, 'balance', 'series') == [3]
+
+    def test_set_with_stale_generation_is_not_visible(self, redis_cache):
+        for module in ('balance', 'categories'):
+            _, generation = redis_cache._get_entry(1, module, 'list')
+            redis_cache.invalidate_module(1, module)
+            redis_cache.set(1, module, 'list', ['stale'], ttl=60, generation=generation)
+
+            assert redis_cache.get(1, module, 'list') is None
+        assert redis_cache.l1.get((1, 'categories', 'list')) is None
+
+        _, generation = redis_cache._get_entry(1, 'categories', 'list')
+        redis_cache.set(1, 'categories', 'list', ['fresh'], ttl=60, generation=generation)
+        assert redis_cache.get(1, 'categories', 'list') == ['fresh']
+
+
+class TestCircuitBreaker:
+    """Tests for the Redis health circuit breaker."""
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        import app.services.cache_service as cs
+        now = [100.0]
+        monkeypatch.setattr(cs.time, 'monotonic', lambda: now[0])
+        return now
+
+    def test_opens_after_consecutive_failures(self, clock):
+        breaker = CircuitBreaker(failure_threshold=2, base_backoff=1.0)
+        breaker.record_failure()
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+
+    def test_half_open_allows_single_probe(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, base_backoff=1.0)
+        breaker.record_failure()
+        clock[0] += 1.0
+
+        assert breaker.allow_request()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow_request()
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow_request()
+
+    def test_failed_probe_doubles_backoff(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, base_backoff=1.0, max_backoff=3.0)
+        breaker.record_failure()
+        clock[0] += 1.0
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+        clock[0] += 1.5
+        assert not breaker.allow_request()
+        clock[0] += 0.5
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+        clock[0] += 3.0
+        assert breaker.allow_request()
+
+    def test_unreachable_redis_fails_fast(self, cache):
+        assert cache.breaker.state == CircuitBreaker.OPEN
+        assert cache.get(1, 'balance', 'series') is None
+        assert cache.stats()['breaker_state'] == CircuitBreaker.OPEN
+
+
+class TestMemoize:
+    """Tests for memoize stampede protection helpers."""
+
+    def test_loader_runs_when_redis_is_down(self, cache):
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return {'total': 10}
+
+        assert cache.memoize(1, 'balance', 'series', loader, ttl=60) == {'total': 10}
+        assert cache.memoize(1, 'balance', 'series', loader, ttl=60) == {'total': 10}
+        assert len(calls) == 2
+
+    def test_l1_module_memoize_returns_value_not_envelope(self, cache):
+        cache.memoize(1, 'categories', 'list', lambda: [1, 2], ttl=60)
+
+        assert cache.memoize(1, 'categories', 'list', lambda: [3], ttl=60) == [1, 2]
+
+    def test_should_refresh_after_logical_expiry(self, monkeypatch):
+        import app.services.cache_service as cs
+        monkeypatch.setattr(cs.time, 'time', lambda: 1000.0)
+
+        assert CacheService._should_refresh({'exp': 999.0, 'delta': 0}, beta=0)
+        assert not CacheService._should_refresh({'exp': 1010.0, 'delta': 0}, beta=0)
+
+    def test_early_refresh_is_weighted_by_loader_time(self, monkeypatch):
+        import app.services.cache_service as cs
+        monkeypatch.setattr(cs.time, 'time', lambda: 1000.0)
+        monkeypatch.setattr(cs.random, 'random', lambda: 0.5)
+
+        # -ln(0.5) ~= 0.69: a 20s loader refreshes 10s early, a 1s loader does not
+        assert CacheService._should_refresh({'exp': 1010.0, 'delta': 20.0}, beta=1.0)
+        assert not CacheService._should_refresh({'exp': 1010.0, 'delta': 1.0}, beta=1.0)
+
+
+class TestBatchApi:
+    """Tests for get_many / set_many / memoize_many."""
+
+    def test_get_many_serves_l1_hits_only(self, cache):
+        cache.set(1, 'categories', 'list', [1], ttl=60)
+
+        assert cache.get_many(1, [('categories', 'list'), ('categories', 'tree'), ('balance', 's')]) == {
+            ('categories', 'list'): [1]
+        }
+
+    def test_memoize_many_loads_misses_and_stores_l1(self, cache):
+        calls = []
+
+        def loader(value):
+            def load():
+                calls.append(value)
+                return value
+            return load
+
+        loaders = {
+            ('categories', 'list'): (loader('cats'), 60),
+            ('balance', 's'): (loader('bal'), 30),
+        }
+        assert cache.memoize_many(1, loaders) == {('categories', 'list'): 'cats', ('balance', 's'): 'bal'}
+        assert cache.memoize_many(1, loaders) == {('categories', 'list'): 'cats', ('balance', 's'): 'bal'}
+        assert calls == ['cats', 'bal', 'bal']
+
+    def test_get_unwraps_memoize_envelope(self, cache):
+        cache.memoize(1, 'categories', 'list', lambda: [1, 2], ttl=60)
+
+        assert cache.get(1, 'categories', 'list') == [1, 2]
+        assert cache.get_many(1, [('categories', 'list')]) == {('categories', 'list'): [1, 2]}
+
+
+class TestCacheMetrics:
+    """Tests for Prometheus cache metrics."""
+
+    def test_l1_lookups_are_counted_by_module(self, cache):
+        from prometheus_client import REGISTRY
+        labels = {'module': 'categories', 'tier': 'l1'}
+        hits = REGISTRY.get_sample_value('cache_hits_total', labels) or 0
+        misses = REGISTRY.get_sample_value('cache_misses_total', labels) or 0
+
+        cache.get(1, 'categories', 'list')
+        cache.set(1, 'categories', 'list', [1], ttl=60)
+        cache.get(1, 'categories', 'list')
+
+        assert REGISTRY.get_sample_value('cache_hits_total', labels) == hits + 1
+        assert REGISTRY.get_sample_value('cache_misses_total', labels) == misses + 1
+
+    def test_invalidations_are_counted(self, cache):
+        from prometheus_client import REGISTRY
+        labels = {'module': 'categories', 'scope': 'module'}
+        before = REGISTRY.get_sample_value('cache_invalidations_total', labels) or 0
+
+        cache.invalidate_module(1, 'categories')
+
+        assert REGISTRY.get_sample_value('cache_invalidations_total', labels) == before + 1
@@ -0,0 +1,79 @@
+"""
+Unit tests for catalog read models (SQLite in memory, uncached path).
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+from app.models import Category, Product, ProductStock, Tenant, UOM
+from app.services import cache_service
+from app.services.catalog_read_service import find_product_by_code, get_product_page
+
+
+def _product(id, name, sku=None, barcode=None, active=True):
+    now = datetime.now()
+    return Product(id=id, tenant_id=1, name=name, sku=sku, barcode=barcode, uom_id=1,
+                   sale_price=Decimal('1'), active=active, is_unlimited_stock=False,
+                   min_stock_qty=0, created_at=now, updated_at=now)
+
+
+@pytest.fixture
+def db(monkeypatch, sqlite_session):
+    monkeypatch.setattr(cache_service, '_cache_service', None)  # direct loads
+    session = sqlite_session(Tenant, UOM, Category, Product, ProductStock)
+    session.add(UOM(id=1, tenant_id=1, name='Unidad', symbol='u', created_at=datetime.now()))
+    session.add_all([
+        _product(1, 'Agua', sku='AGUA-500', barcode='7790001'),
+        _product(2, 'Pan', sku='7790001'),
+        _product(3, 'Soda', barcode='ABC-9', active=False),
+    ])
+    session.commit()
+    app = Flask(__name__)
+    app.config['PRODUCT_SEARCH_BACKEND'] = 'like'
+    with app.app_context():
+        yield session
+
+
+class TestFindProductByCode:
+    """Tests for exact code lookups."""
+
+    def test_barcode_wins_over_sku(self, db):
+        assert find_product_by_code(db, 1, '7790001')['id'] == 1
+        assert find_product_by_code(db, 1, '7790001', fields=('sku',))['id'] == 2
+
+    def test_lookup_is_case_and_space_insensitive(self, db):
+        assert find_product_by_code(db, 1, '  agua-500 ')['name'] == 'Agua'
+        assert find_product_by_code(db, 1, 'abc-9')['active'] is False
+
+    def test_unknown_code_or_tenant(self, db):
+        assert find_product_by_code(db, 1, 'nope') is None
+        assert find_product_by_code(db, 1, '   ') is None
+        assert find_product_by_code(db, 2, '7790001') is None
+
+
+class TestProductPage:
+    """Tests for the keyset-paginated catalog list."""
+
+    def test_pages_follow_name_then_id(self, db):
+        db.add_all([_product(4, 'Agua'), _product(5, 'Yerba')])
+        db.commit()
+
+        first = get_product_page(db, 1, limit=2, with_count=True)
+        second = get_product_page(db, 1, limit=2, cursor=first['next_cursor'])
+        third = get_product_page(db, 1, limit=2, cursor=second['next_cursor'])
+
+        assert [p['id'] for p in first['items']] == [1, 4]
+        assert [p['id'] for p in second['items']] == [2, 3]
+        assert [p['id'] for p in third['items']] == [5]
+        assert third['next_cursor'] is None
+        assert first['total'] == {'count': 5, 'exact': True}
+        assert first['items'][0]['uom']['symbol'] == 'u'
+
+    def test_search_and_stock_filters(self, db):
+        page = get_product_page(db, 1, search_query='7790', stock_filter='out', with_count=True)
+
+        assert [p['id'] for p in page['items']] == [1, 2]
+        assert page['items'][0]['on_hand_qty'] == 0
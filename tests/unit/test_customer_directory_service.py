@@ -0,0 +1,80 @@
+"""
+Unit tests for the POS customer directory and default customer (SQLite in memory, uncached path).
+"""
+
+import unicodedata
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from app.models import Customer, Tenant
+from app.services import cache_service
+from app.services.customer_directory_service import search_customers
+from app.services.customer_service import get_default_customer
+
+
+@pytest.fixture
+def db(monkeypatch, sqlite_session):
+    monkeypatch.setattr(cache_service, '_cache_service', None)  # direct loads
+    session = sqlite_session(Tenant, Customer)
+    now = datetime.now()
+    rows = [
+        (1, 'Consumidor Final', None, None),
+        (2, 'José Martínez', '20-12345678-9', '351-4444'),
+        (3, 'Almacén Don José', None, '351-9999'),
+        (4, 'Marta Pérez', '27-11111111-1', None),
+    ]
+    for id, name, tax_id, phone in rows:
+        session.add(Customer(id=id, tenant_id=1, name=name, tax_id=tax_id, phone=phone,
+                             active=True, is_default=id == 1, created_at=now, updated_at=now))
+    session.add(Customer(id=9, tenant_id=2, name='José Otro', active=True, is_default=False,
+                         created_at=now, updated_at=now))
+    session.commit()
+    app = Flask(__name__)
+    with app.app_context():
+        yield app, session
+
+
+def _unaccent(value):
+    """SQLite stand-in for PostgreSQL immutable_unaccent()."""
+    return ''.join(ch for ch in unicodedata.normalize('NFKD', value) if not unicodedata.combining(ch))
+
+
+def _names(results):
+    return [r['name'] for r in results]
+
+
+class TestCustomerDirectory:
+    """Tests for the in-memory directory search and the database fallback."""
+
+    def test_prefix_matches_rank_first_accent_insensitive(self, db):
+        _, session = db
+        assert _names(search_customers(session, 1, 'jose')) == ['José Martínez', 'Almacén Don José']
+        assert _names(search_customers(session, 1, 'mar')) == ['Marta Pérez', 'José Martínez']
+
+    def test_tax_id_phone_and_empty_query(self, db):
+        _, session = db
+        assert search_customers(session, 1, '12345678') == [
+            {'id': 2, 'name': 'José Martínez', 'tax_id': '20-12345678-9', 'phone': '351-4444'}
+        ]
+        assert _names(search_customers(session, 1, '351')) == ['Almacén Don José', 'José Martínez']
+        assert len(search_customers(session, 1, '', limit=2)) == 2
+
+    def test_large_tenants_search_the_database(self, db):
+        app, session = db
+        app.config['CUSTOMER_DIRECTORY_MAX_ROWS'] = 2
+        session.connection().connection.driver_connection.create_function('immutable_unaccent', 1, _unaccent)
+
+        assert _names(search_customers(session, 1, 'mar')) == ['Marta Pérez', 'José Martínez']
+        assert _names(search_customers(session, 1, 'JOSÉ')) == ['José Martínez', 'Almacén Don José']
+        assert _names(search_customers(session, 1, 'almacen')) == ['Almacén Don José']
+        assert _names(search_customers(session, 1, '', limit=1)) == ['Almacén Don José']
+
+
+class TestDefaultCustomer:
+    """Tests for the default customer lookup used by the POS screen."""
+
+    def test_returns_id_and_name_only(self, db):
+        _, session = db
+        assert get_default_customer(session, 1) == {'id': 1, 'name': 'Consumidor Final'}
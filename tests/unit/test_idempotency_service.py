@@ -0,0 +1,184 @@
+"""
+Unit tests for the idempotency reservation of sale confirmation and payments (no Redis required).
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from app.blueprints import sales
+from app.exceptions import BusinessLogicError, DuplicateRequestError
+from app.models import FinanceLedger, PurchaseInvoice, PurchaseInvoicePayment, Supplier, Tenant
+from app.services import cache_service
+from app.services.idempotency_service import run_idempotent
+from app.services.payment_service import register_invoice_payment
+
+
+class _FakeCache:
+    """In-memory stand-in for the CacheService idempotency primitives."""
+
+    def __init__(self):
+        self.values = {}
+
+    def reserve_idempotency_key(self, tenant_id, scope, key, marker, ttl):
+        current = self.values.setdefault((tenant_id, scope, key), marker)
+        return (True, None) if current == marker else (False, current)
+
+    def complete_idempotency_key(self, tenant_id, scope, key, value, ttl):
+        self.values[(tenant_id, scope, key)] = value
+
+    def release_idempotency_key(self, tenant_id, scope, key, marker):
+        if self.values.get((tenant_id, scope, key)) == marker:
+            del self.values[(tenant_id, scope, key)]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    fake = _FakeCache()
+    monkeypatch.setattr(cache_service, '_cache_service', fake)
+    with Flask(__name__).app_context():
+        yield fake
+
+
+def _counting(result):
+    calls = []
+
+    def work():
+        calls.append(1)
+        return result
+    return work, calls
+
+
+class TestRunIdempotent:
+    """Tests for reserve / replay / release of request keys."""
+
+    def test_duplicate_gets_the_original_result(self, cache):
+        work, calls = _counting(17)
+
+        assert run_idempotent(1, 'sale', 'abc', work) == 17
+        assert run_idempotent(1, 'sale', 'abc', work) == 17
+        assert len(calls) == 1
+        assert run_idempotent(2, 'sale', 'abc', work) == 17  # keys are per tenant
+        assert len(calls) == 2
+
+    def test_in_flight_duplicate_is_rejected(self, cache):
+        def work():
+            return run_idempotent(1, 'debt_payment', 'abc', lambda: 99)
+
+        with pytest.raises(DuplicateRequestError):
+            run_idempotent(1, 'debt_payment', 'abc', work)
+
+    def test_failed_work_releases_the_key(self, cache):
+        def fail():
+            raise BusinessLogicError('Monto inválido')
+
+        with pytest.raises(BusinessLogicError):
+            run_idempotent(1, 'invoice_payment', 'abc', fail)
+
+        assert cache.values == {}
+        assert run_idempotent(1, 'invoice_payment', 'abc', lambda: 5) == 5
+
+    def test_runs_unguarded_without_key_or_cache(self, cache, monkeypatch):
+        work, calls = _counting(3)
+        run_idempotent(1, 'sale', '', work)
+        run_idempotent(1, 'sale', None, work)
+        monkeypatch.setattr(cache_service, '_cache_service', None)
+        run_idempotent(1, 'sale', 'abc', work)
+        run_idempotent(1, 'sale', 'abc', work)
+
+        assert len(calls) == 4
+        assert cache.values == {}
+
+
+class TestInvoicePaymentFallback:
+    """Without Redis, a resubmitted invoice payment finds the stored payment by its key."""
+
+    @pytest.fixture
+    def db(self, sqlite_session):
+        session = sqlite_session(Tenant, Supplier, PurchaseInvoice, PurchaseInvoicePayment, FinanceLedger)
+        session.add(Supplier(id=1, tenant_id=1, name='Proveedor'))
+        session.add(PurchaseInvoice(id=1, tenant_id=1, supplier_id=1, invoice_number='B-1',
+                                    invoice_date=date(2026, 10, 1), total_amount=Decimal('100.00'),
+                                    paid_amount=Decimal('0')))
+        session.commit()
+        return session
+
+    def test_same_key_registers_one_payment(self, db, monkeypatch):
+        monkeypatch.setattr(cache_service, '_cache_service', None)
+
+        def pay():
+            payment = register_invoice_payment(tenant_id=1, invoice_id=1, amount=Decimal('40.00'),
+                                               payment_method='CASH', paid_at=datetime(2026, 10, 2),
+                                               session=db, idempotency_key='pay-1')
+            db.commit()
+            return payment.id
+
+        with Flask(__name__).app_context():
+            first = run_idempotent(1, 'invoice_payment', 'pay-1', pay)
+            second = run_idempotent(1, 'invoice_payment', 'pay-1', pay)
+
+        assert first == second
+        assert db.query(PurchaseInvoicePayment).count() == 1
+        assert db.query(FinanceLedger).count() == 1
+        assert db.get(PurchaseInvoice, 1).paid_amount == Decimal('40.00')
+
+
+class _Session:
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class TestConfirmDraftRoute:
+    """A resubmitted POS ticket replays the original sale without touching the cart."""
+
+    @pytest.fixture
+    def pos(self, app, monkeypatch):
+        fake = _FakeCache()
+        calls = {'draft': 0, 'confirm': 0, 'clear': 0}
+        principal = {'user_id': 1, 'email': 'cajero@example.com', 'full_name': 'Cajero', 'user_active': True,
+                     'tenant_id': 1, 'role': 'STAFF', 'tenant_suspended': False}
+
+        def get_or_create_draft(session, tenant_id, user_id):
+            calls['draft'] += 1
+            # The first confirmation consumed the draft: later loads get an empty one
+            return SimpleNamespace(id=calls['draft'], lines=[1] if calls['draft'] == 1 else [])
+
+        def confirm_sale_from_draft(**kwargs):
+            calls['confirm'] += 1
+            return 41
+
+        def clear_draft(**kwargs):
+            calls['clear'] += 1
+
+        monkeypatch.setattr(cache_service, '_cache_service', fake)
+        monkeypatch.setattr('app.middleware.get_principal', lambda *args: principal)
+        monkeypatch.setattr(sales, 'get_session', lambda: _Session())
+        monkeypatch.setattr(sales, 'confirm_sale_from_draft', confirm_sale_from_draft)
+        monkeypatch.setattr(sales.sale_draft_service, 'get_or_create_draft', get_or_create_draft)
+        monkeypatch.setattr(sales.sale_draft_service, 'clear_draft', clear_draft)
+
+        client = app.test_client()
+        with client.session_transaction() as http_session:
+            http_session['user_id'] = 1
+            http_session['tenant_id'] = 1
+        return client, calls
+
+    def test_same_key_twice_replays_the_sale(self, pos):
+        client, calls = pos
+        form = {'idempotency_key': 'ticket-1', 'payments[0][method]': 'cash', 'payments[0][amount]': '10'}
+
+        first = client.post('/sales/confirm_draft', data=form)
+        second = client.post('/sales/confirm_draft', data=form)
+
+        assert first.status_code == second.status_code == 302
+        assert second.headers['Location'] == first.headers['Location']
+        assert calls == {'draft': 1, 'confirm': 1, 'clear': 1}
+        with client.session_transaction() as http_session:
+            messages = [message for _, message in http_session['_flashes']]
+        assert messages == ['Venta #41 confirmada exitosamente'] * 2
@@ -0,0 +1,81 @@
+"""
+Unit tests for the structured purchase invoice search (SQLite in memory).
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.models import InvoiceStatus, PurchaseInvoice, Supplier, Tenant
+from app.services.invoice_search_service import get_invoice_page, parse_invoice_query
+
+
+@pytest.fixture
+def db(sqlite_session):
+    session = sqlite_session(Tenant, Supplier, PurchaseInvoice)
+    now = datetime.now()
+    session.add_all([
+        Supplier(id=1, tenant_id=1, name='Distribuidora Norte', created_at=now),
+        Supplier(id=2, tenant_id=1, name='Lácteos Sur', created_at=now),
+    ])
+    rows = [
+        # id, supplier, number, invoice_date, due_date, total, status
+        (1, 1, 'A-0001', date(2026, 3, 1), date(2026, 3, 15), '1234.50', InvoiceStatus.PENDING),
+        (2, 2, 'B-0100', date(2026, 3, 10), None, '99.99', InvoiceStatus.PAID),
+        (3, 2, '1234', date(2026, 4, 2), date(2026, 3, 15), '10.00', InvoiceStatus.PARTIALLY_PAID),
+        (4, 1, 'A-0002', date(2026, 4, 5), date(2099, 5, 1), '1234.00', InvoiceStatus.PENDING),
+    ]
+    for id, supplier_id, number, invoice_date, due_date, total, status in rows:
+        session.add(PurchaseInvoice(id=id, tenant_id=1, supplier_id=supplier_id, invoice_number=number,
+                                    invoice_date=invoice_date, due_date=due_date, total_amount=Decimal(total),
+                                    paid_amount=Decimal('0'), status=status, created_at=now))
+    session.commit()
+    return session
+
+
+def _ids(db, q, **kwargs):
+    return [i.id for i in get_invoice_page(db, 1, search_query=q, **kwargs)['items']]
+
+
+class TestParseInvoiceQuery:
+    """Tests for search term classification."""
+
+    def test_dates(self):
+        assert parse_invoice_query('15/03/2026') == {'kind': 'date', 'start': date(2026, 3, 15),
+                                                     'end': date(2026, 3, 16)}
+        assert parse_invoice_query('2026-03-15')['start'] == date(2026, 3, 15)
+        assert parse_invoice_query('12/2026') == {'kind': 'date', 'start': date(2026, 12, 1),
+                                                  'end': date(2027, 1, 1)}
+        assert parse_invoice_query('31/02/2026')['kind'] == 'text'
+
+    def test_amounts_statuses_and_text(self):
+        assert parse_invoice_query('$ 1.234,5') == {'kind': 'amount', 'min': Decimal('1234.5'),
+                                                    'max': Decimal('1234.6'), 'number': None}
+        assert parse_invoice_query('1234')['number'] == '1234'
+        assert parse_invoice_query(' Pagadas ') == {'kind': 'status', 'status': 'PAID'}
+        assert parse_invoice_query('lácteos') == {'kind': 'text', 'text': 'lácteos'}
+        assert parse_invoice_query('   ') is None
+
+
+class TestInvoicePage:
+    """Tests for filtering and keyset pagination of the invoice list."""
+
+    def test_search_kinds(self, db):
+        assert _ids(db, '15/03/2026') == [3, 1]
+        assert _ids(db, '1234') == [3, 1, 4]
+        assert _ids(db, '1.234,00') == [4]
+        assert _ids(db, 'pagada') == [2]
+        assert _ids(db, 'vencidas') == [1]
+        assert _ids(db, 'SUR') == [3, 2]
+        assert _ids(db, 'a-00') == [1, 4]
+
+    def test_pages_by_due_date_without_due_date_last(self, db):
+        first = get_invoice_page(db, 1, limit=2, with_count=True)
+        second = get_invoice_page(db, 1, limit=2, cursor=first['next_cursor'])
+
+        assert [i.id for i in first['items']] == [3, 1]
+        assert [i.id for i in second['items']] == [4, 2]
+        assert second['next_cursor'] is None
+        assert first['total'] == {'count': 4, 'exact': True}
+        assert first['items'][1].is_overdue is (date(2026, 3, 15) < date.today())
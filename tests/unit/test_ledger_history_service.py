@@ -0,0 +1,87 @@
+"""
+Unit tests for the paginated / streamed finance ledger (SQLite in memory).
+"""
+
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.models import FinanceLedger, LedgerReferenceType, LedgerType, Tenant
+from app.services.ledger_history_service import (
+    build_ledger_query, get_ledger_page, get_period_totals, iter_ledger_csv, iter_ledger_entries
+)
+
+
+@pytest.fixture
+def db(sqlite_session):
+    session = sqlite_session(Tenant, FinanceLedger)
+    # Oct 1st-3rd: one income (cash) and one expense (transfer) per day, two entries share a timestamp
+    rows = [
+        (1, datetime(2026, 10, 1, 9), LedgerType.INCOME, '100', 'CASH'),
+        (2, datetime(2026, 10, 1, 18), LedgerType.EXPENSE, '30', 'TRANSFER'),
+        (3, datetime(2026, 10, 2, 9), LedgerType.INCOME, '200', 'CASH'),
+        (4, datetime(2026, 10, 2, 9), LedgerType.EXPENSE, '50', 'TRANSFER'),
+        (5, datetime(2026, 10, 3, 9), LedgerType.INVOICE, '70', 'CUENTA_CORRIENTE'),
+    ]
+    for id, when, entry_type, amount, method in rows:
+        session.add(FinanceLedger(id=id, tenant_id=1, datetime=when, type=entry_type, amount=Decimal(amount),
+                                  reference_type=LedgerReferenceType.MANUAL, payment_method=method))
+    session.add(FinanceLedger(id=9, tenant_id=2, datetime=datetime(2026, 10, 2, 12), type=LedgerType.INCOME,
+                              amount=Decimal('999'), reference_type=LedgerReferenceType.MANUAL,
+                              payment_method='CASH'))
+    session.commit()
+    return session
+
+
+class TestLedgerHistory:
+    """Tests for ledger pagination, totals and streaming."""
+
+    def test_pages_are_newest_first_and_break_ties_by_id(self, db):
+        query = build_ledger_query(db, 1)
+        first = get_ledger_page(query, limit=2)
+        second = get_ledger_page(query, cursor=first['next_cursor'], limit=2)
+        third = get_ledger_page(query, cursor=second['next_cursor'], limit=2)
+
+        assert [e.id for e in first['items']] == [5, 4]
+        assert [e.id for e in second['items']] == [3, 2]
+        assert [e.id for e in third['items']] == [1]
+        assert third['next_cursor'] is None
+
+    def test_period_totals_follow_filters(self, db):
+        totals = get_period_totals(build_ledger_query(db, 1, start=date(2026, 10, 2), end=date(2026, 10, 2)))
+
+        assert totals['count'] == 2
+        assert totals['by_type']['INCOME'] == {'count': 1, 'amount': Decimal('200')}
+        assert totals['by_type']['INVOICE']['count'] == 0
+        assert totals['net'] == Decimal('150')
+
+        cash = get_period_totals(build_ledger_query(db, 1, method='cash'))
+        assert cash['count'] == 2 and cash['net'] == Decimal('300')
+
+    def test_stream_yields_all_rows_in_chunks(self, db):
+        query = build_ledger_query(db, 1, entry_type='EXPENSE')
+        assert [e.id for e in iter_ledger_entries(query, chunk_size=1)] == [4, 2]
+
+        chunks = list(iter_ledger_csv(build_ledger_query(db, 1), chunk_size=2))
+        rows = list(csv.reader(io.StringIO(''.join(chunks).lstrip('\ufeff'))))
+        assert len(chunks) == 3
+        assert rows[0][0] == 'id'
+        assert [r[0] for r in rows[1:]] == ['5', '4', '3', '2', '1']
+
+    def test_csv_neutralises_formula_cells(self, db):
+        db.get(FinanceLedger, 5).notes = '=HYPERLINK("http://x")'
+        db.get(FinanceLedger, 4).notes = '-10 ajuste'
+        db.get(FinanceLedger, 3).category = '@SUM(A1)'
+        db.get(FinanceLedger, 2).notes = 'pago 2 + iva'
+        db.commit()
+
+        rows = list(csv.reader(io.StringIO(''.join(iter_ledger_csv(build_ledger_query(db, 1))).lstrip('\ufeff'))))
+        notes = {r[0]: (r[7], r[8]) for r in rows[1:]}
+
+        assert notes['5'][1] == '\'=HYPERLINK("http://x")'
+        assert notes['4'][1] == "'-10 ajuste"
+        assert notes['3'][0] == "'@SUM(A1)"
+        assert notes['2'][1] == 'pago 2 + iva'
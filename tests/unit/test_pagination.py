@@ -0,0 +1,22 @@
+"""
+Unit tests for keyset pagination helpers.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+from app.services.pagination import decode_cursor, encode_cursor
+
+
+class TestCursor:
+    """Tests for cursor encoding."""
+
+    def test_round_trip_keeps_types(self):
+        key = [datetime(2026, 10, 17, 9, 30), Decimal('12.50'), 'Agua', 42]
+
+        assert decode_cursor(encode_cursor(key), 4) == key
+
+    def test_invalid_cursor_means_first_page(self):
+        assert decode_cursor(None, 2) is None
+        assert decode_cursor('not-a-cursor!', 2) is None
+        assert decode_cursor(encode_cursor(['Agua', 1]), 3) is None
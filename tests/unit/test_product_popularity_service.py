@@ -0,0 +1,49 @@
+"""
+Unit tests for the incremental product popularity buckets (SQLite in memory).
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.models import ProductSalesDaily
+from app.services import product_popularity_service as pps
+
+
+@pytest.fixture
+def db(sqlite_session):
+    return sqlite_session(ProductSalesDaily)
+
+
+def _totals(db, tenant_id, window_days=90):
+    sub = pps.totals_subquery(tenant_id, window_days)
+    return {pid: Decimal(str(qty)) for pid, qty in db.execute(select(sub.c.product_id, sub.c.total_sold))}
+
+
+class TestRecordQuantities:
+    """Tests for applying sale deltas to the day buckets."""
+
+    def test_deltas_accumulate_per_day(self, db):
+        sold_at = datetime.now()
+        pps.record_quantities(db, 1, sold_at, [(10, Decimal('2')), (11, Decimal('1')), (10, Decimal('1'))])
+        pps.record_quantities(db, 1, sold_at, {10: Decimal('-1'), 11: Decimal('0.5')}.items())  # adjust
+        pps.record_quantities(db, 1, sold_at, [(11, Decimal('-1.5'))])  # delete
+
+        assert _totals(db, 1) == {10: Decimal('2'), 11: Decimal('0')}
+        assert db.query(ProductSalesDaily).count() == 2
+
+    def test_window_and_tenant_scoping(self, db):
+        pps.record_quantities(db, 1, date.today() - timedelta(days=5), [(10, 3)])
+        pps.record_quantities(db, 1, date.today() - timedelta(days=200), [(10, 7)])
+        pps.record_quantities(db, 2, date.today(), [(10, 4)])
+
+        assert _totals(db, 1) == {10: Decimal('3')}
+        assert _totals(db, 1, window_days=365) == {10: Decimal('10')}
+        assert _totals(db, 2) == {10: Decimal('4')}
+
+    def test_zero_deltas_write_nothing(self, db):
+        pps.record_quantities(db, 1, datetime.now(), [(10, 1), (10, -1)])
+
+        assert db.query(ProductSalesDaily).count() == 0
@@ -0,0 +1,67 @@
+"""
+Unit tests for product search helpers (no database required).
+"""
+
+import pytest
+from flask import Flask
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from app.services import product_search_service as pss
+
+
+def _compile(clause):
+    return str(clause.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+
+
+class TestNormalizeQuery:
+    """Tests for query normalization (must match product_search_text())."""
+
+    def test_strips_accents_case_and_spaces(self):
+        assert pss.normalize_query('  Jamón   CRUDO ') == 'jamon crudo'
+
+    def test_caps_length(self):
+        assert len(pss.normalize_query('a' * 500)) == pss.MAX_QUERY_LENGTH
+
+
+class TestSearchFilters:
+    """Tests for the generated search SQL."""
+
+    def test_like_wildcards_in_input_are_escaped(self):
+        params = pss.like_filter('50%_OFF').compile(dialect=postgresql.dialect()).params
+
+        assert '%50\\%\\_off%' in params.values()
+
+    def test_trigram_filter_uses_search_text_function(self):
+        sql = _compile(pss.trigram_filter('Café'))
+
+        assert 'product_search_text(product.name, product.sku, product.barcode)' in sql
+        assert "'cafe'" in sql
+
+    def test_backend_can_be_forced_by_config(self):
+        app = Flask(__name__)
+        app.config['PRODUCT_SEARCH_BACKEND'] = 'like'
+        with app.app_context():
+            assert pss.trigram_search_available(db_session=None) is False
+
+
+class _PgError(Exception):
+    def __init__(self, pgcode):
+        super().__init__(pgcode)
+        self.pgcode = pgcode
+
+
+class TestBackendFallback:
+    """Only a missing trigram backend switches the worker to LIKE search."""
+
+    @pytest.mark.parametrize('error, available', [
+        (OperationalError('SELECT 1', {}, _PgError('57014')), True),   # statement timeout
+        (OperationalError('SELECT 1', {}, _PgError('55P03')), True),   # lock timeout
+        (ProgrammingError('SELECT 1', {}, _PgError('42883')), False),  # undefined function
+        (ProgrammingError('SELECT 1', {}, _PgError('42704')), False),  # undefined object
+    ])
+    def test_only_missing_backend_disables_trigram(self, monkeypatch, error, available):
+        monkeypatch.setattr(pss, '_trigram_available', True)
+
+        pss.report_search_error(error)
+
+        assert pss._trigram_available is available
@@ -0,0 +1,62 @@
+"""
+Unit tests for the quote search document and paginated list (SQLite in memory).
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.models import Quote, Tenant
+from app.services.quote_search_service import get_quote_page
+
+
+@pytest.fixture
+def db(sqlite_session):
+    session = sqlite_session(Tenant, Quote)
+    rows = [
+        # id, number, customer, phone, notes, issued_at, valid_until, total, status
+        (1, 'P-0001', 'Ana Gómez', '351-555', None, datetime(2026, 3, 1, 10), date(2026, 3, 10), '150.00', 'SENT'),
+        (2, 'P-0002', 'Bruno Díaz', None, 'Entrega 50% off', datetime(2026, 3, 5, 10), date(2099, 1, 1),
+         '99.90', 'DRAFT'),
+        (3, 'P-0003', 'Carla Ruiz', '351-777', None, datetime(2026, 3, 5, 10), date(2026, 3, 6), '150.50',
+         'ACCEPTED'),
+    ]
+    for id, number, customer, phone, notes, issued_at, valid_until, total, status in rows:
+        session.add(Quote(id=id, tenant_id=1, quote_number=number, customer_name=customer, customer_phone=phone,
+                          notes=notes, issued_at=issued_at, valid_until=valid_until, total_amount=Decimal(total),
+                          status=status, created_at=issued_at, updated_at=issued_at))
+    session.add(Quote(id=9, tenant_id=2, quote_number='P-0001', customer_name='Ana Gómez', issued_at=datetime.now(),
+                      total_amount=Decimal('1'), status='DRAFT', created_at=datetime.now(), updated_at=datetime.now()))
+    session.commit()
+    return session
+
+
+def _ids(db, **kwargs):
+    return [q.id for q in get_quote_page(db, 1, **kwargs)['items']]
+
+
+class TestQuotePage:
+    """Tests for quote search, SQL expiry and keyset pagination."""
+
+    def test_search_document_and_typed_terms(self, db):
+        assert _ids(db, search='ANA') == [1]
+        assert _ids(db, search='351-') == [3, 1]
+        assert _ids(db, search='50%') == [2]
+        assert _ids(db, search='05/03/2026') == [3, 2]
+        assert _ids(db, search='150') == [3, 1]
+        assert _ids(db, search='2') == [2]
+
+    def test_expiry_is_computed_in_sql(self, db):
+        page = get_quote_page(db, 1)
+
+        assert {q.id: q.display_expired for q in page['items']} == {1: True, 2: False, 3: False}
+        assert _ids(db, status='EXPIRED') == [1]
+
+    def test_pages_are_newest_first(self, db):
+        first = get_quote_page(db, 1, limit=2, with_count=True)
+        second = get_quote_page(db, 1, limit=2, cursor=first['next_cursor'])
+
+        assert [q.id for q in first['items']] == [3, 2]
+        assert [q.id for q in second['items']] == [1]
+        assert first['total'] == {'count': 3, 'exact': True}
@@ -0,0 +1,48 @@
+"""
+Unit tests for converting a quote to a sale (SQLite in memory).
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models import (
+    UOM, FinanceLedger, Product, ProductSalesDaily, ProductStock, Quote, QuoteLine, Sale, SaleLine,
+    StockMove, StockMoveLine, Tenant
+)
+from app.services.quote_service import convert_quote_to_sale
+
+
+@pytest.fixture
+def db(sqlite_session):
+    session = sqlite_session(Tenant, UOM, Product, ProductStock, Sale, SaleLine, Quote, QuoteLine, StockMove,
+                             StockMoveLine, FinanceLedger, ProductSalesDaily, autoflush=False)
+    session.add(UOM(id=1, tenant_id=1, name='Unidad', symbol='u'))
+    for pid in (10, 11):
+        session.add(Product(id=pid, tenant_id=1, name=f'Producto {pid}', uom_id=1, active=True,
+                            sale_price=Decimal('5.00'), cost=Decimal('0')))
+        session.add(ProductStock(product_id=pid, on_hand_qty=20))
+    session.add(Quote(id=1, tenant_id=1, quote_number='P-1', status='SENT', issued_at=datetime.now(),
+                      valid_until=date.today() + timedelta(days=7), payment_method='CASH',
+                      customer_name='Cliente', total_amount=Decimal('25.00')))
+    session.add_all([
+        QuoteLine(id=1, quote_id=1, product_id=10, product_name_snapshot='Producto 10', qty=Decimal('3'),
+                  unit_price=Decimal('5.00'), line_total=Decimal('15.00')),
+        QuoteLine(id=2, quote_id=1, product_id=11, product_name_snapshot='Producto 11', qty=Decimal('2'),
+                  unit_price=Decimal('5.00'), line_total=Decimal('10.00')),
+    ])
+    session.commit()
+    return session
+
+
+class TestConvertQuoteToSale:
+    """Tests for the quote -> confirmed sale conversion."""
+
+    def test_converted_lines_count_towards_popularity(self, db):
+        sale_id = convert_quote_to_sale(1, db, 1)
+
+        buckets = {(row.product_id, row.day): row.qty for row in db.query(ProductSalesDaily).all()}
+        sale = db.get(Sale, sale_id)
+        assert buckets == {(10, sale.datetime.date()): Decimal('3'), (11, sale.datetime.date()): Decimal('2')}
+        assert db.get(Quote, 1).sale_id == sale_id
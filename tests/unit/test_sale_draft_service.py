@@ -0,0 +1,107 @@
+"""
+Unit tests for loading and confirming a sale draft (SQLite in memory).
+"""
+
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.models import (
+    UOM, FinanceLedger, Product, ProductSalesDaily, ProductStock, Sale, SaleDraft, SaleDraftLine, SaleLine,
+    SalePayment, StockMove, StockMoveLine, Tenant
+)
+from app.services import sales_service
+from app.services.sale_draft_service import calculate_draft_totals, load_draft_for_confirmation
+from app.services.sales_service import confirm_sale_from_draft
+
+
+@pytest.fixture
+def make_db(sqlite_session):
+    def make(line_count):
+        session = sqlite_session(Tenant, UOM, Product, ProductStock, SaleDraft, SaleDraftLine, Sale, SaleLine,
+                                 SalePayment, StockMove, StockMoveLine, FinanceLedger, ProductSalesDaily)
+        session.add_all([UOM(id=1, tenant_id=1, name='Unidad', symbol='u'),
+                         UOM(id=2, tenant_id=1, name='Kilogramo', symbol='kg')])
+        session.add(SaleDraft(id=1, tenant_id=1, user_id=1, discount_value=Decimal('0')))
+        for i in range(1, line_count + 1):
+            session.add(Product(id=i, tenant_id=1, name=f'Producto {i}', uom_id=1 + i % 2, active=True,
+                                is_unlimited_stock=i % 3 == 0, sale_price=Decimal('10.00'), cost=Decimal('0')))
+            session.add(ProductStock(product_id=i, on_hand_qty=100))
+            session.add(SaleDraftLine(id=i, draft_id=1, product_id=i, qty=Decimal(i), unit_price=None))
+        session.commit()
+        session.expunge_all()
+        return session
+    return make
+
+
+@pytest.fixture
+def unlocked_stocks(monkeypatch):
+    """SQLite has no FOR UPDATE: read stock levels without the lock."""
+    def lock_stocks(session, product_ids, tenant_id, operation):
+        rows = session.query(ProductStock).filter(ProductStock.product_id.in_(product_ids)).all()
+        return {row.product_id: row.on_hand_qty for row in rows}
+    monkeypatch.setattr(sales_service, '_lock_stocks', lock_stocks)
+
+
+def _count_statements(engine, work):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        work()
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    return len(statements)
+
+
+class TestLoadDraftForConfirmation:
+    """The confirmation read path must not issue per-line queries."""
+
+    @pytest.mark.parametrize('line_count', [2, 40])
+    def test_constant_query_count(self, make_db, line_count):
+        session = make_db(line_count)
+        result = {}
+
+        def confirm_reads():
+            draft = load_draft_for_confirmation(session, 1, 1, 1)
+            result['totals'] = calculate_draft_totals(draft)
+            result['products'] = [(line.product.is_unlimited_stock, line.product.uom_id) for line in draft.lines]
+
+        assert _count_statements(session.get_bind(), confirm_reads) == 1
+        assert len(result['totals']['lines']) == line_count
+        assert {line['product_uom_name'] for line in result['totals']['lines']} == {'Unidad', 'Kilogramo'}
+
+    def test_scoped_to_tenant_and_user(self, make_db):
+        session = make_db(1)
+
+        assert load_draft_for_confirmation(session, 1, 2, 1) is None
+        assert load_draft_for_confirmation(session, 1, 1, 2) is None
+
+
+class TestConfirmSaleFromDraft:
+    """Confirming a draft issues the same statements whatever its size."""
+
+    def _confirm(self, session):
+        total = calculate_draft_totals(load_draft_for_confirmation(session, 1, 1, 1))['total']
+        session.expunge_all()
+        counted = {}
+
+        def confirm():
+            counted['sale_id'] = confirm_sale_from_draft(1, [{'method': 'CASH', 'amount': str(total)}],
+                                                         'key-1', session, 1, 1)
+
+        count = _count_statements(session.get_bind(), confirm)
+        return count, counted['sale_id']
+
+    def test_statement_count_does_not_grow_with_lines(self, app, make_db, unlocked_stocks):
+        with app.app_context():
+            small, _ = self._confirm(make_db(2))
+            large_session = make_db(40)
+            large, large_id = self._confirm(large_session)
+
+        assert small == large
+        assert large_session.query(SaleLine).filter_by(sale_id=large_id).count() == 40
+        # Unlimited-stock products (every third one) get no stock move line
+        assert large_session.query(StockMoveLine).count() == 27
+        assert large_session.get(SaleDraft, 1) is None
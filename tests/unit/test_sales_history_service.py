@@ -0,0 +1,57 @@
+"""
+Unit tests for the paginated sales history (SQLite in memory).
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.models import Customer, Sale, SaleStatus, Tenant
+from app.services.sales_history_service import get_sales_page
+
+
+@pytest.fixture
+def db(sqlite_session):
+    session = sqlite_session(Tenant, Customer, Sale)
+    # Two sales per day on Oct 1st-3rd, plus another tenant and a cancelled sale
+    sale_id = 0
+    for day in (1, 2, 3):
+        for hour in (9, 18):
+            sale_id += 1
+            session.add(Sale(id=sale_id, tenant_id=1, datetime=datetime(2026, 10, day, hour),
+                             total=Decimal('10.00') * day, amount_paid=Decimal('10.00') * day,
+                             status=SaleStatus.CONFIRMED))
+    session.add(Sale(id=90, tenant_id=2, datetime=datetime(2026, 10, 2, 12), total=Decimal('5'),
+                     amount_paid=Decimal('5'), status=SaleStatus.CONFIRMED))
+    session.add(Sale(id=91, tenant_id=1, datetime=datetime(2026, 10, 2, 12), total=Decimal('5'),
+                     amount_paid=Decimal('5'), status=SaleStatus.CANCELLED))
+    session.commit()
+    return session
+
+
+class TestSalesPage:
+    """Tests for cursor pagination of confirmed sales."""
+
+    def test_pages_are_newest_first_with_sql_totals(self, db):
+        first = get_sales_page(db, 1, limit=4)
+        second = get_sales_page(db, 1, limit=4, cursor=first['next_cursor'])
+
+        assert [s.id for s in first['items']] == [6, 5, 4, 3]
+        assert [s.id for s in second['items']] == [2, 1]
+        assert second['next_cursor'] is None
+        assert first['page_totals']['count'] == 4
+        assert Decimal(str(first['page_totals']['total'])) == Decimal('100.00')
+        assert first['range_totals'] is None
+
+    def test_jump_to_date_starts_at_end_of_day(self, db):
+        page = get_sales_page(db, 1, limit=3, jump_to=date(2026, 10, 2))
+
+        assert [s.id for s in page['items']] == [4, 3, 2]
+
+    def test_date_range_totals(self, db):
+        page = get_sales_page(db, 1, start=date(2026, 10, 2), end=date(2026, 10, 3), limit=1)
+
+        assert [s.id for s in page['items']] == [6]
+        assert page['range_totals']['count'] == 4
+        assert Decimal(str(page['range_totals']['total'])) == Decimal('100.00')
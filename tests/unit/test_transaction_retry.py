@@ -0,0 +1,80 @@
+"""
+Unit tests for deadlock / serialization retries of the sale transactions.
+"""
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.blueprints.metrics import db_transaction_conflicts_failed_total, db_transaction_retries_total
+from app.exceptions import ConcurrencyError
+from app.services.transaction_retry import retry_reason, run_with_retry
+
+
+class _PgError(Exception):
+    def __init__(self, pgcode):
+        super().__init__(pgcode)
+        self.pgcode = pgcode
+
+
+def _db_error(pgcode):
+    return OperationalError('SELECT 1', {}, _PgError(pgcode))
+
+
+class _Session:
+    rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def _flaky(errors, result='ok'):
+    errors = list(errors)
+
+    def work():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return work
+
+
+class TestRunWithRetry:
+    """Tests for the bounded retry loop."""
+
+    def test_retryable_errors(self):
+        assert retry_reason(_db_error('40P01')) == 'deadlock'
+        assert retry_reason(_db_error('40001')) == 'serialization'
+        assert retry_reason(_db_error('23505')) is None
+        assert retry_reason(ValueError('40P01')) is None
+
+    def test_retries_until_success(self):
+        session = _Session()
+        retries = db_transaction_retries_total.labels(operation='test_op', reason='deadlock')
+        before = retries._value.get()
+
+        work = _flaky([_db_error('40P01'), _db_error('40P01')], result=42)
+
+        assert run_with_retry('test_op', session, work, base_delay=0) == 42
+        assert session.rollbacks == 2
+        assert retries._value.get() - before == 2
+
+    def test_gives_up_after_max_attempts(self):
+        session = _Session()
+        failed = db_transaction_conflicts_failed_total.labels(operation='test_op', reason='serialization')
+        before = failed._value.get()
+
+        with pytest.raises(ConcurrencyError) as exc_info:
+            run_with_retry('test_op', session, _flaky([_db_error('40001')] * 3), max_attempts=3, base_delay=0)
+
+        assert exc_info.value.status_code == 409
+        assert session.rollbacks == 3
+        assert failed._value.get() - before == 1
+
+    def test_other_errors_are_not_retried(self):
+        session = _Session()
+        error = _db_error('23505')
+
+        with pytest.raises(OperationalError) as exc_info:
+            run_with_retry('test_op', session, _flaky([error]), base_delay=0)
+
+        assert exc_info.value is error
+        assert session.rollbacks == 0